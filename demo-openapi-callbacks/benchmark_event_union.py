@@ -0,0 +1,158 @@
+"""
+Measure how the cost of validating one webhook payload grows with the number of event types in the union,
+for a plain Union and for a Union tagged by `event_type`. Works with pydantic v1 and v2:
+
+    python benchmark_event_union.py
+    python benchmark_event_union.py --sizes 2 12 64 --number 2000
+
+A plain Union validates the payload against its members in turn, so the cost grows with the position of the
+matching model. The tagged union reads `event_type` first and validates against that one model only.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Annotated, Callable, Literal, Optional, Union
+
+import pydantic
+from pydantic import BaseModel, Field, create_model
+
+PYDANTIC_V2 = pydantic.VERSION.startswith("2")
+
+
+class WorkspaceSchema(BaseModel):
+    id: str
+    name: str
+
+
+class SourceSchema(BaseModel):
+    id: str
+    type: str
+    identifier: str
+
+
+def make_event_models(count: int, tagged: bool) -> list:
+    """count event models shaped like the SeaNotify events, each with its own data schema."""
+    models = []
+    for index in range(count):
+        data_model = create_model(
+            f"Event{index}Data",
+            conversation_id=(str, ...),
+            conversation_title=(str, ...),
+            created_at=(datetime, ...),
+            **{f"field_{index}": (str, ...)},
+        )
+        fields = dict(
+            id=(str, ...),
+            version=(str, ...),
+            workspace=(WorkspaceSchema, ...),
+            source=(SourceSchema, ...),
+            data=(data_model, ...),
+        )
+        if tagged:
+            fields["event_type"] = (Literal[f"event.{index}"], f"event.{index}")
+        models.append(create_model(f"Event{index}", **fields))
+    return models
+
+
+def make_payload(index: int) -> bytes:
+    return json.dumps({
+        "id": "6e74c661-4c66-4d1e-81b0-64b2f4dcac98",
+        "version": "0.0.1",
+        "event_type": f"event.{index}",
+        "workspace": {"id": "workspace-123", "name": "Test Workspace"},
+        "source": {"id": "source-456", "type": "voice", "identifier": "Test AI Agent"},
+        "data": {
+            "conversation_id": "conv-789",
+            "conversation_title": "Example Conversation",
+            "created_at": "2025-06-20T23:44:30.000000",
+            f"field_{index}": "value",
+        },
+    }).encode()
+
+
+def make_validator(models: list, tagged: bool) -> Callable[[bytes], BaseModel]:
+    union = Union[tuple(models)]
+    if tagged:
+        union = Annotated[union, Field(discriminator="event_type")]
+    if PYDANTIC_V2:
+        from pydantic import TypeAdapter
+
+        return TypeAdapter(union).validate_json
+    envelope = create_model("EventEnvelope", __root__=(union, ...))
+    return lambda payload: envelope.parse_raw(payload).__root__
+
+
+def time_per_call(validate: Callable[[bytes], BaseModel], payload: bytes, number: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(number):
+        validate(payload)
+    return (time.perf_counter() - start_time) / number
+
+
+def run(sizes, number: int) -> list:
+    results = []
+    for size in sizes:
+        row = {"members": size}
+        for tagged in (False, True):
+            validate = make_validator(make_event_models(size, tagged), tagged)
+            payloads = [make_payload(index) for index in range(size)]
+            for index, payload in enumerate(payloads):
+                assert type(validate(payload)).__name__ == f"Event{index}"
+            per_payload = [time_per_call(validate, payload, number) for payload in payloads]
+            kind = "tagged" if tagged else "plain"
+            row[f"{kind}_first_us"] = per_payload[0] * 1e6
+            row[f"{kind}_mean_us"] = sum(per_payload) / size * 1e6
+            row[f"{kind}_last_us"] = per_payload[-1] * 1e6
+        results.append(row)
+    return results
+
+
+def print_results(results: list):
+    print(f"pydantic {pydantic.VERSION}, microseconds per payload")
+    print(f"{'members':>7} {'plain first':>12} {'plain mean':>11} {'plain last':>11} {'tagged mean':>12} {'tagged last':>12} {'speedup':>8}")
+    for row in results:
+        print(
+            f"{row['members']:>7} {row['plain_first_us']:>12.2f} {row['plain_mean_us']:>11.2f} {row['plain_last_us']:>11.2f}"
+            f" {row['tagged_mean_us']:>12.2f} {row['tagged_last_us']:>12.2f} {row['plain_mean_us'] / row['tagged_mean_us']:>7.1f}x"
+        )
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--sizes",
+        dest="sizes",
+        type=int,
+        nargs="+",
+        required=False,
+        default=[2, 4, 8, 12, 16, 32],
+        help="Set the numbers of event types in the union.",
+    )
+    parser.add_argument(
+        "--number",
+        dest="number",
+        type=int,
+        required=False,
+        default=1000,
+        help="Set the number of validations timed per payload.",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json",
+        action="store_true",
+        required=False,
+        default=False,
+        help="Print the results as JSON instead of a table.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run(args.sizes, args.number)
+    if args.json:
+        print(json.dumps({"pydantic_version": pydantic.VERSION, "results": results}, indent=2))
+    else:
+        print_results(results)
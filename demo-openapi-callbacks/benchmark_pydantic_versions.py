@@ -0,0 +1,496 @@
+"""
+Compare the pydantic v1 app (main_pydantic_1.py) with the pydantic v2 app (main_pydantic_2.py) on the SeaNotify
+event schemas:
+
+- validation throughput, from JSON bytes and from decoded dicts, per event model and through the event union,
+- JSON and dict serialization throughput,
+- memory per validated event,
+- OpenAPI generation time, for the event schemas alone and for the whole app,
+- app startup time, i.e. the time to import the app in a fresh interpreter until its OpenAPI document is ready.
+
+Every variant runs in its own interpreter, so both can be compared from one environment:
+
+    python benchmark_pydantic_versions.py
+    python benchmark_pydantic_versions.py --v1-python ~/venvs/pydantic1/bin/python --output results.json
+
+The payloads are generated from the JSON schema of every event model with a seeded random generator, so the same
+seed produces the same payloads for the event models both files define alike. The `payload_sha256` of every event
+model in the results shows which payloads differ, i.e. which event models the two files define differently.
+The JSON results also record the interpreter, platform and library versions of every variant.
+
+Without --v1-python, and with pydantic 2 installed, the v1 variant runs on `pydantic.v1`, the pure python copy of
+pydantic 1.10 shipped with pydantic 2. Its numbers are slower than those of the compiled pydantic<2 wheels, and
+FastAPI cannot build the OpenAPI document of its app, so the app OpenAPI time is left out. Pass an interpreter
+with `pip install "pydantic<2" "fastapi<0.100"` as --v1-python for a faithful comparison.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+VARIANTS = ("v1", "v2")
+# Swaps pydantic for its bundled v1 copy before main_pydantic_1.py is imported. FastAPI is imported first, so it
+# keeps using pydantic 2.
+_V1_COMPAT_IMPORT = "import fastapi.openapi.utils, sys, pydantic.v1; sys.modules['pydantic'] = pydantic.v1\n"
+
+
+# -- Payloads --
+def make_value(schema: dict, definitions: dict, rng: random.Random, name: str = "value") -> Any:
+    """A value valid for a JSON schema generated by pydantic v1 or v2, filling every optional field."""
+    if "$ref" in schema:
+        return make_value(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions, rng, name)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        # A Literal is a single-valued enum in v1 and a const in v2, neither draws a random number.
+        return schema["enum"][0] if len(schema["enum"]) == 1 else rng.choice(schema["enum"])
+    for key in ("allOf", "anyOf", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return make_value(options[0], definitions, rng, name)
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        properties = schema.get("properties")
+        if not properties:
+            return {f"{name}_key": f"{name}-{rng.randrange(10 ** 6)}"}
+        return {key: make_value(value, definitions, rng, key) for key, value in properties.items()}
+    if schema_type == "array":
+        return [make_value(schema.get("items", {}), definitions, rng, name) for _ in range(2)]
+    if schema_type == "string":
+        if schema.get("format") == "date-time":
+            return (datetime(2025, 1, 1) + timedelta(seconds=rng.randrange(3 * 10 ** 7))).isoformat()
+        if schema.get("format") == "uri":
+            return f"https://example.com/{name}/{rng.randrange(10 ** 6)}"
+        return f"{name}-{rng.randrange(10 ** 6)}"
+    if schema_type == "integer":
+        return rng.randrange(1000)
+    if schema_type == "number":
+        return round(rng.uniform(0, 1000), 3)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    return None
+
+
+def make_payloads(variant: "_Variant", seed: int) -> Dict[str, bytes]:
+    payloads = {}
+    for event_type, model in variant.event_types.items():
+        schema = variant.model_schema(model)
+        definitions = schema.get("$defs") or schema.get("definitions") or {}
+        payload = make_value(schema, definitions, random.Random(f"{seed}:{event_type}"))
+        payloads[event_type] = json.dumps(payload, separators=(",", ":")).encode()
+    return payloads
+
+
+# -- The two variants --
+class _Variant:
+    """The event models and pydantic operations of one variant, named the same for v1 and v2."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.compat = False
+        if name == "v2":
+            import pydantic
+
+            if not pydantic.VERSION.startswith("2"):
+                raise RuntimeError(f"the v2 variant needs pydantic 2, {sys.executable} has pydantic {pydantic.VERSION}")
+            import seanotify_events as events
+
+            self.pydantic_version = pydantic.VERSION
+            self.event_types = events.EVENT_TYPES
+            self.parse_event = events.parse_event
+            self._events = events
+            self.validate_json = lambda model, body: model.model_validate_json(body)
+            self.validate_python = lambda model, value: model.model_validate(value)
+            self.dump_json = lambda event: event.model_dump_json()
+            self.dump_python = lambda event: event.model_dump()
+            self.model_schema = lambda model: model.model_json_schema()
+        else:
+            self._events = _import_v1_app()
+            self.compat = self._events.BaseModel.__module__.startswith("pydantic.v1")
+            self.pydantic_version = _v1_version()
+            self.event_types = self._events.EVENT_TYPES
+            self.parse_event = self._events.parse_event
+            self.validate_json = lambda model, body: model.parse_raw(body)
+            self.validate_python = lambda model, value: model.parse_obj(value)
+            self.dump_json = lambda event: event.json()
+            self.dump_python = lambda event: event.dict()
+            self.model_schema = lambda model: model.schema()
+
+    def event_schemas(self) -> dict:
+        """The component schemas custom_openapi() builds for the event union and the batch envelope."""
+        ref_template = "#/components/schemas/{model}"
+        if self.name == "v2":
+            schemas = self._events.event_response_adapter.json_schema(ref_template=ref_template)
+            batch_schema = self._events.EventBatch.model_json_schema(ref_template=ref_template)
+            return {"EventResponse": schemas, "EventBatch": batch_schema}
+        schemas = {}
+        for model in (*self._events.EVENT_MODELS, self._events.EventBatch):
+            # v1 caches the schema of every model, clear it to measure its generation.
+            model.__schema_cache__.clear()
+            schemas[model.__name__] = model.schema(ref_template=ref_template)
+        return schemas
+
+    def app_openapi(self) -> Optional[dict]:
+        """Build the OpenAPI document of the app from scratch, None where FastAPI cannot build it."""
+        if self.compat:
+            return None
+        if self.name == "v2":
+            import main_pydantic_2 as app_module
+        else:
+            app_module = self._events
+        app_module.app.openapi_schema = None
+        return app_module.custom_openapi()
+
+
+def _v1_version() -> str:
+    import pydantic
+
+    return pydantic.VERSION if pydantic.VERSION.startswith("1") else pydantic.v1.VERSION
+
+
+def _import_v1_app():
+    import pydantic
+
+    if pydantic.VERSION.startswith("1"):
+        import main_pydantic_1
+
+        return main_pydantic_1
+    exec(_V1_COMPAT_IMPORT, {})
+    try:
+        import main_pydantic_1
+    finally:
+        sys.modules["pydantic"] = pydantic
+    return main_pydantic_1
+
+
+# -- Measurements --
+def per_second(function: Callable[[], Any], number: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(number):
+        function()
+    return number / (time.perf_counter() - start_time)
+
+
+def median_seconds(function: Callable[[], Any], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+def bytes_per_object(function: Callable[[], Any], number: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [function() for _ in range(number)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # The list holding the objects is not part of their size.
+    return (after - before - sys.getsizeof(objects)) / number
+
+
+def measure_models(variant: _Variant, payloads: Dict[str, bytes], number: int, memory_objects: int) -> Dict[str, dict]:
+    results = {}
+    for event_type, model in variant.event_types.items():
+        body = payloads[event_type]
+        value = json.loads(body)
+        event = variant.validate_json(model, body)
+        results[event_type] = {
+            "payload_sha256": hashlib.sha256(body).hexdigest(),
+            "validate_json_per_s": per_second(lambda: variant.validate_json(model, body), number),
+            "validate_python_per_s": per_second(lambda: variant.validate_python(model, value), number),
+            "parse_event_per_s": per_second(lambda: variant.parse_event(body), number),
+            "dump_json_per_s": per_second(lambda: variant.dump_json(event), number),
+            "dump_python_per_s": per_second(lambda: variant.dump_python(event), number),
+            "bytes_per_event": bytes_per_object(lambda: variant.validate_json(model, body), memory_objects),
+        }
+    return results
+
+
+def measure_startup(variant: _Variant, runs: int, cache: Optional[str]) -> dict:
+    """The median wall time of importing the app in a fresh interpreter, until its OpenAPI document is ready."""
+    if variant.name == "v2":
+        # main_pydantic_2.py loads or builds its OpenAPI document when the app starts.
+        code = "import main_pydantic_2\nmain_pydantic_2.load_openapi_document()\n"
+    elif variant.compat:
+        code = _V1_COMPAT_IMPORT + "import main_pydantic_1\n"
+    else:
+        code = "import main_pydantic_1\nmain_pydantic_1.app.openapi()\n"
+    timings = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = dict(os.environ, SEANOTIFY_SUBSCRIPTION_DB=os.path.join(work_dir, "subscriptions.db"))
+        env["SEANOTIFY_DELIVERY_LOG_DB"] = os.path.join(work_dir, "deliveries.db")
+        env["SEANOTIFY_OPENAPI_CACHE_DIR"] = os.path.join(work_dir, "openapi-cache")
+        if cache == "warm":
+            subprocess.run([sys.executable, "-c", code], cwd=SOURCE_DIR, env=env, check=True)
+        for run in range(runs):
+            if cache == "cold":
+                env["SEANOTIFY_OPENAPI_CACHE_DIR"] = os.path.join(work_dir, f"openapi-cache-{run}")
+            start_time = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=SOURCE_DIR, env=env, check=True)
+            timings.append(time.perf_counter() - start_time)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "runs": runs,
+        "openapi_cache": cache,
+        "includes_openapi": not variant.compat,
+    }
+
+
+def run_variant(name: str, number: int, memory_objects: int, schema_runs: int, startup_runs: int, seed: int) -> dict:
+    """Every measurement of one variant, in this interpreter."""
+    work_dir = tempfile.mkdtemp(prefix="seanotify-benchmark-")
+    # Keep the subscription store, the delivery log and the OpenAPI cache of main_pydantic_2.py out of the source tree.
+    os.environ.setdefault("SEANOTIFY_SUBSCRIPTION_DB", os.path.join(work_dir, "subscriptions.db"))
+    os.environ.setdefault("SEANOTIFY_DELIVERY_LOG_DB", os.path.join(work_dir, "deliveries.db"))
+    os.environ.setdefault("SEANOTIFY_OPENAPI_CACHE_DIR", os.path.join(work_dir, "openapi-cache"))
+    sys.path.insert(0, SOURCE_DIR)
+
+    variant = _Variant(name)
+    payloads = make_payloads(variant, seed)
+    for event_type, body in payloads.items():
+        assert variant.parse_event(body).event_type == event_type
+    models = measure_models(variant, payloads, number, memory_objects)
+
+    import fastapi
+
+    app_openapi = None
+    if not variant.compat:
+        app_openapi = median_seconds(variant.app_openapi, schema_runs)
+    startup = {"cold": measure_startup(variant, startup_runs, "cold")}
+    if name == "v2":
+        startup["warm"] = measure_startup(variant, startup_runs, "warm")
+    return {
+        "variant": name,
+        "pydantic_version": variant.pydantic_version,
+        "pydantic_v1_compat": variant.compat,
+        "fastapi_version": fastapi.__version__,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "models": models,
+        "summary": {
+            **{
+                metric: statistics.mean(result[metric] for result in models.values())
+                for metric in next(iter(models.values()))
+                if metric != "payload_sha256"
+            },
+            "event_schemas_s": median_seconds(variant.event_schemas, schema_runs),
+            "app_openapi_s": app_openapi,
+        },
+        "startup": startup,
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run every variant in its own interpreter and collect their JSON results."""
+    results = {
+        "benchmark": "pydantic-versions",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": {
+            "number": args.number,
+            "memory_objects": args.memory_objects,
+            "schema_runs": args.schema_runs,
+            "startup_runs": args.startup_runs,
+            "seed": args.seed,
+        },
+        "variants": {},
+    }
+    for name in args.variants:
+        python = args.v1_python if name == "v1" else args.v2_python
+        command = [
+            python,
+            os.path.abspath(__file__),
+            "--run-variant", name,
+            "--number", str(args.number),
+            "--memory-objects", str(args.memory_objects),
+            "--schema-runs", str(args.schema_runs),
+            "--startup-runs", str(args.startup_runs),
+            "--seed", str(args.seed),
+        ]
+        process = subprocess.run(command, cwd=SOURCE_DIR, capture_output=True, text=True)
+        if process.returncode != 0:
+            results["variants"][name] = {"variant": name, "error": process.stderr.strip().splitlines()[-1:]}
+            continue
+        results["variants"][name] = json.loads(process.stdout)
+    return results
+
+
+def _format(value: Optional[float], unit: str) -> str:
+    if value is None:
+        return "-"
+    if unit == "s":
+        return f"{value * 1000:.1f} ms"
+    if unit == "B":
+        return f"{value:,.0f} B"
+    return f"{value:,.0f}/s"
+
+
+def print_results(results: dict):
+    variants = results["variants"]
+    for name, result in variants.items():
+        if "error" in result:
+            print(f"{name}: failed: {' '.join(result['error'])}")
+        else:
+            compat = ", pydantic.v1 compat" if result["pydantic_v1_compat"] else ""
+            print(f"{name}: pydantic {result['pydantic_version']}{compat}, fastapi {result['fastapi_version']}, python {result['python']}")
+    measured = {name: result for name, result in variants.items() if "error" not in result}
+    if not measured:
+        return
+
+    rows = [
+        ("validate JSON", "validate_json_per_s", "/s"),
+        ("validate dict", "validate_python_per_s", "/s"),
+        ("parse_event (union)", "parse_event_per_s", "/s"),
+        ("serialize JSON", "dump_json_per_s", "/s"),
+        ("serialize dict", "dump_python_per_s", "/s"),
+        ("memory per event", "bytes_per_event", "B"),
+        ("event schemas", "event_schemas_s", "s"),
+        ("app OpenAPI", "app_openapi_s", "s"),
+    ]
+    print()
+    print(f"{'mean over all event models':<28}" + "".join(f"{name:>16}" for name in measured) + f"{'v2/v1':>8}")
+    for label, metric, unit in rows:
+        values = {name: result["summary"][metric] for name, result in measured.items()}
+        ratio = ""
+        if values.get("v1") and values.get("v2"):
+            ratio = f"{values['v2'] / values['v1']:>7.2f}x"
+        print(f"{label:<28}" + "".join(f"{_format(value, unit):>16}" for value in values.values()) + f"{ratio:>8}")
+    for cache, label in (("cold", "startup"), ("warm", "startup, OpenAPI cached")):
+        values = {name: result["startup"].get(cache) for name, result in measured.items()}
+        if any(values.values()):
+            cells = "".join(f"{_format(value and value['median_s'], 's'):>16}" for value in values.values())
+            print(f"{label:<28}" + cells)
+    for name, result in measured.items():
+        if not result["startup"]["cold"]["includes_openapi"]:
+            print(f"The {name} startup does not include building the OpenAPI document.")
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--variants",
+        dest="variants",
+        nargs="+",
+        choices=VARIANTS,
+        required=False,
+        default=list(VARIANTS),
+        help="Set the variants to run.",
+    )
+    parser.add_argument(
+        "--v1-python",
+        dest="v1_python",
+        type=str,
+        required=False,
+        default=sys.executable,
+        help="Set the interpreter of the v1 variant, e.g. of a virtualenv with pydantic<2.",
+    )
+    parser.add_argument(
+        "--v2-python",
+        dest="v2_python",
+        type=str,
+        required=False,
+        default=sys.executable,
+        help="Set the interpreter of the v2 variant.",
+    )
+    parser.add_argument(
+        "--number",
+        dest="number",
+        type=int,
+        required=False,
+        default=2000,
+        help="Set the number of timed operations per event model and measurement.",
+    )
+    parser.add_argument(
+        "--memory-objects",
+        dest="memory_objects",
+        type=int,
+        required=False,
+        default=1000,
+        help="Set the number of events kept alive to measure the memory per event.",
+    )
+    parser.add_argument(
+        "--schema-runs",
+        dest="schema_runs",
+        type=int,
+        required=False,
+        default=5,
+        help="Set the number of timed OpenAPI generations.",
+    )
+    parser.add_argument(
+        "--startup-runs",
+        dest="startup_runs",
+        type=int,
+        required=False,
+        default=3,
+        help="Set the number of timed app startups per cache state.",
+    )
+    parser.add_argument(
+        "--seed",
+        dest="seed",
+        type=int,
+        required=False,
+        default=0,
+        help="Set the seed of the generated payloads.",
+    )
+    parser.add_argument(
+        "--output",
+        dest="output",
+        type=str,
+        required=False,
+        default=None,
+        help="Set a file to write the JSON results to.",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json",
+        action="store_true",
+        required=False,
+        default=False,
+        help="Print the results as JSON instead of a table.",
+    )
+    parser.add_argument(
+        "--run-variant",
+        dest="run_variant",
+        choices=VARIANTS,
+        required=False,
+        default=None,
+        help=argparse.SUPPRESS,
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.run_variant:
+        result = run_variant(args.run_variant, args.number, args.memory_objects, args.schema_runs, args.startup_runs, args.seed)
+        print(json.dumps(result))
+        sys.exit(0)
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
@@ -0,0 +1,469 @@
+"""
+The delivery log of the SeaNotify webhooks: one record per DeliveryResult of webhook_dispatch.py, listed per
+subscription or per workspace and status, newest or oldest first, and exported as compressed JSONL or CSV.
+
+- Appending a record only puts it on a queue. A writer thread inserts everything queued in one transaction, so
+  the inserts are batched by themselves when deliveries come in fast.
+- The records are indexed by (subscription_id, delivered_at, id) and by (workspace_id, status, delivered_at, id).
+  Every query reads one range of one of these indexes. The query for all statuses of a workspace merges one range per
+  status.
+- Pages continue from a cursor, the (delivered_at, id) of the last record of the previous page, instead of an
+  offset. The cost of a page does not depend on how deep it is, or on how many records the log holds.
+
+Measure appends and queries as the log grows with:
+
+    python delivery_log.py --records 1000000
+"""
+
+import argparse
+import base64
+import csv
+import heapq
+import io
+import json
+import logging
+import os
+import queue
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, fields
+from typing import Iterator, List, Optional, Tuple
+
+from webhook_dispatch import DeliveryResult
+
+STATUSES = ("success", "failed", "dropped")
+ORDERS = ("desc", "asc")
+EXPORT_FORMATS = ("jsonl", "csv")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS deliveries (
+        id INTEGER PRIMARY KEY,
+        delivered_at REAL NOT NULL,
+        subscription_id TEXT NOT NULL,
+        workspace_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        webhook_url TEXT NOT NULL,
+        event_id TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        batch_id TEXT,
+        status_code INTEGER,
+        error TEXT,
+        response_body TEXT,
+        attempts INTEGER NOT NULL,
+        latency REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS deliveries_subscription_time ON deliveries (subscription_id, delivered_at, id)",
+    "CREATE INDEX IF NOT EXISTS deliveries_workspace_status_time ON deliveries (workspace_id, status, delivered_at, id)",
+)
+
+
+@dataclass
+class DeliveryRecord:
+    id: int
+    delivered_at: float
+    subscription_id: str
+    workspace_id: str
+    status: str
+    webhook_url: str
+    event_id: str
+    event_type: str
+    batch_id: Optional[str]
+    status_code: Optional[int]
+    error: Optional[str]
+    response_body: Optional[str]
+    attempts: int
+    latency: float
+
+
+_COLUMNS = tuple(field.name for field in fields(DeliveryRecord))
+
+
+@dataclass
+class DeliveryPage:
+    records: List[DeliveryRecord]
+    # Pass it as cursor to get the next page, None on the last page.
+    next_cursor: Optional[str]
+
+
+def delivery_status(result: DeliveryResult) -> str:
+    if result.ok:
+        return "success"
+    if result.attempts == 0:
+        # Never sent: dropped by the overflow policy of a full subscriber queue.
+        return "dropped"
+    return "failed"
+
+
+def encode_cursor(record: DeliveryRecord) -> str:
+    return base64.urlsafe_b64encode(f"{record.delivered_at!r}:{record.id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """The (delivered_at, id) of a cursor. Raises ValueError for a malformed one."""
+    try:
+        delivered_at, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(delivered_at), int(record_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor {cursor!r}") from e
+
+
+class DeliveryLogError(Exception):
+    pass
+
+
+class DeliveryLog:
+    """
+    The delivery records in the SQLite file at path, or in memory without a path. Pass append as the on_result
+    of a WebhookDispatcher to log all of its deliveries.
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        if path:
+            database, uri = path, False
+        else:
+            # A named in-memory database, shared by the writer and the reader connections.
+            database, uri = f"file:delivery-log-{id(self)}?mode=memory&cache=shared", True
+        self._writer = sqlite3.connect(database, uri=uri, check_same_thread=False, isolation_level=None)
+        if path:
+            self._writer.execute("PRAGMA journal_mode=WAL")
+            # In WAL mode a commit only waits for the log to be written, not for it to be synced.
+            self._writer.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._writer.execute(statement)
+        self._reader = sqlite3.connect(database, uri=uri, check_same_thread=False, isolation_level=None)
+        self._read_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        # Records the writer failed to insert, since the last flush() or close() reported them.
+        self.failed_records = 0
+        self._unreported_failures = 0
+        self._last_error: Optional[BaseException] = None
+        self._failure_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._write_loop, name="delivery-log-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, result: DeliveryResult):
+        """Queue a delivery result for writing, without waiting for it to be written."""
+        self._queue.put(
+            (
+                result.delivered_at,
+                result.subscription_id,
+                result.workspace_id,
+                delivery_status(result),
+                result.webhook_url,
+                result.event_id,
+                result.event_type,
+                result.batch_id,
+                result.status_code,
+                result.error,
+                result.response_body,
+                result.attempts,
+                result.latency,
+            )
+        )
+
+    def flush(self):
+        """
+        Wait until every appended record is written. Raises DeliveryLogError when records could not be written
+        since the last flush, or when the writer thread is gone.
+        """
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._thread.is_alive():
+                    raise DeliveryLogError(f"the writer stopped with {self._queue.unfinished_tasks} records queued")
+                self._queue.all_tasks_done.wait(0.5)
+        self._report_failures()
+
+    def close(self):
+        """Write the queued records and close the log. Raises DeliveryLogError like flush()."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._writer.close()
+        self._reader.close()
+        self._report_failures()
+
+    def _report_failures(self):
+        with self._failure_lock:
+            failures, self._unreported_failures = self._unreported_failures, 0
+        if failures:
+            raise DeliveryLogError(f"{failures} records could not be written: {self._last_error!r}")
+
+    def query(
+        self,
+        workspace_id: Optional[str] = None,
+        subscription_id: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        order: str = "desc",
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> DeliveryPage:
+        """
+        One page of the records of a subscription, or of a workspace, ordered by delivered_at. Filter by status
+        and by a time range [since, until), and continue after the last record of a previous page with its
+        next_cursor.
+        """
+        if subscription_id is None and workspace_id is None:
+            raise ValueError("query needs a workspace_id or a subscription_id")
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"status must be one of {STATUSES}, got {status}")
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of {ORDERS}, got {order}")
+        after = decode_cursor(cursor) if cursor else None
+
+        if subscription_id is not None:
+            conditions = {"subscription_id": subscription_id, "workspace_id": workspace_id, "status": status}
+            records = self._select("deliveries_subscription_time", conditions, since, until, order, limit + 1, after)
+        else:
+            # The workspace index is ordered by time within every status, the ranges of all statuses are merged.
+            ranges = [
+                self._select(
+                    "deliveries_workspace_status_time",
+                    {"workspace_id": workspace_id, "status": range_status},
+                    since,
+                    until,
+                    order,
+                    limit + 1,
+                    after,
+                )
+                for range_status in ((status,) if status else STATUSES)
+            ]
+            key = lambda record: (record.delivered_at, record.id)
+            records = list(heapq.merge(*ranges, key=key, reverse=order == "desc"))[: limit + 1]
+
+        if len(records) > limit:
+            records = records[:limit]
+            return DeliveryPage(records, encode_cursor(records[-1]))
+        return DeliveryPage(records, None)
+
+    def iter_records(self, page_size: int = 1000, **filters) -> Iterator[DeliveryRecord]:
+        """All records matching the filters of query(), read page by page."""
+        cursor = None
+        while True:
+            page = self.query(limit=page_size, cursor=cursor, **filters)
+            yield from page.records
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def iter_export(self, format: str = "jsonl", compress: bool = True, **filters) -> Iterator[bytes]:
+        """The records matching the filters of query() as JSONL or CSV chunks, gzip compressed unless compress is False."""
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of {EXPORT_FORMATS}, got {format}")
+        # wbits=31 writes a gzip header and trailer.
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if format == "csv" else None
+        if writer:
+            writer.writerow(_COLUMNS)
+        for index, record in enumerate(self.iter_records(**filters), 1):
+            if writer:
+                writer.writerow(astuple_record(record))
+            else:
+                buffer.write(json.dumps(asdict(record), separators=(",", ":")))
+                buffer.write("\n")
+            if index % 1000 == 0:
+                chunk = _take(buffer).encode()
+                yield compressor.compress(chunk) if compressor else chunk
+        chunk = _take(buffer).encode()
+        if compressor:
+            yield compressor.compress(chunk) + compressor.flush()
+        elif chunk:
+            yield chunk
+
+    def export(self, path: str, format: str = "jsonl", compress: bool = True, **filters):
+        """Write the records matching the filters of query() to path, e.g. deliveries.jsonl.gz."""
+        with open(path, "wb") as f:
+            for chunk in self.iter_export(format, compress, **filters):
+                f.write(chunk)
+
+    def _select(
+        self,
+        index: str,
+        conditions: dict,
+        since: Optional[float],
+        until: Optional[float],
+        order: str,
+        limit: int,
+        after: Optional[Tuple[float, int]],
+    ) -> List[DeliveryRecord]:
+        clauses = [f"{column} = ?" for column, value in conditions.items() if value is not None]
+        parameters = [value for value in conditions.values() if value is not None]
+        if since is not None:
+            clauses.append("delivered_at >= ?")
+            parameters.append(since)
+        if until is not None:
+            clauses.append("delivered_at < ?")
+            parameters.append(until)
+        if after is not None:
+            clauses.append(f"(delivered_at, id) {'<' if order == 'desc' else '>'} (?, ?)")
+            parameters.extend(after)
+        statement = (
+            f"SELECT {', '.join(_COLUMNS)} FROM deliveries INDEXED BY {index} WHERE {' AND '.join(clauses)}"
+            f" ORDER BY delivered_at {order.upper()}, id {order.upper()} LIMIT ?"
+        )
+        with self._read_lock:
+            rows = self._reader.execute(statement, (*parameters, limit)).fetchall()
+        return [DeliveryRecord(*row) for row in rows]
+
+    def _write_loop(self):
+        statement = f"INSERT INTO deliveries ({', '.join(_COLUMNS[1:])}) VALUES (?{', ?' * (len(_COLUMNS) - 2)})"
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = rows[-1] is None
+            if closing:
+                rows.pop()
+            try:
+                if rows:
+                    self._write_batch(statement, rows)
+            finally:
+                for _ in range(len(rows) + closing):
+                    self._queue.task_done()
+            if closing:
+                return
+
+    def _write_batch(self, statement: str, rows: List[tuple]):
+        """Insert rows in one transaction. A failed batch (SQLITE_BUSY, disk full) is counted and logged, the writer goes on."""
+        try:
+            self._writer.execute("BEGIN")
+            self._writer.executemany(statement, rows)
+            self._writer.execute("COMMIT")
+        except Exception as e:
+            if self._writer.in_transaction:
+                try:
+                    self._writer.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            with self._failure_lock:
+                self.failed_records += len(rows)
+                self._unreported_failures += len(rows)
+                self._last_error = e
+            logging.error("failed to write %d delivery records: %s %s", len(rows), e.__class__.__name__, e)
+
+
+def astuple_record(record: DeliveryRecord) -> tuple:
+    return tuple(getattr(record, column) for column in _COLUMNS)
+
+
+def _take(buffer: io.StringIO) -> str:
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def _benchmark(records: int, subscriptions: int, workspaces: int, page_size: int, path: Optional[str]):
+    with tempfile.TemporaryDirectory() as work_dir:
+        log = DeliveryLog(path or os.path.join(work_dir, "deliveries.db"))
+        start_time = time.perf_counter()
+        delivered_at = time.time() - records
+        for index in range(records):
+            subscription = index % subscriptions
+            outcome = random.random()
+            log.append(
+                DeliveryResult(
+                    subscription_id=f"sub-{subscription}",
+                    workspace_id=f"ws-{subscription % workspaces}",
+                    webhook_url=f"https://example.com/hooks/{subscription}",
+                    event_id=f"evt-{index}",
+                    event_type="message.new",
+                    status_code=200 if outcome < 0.9 else 503,
+                    error=None if outcome < 0.9 else "HTTP 503",
+                    attempts=0 if outcome > 0.99 else 1,
+                    latency=0.05,
+                    delivered_at=delivered_at + index,
+                )
+            )
+        log.flush()
+        append_seconds = time.perf_counter() - start_time
+        print(f"appended {records} records in {append_seconds:.1f}s ({records / append_seconds:,.0f}/s)")
+
+        queries = {
+            "subscription": dict(subscription_id="sub-1"),
+            "subscription, failed": dict(subscription_id="sub-1", status="failed"),
+            "workspace, failed": dict(workspace_id="ws-1", status="failed"),
+            "workspace, all statuses": dict(workspace_id="ws-1"),
+        }
+        print(f"{'query':<24} {'first page ms':>14} {'page 10 ms':>11} {'oldest first ms':>16}")
+        for name, filters in queries.items():
+            timings = []
+            for order, pages in (("desc", 1), ("desc", 10), ("asc", 1)):
+                cursor = None
+                for _ in range(pages):
+                    start_time = time.perf_counter()
+                    page = log.query(order=order, limit=page_size, cursor=cursor, **filters)
+                    elapsed = time.perf_counter() - start_time
+                    cursor = page.next_cursor
+                    if cursor is None:
+                        break
+                timings.append(elapsed * 1000)
+            print(f"{name:<24} {timings[0]:>14.2f} {timings[1]:>11.2f} {timings[2]:>16.2f}")
+
+        start_time = time.perf_counter()
+        size = sum(len(chunk) for chunk in log.iter_export("jsonl", subscription_id="sub-1"))
+        print(f"exported sub-1 as jsonl.gz, {size:,} bytes in {time.perf_counter() - start_time:.2f}s")
+        log.close()
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--records",
+        dest="records",
+        type=int,
+        required=False,
+        default=1000000,
+        help="Set the number of delivery records to append.",
+    )
+    parser.add_argument(
+        "--subscriptions",
+        dest="subscriptions",
+        type=int,
+        required=False,
+        default=1000,
+        help="Set the number of subscriptions the records are spread over.",
+    )
+    parser.add_argument(
+        "--workspaces",
+        dest="workspaces",
+        type=int,
+        required=False,
+        default=100,
+        help="Set the number of workspaces the subscriptions are spread over.",
+    )
+    parser.add_argument(
+        "--page-size",
+        dest="page_size",
+        type=int,
+        required=False,
+        default=100,
+        help="Set the number of records per page.",
+    )
+    parser.add_argument(
+        "--path",
+        dest="path",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the SQLite file to append to, a temporary file by default.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    _benchmark(args.records, args.subscriptions, args.workspaces, args.page_size, args.path)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Annotated, Dict, List, Literal, Optional, Any, Union
 from enum import Enum
 
 from fastapi import FastAPI, Body, Path
@@ -19,16 +19,31 @@ class ConversationChannelType(str, Enum):
     SMS = "sms"
     EMAIL = "email"
 
+class SeaNotifyCallFinishReason(str, Enum):
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
 class SenderType(str, Enum):
     CUSTOMER = "customer"
     AGENT = "agent"
     BOT = "bot"
     SYSTEM = "system"
 
+class ConversationStatus(str, Enum):
+    PENDING = "pending"
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    CLOSED = "closed"
+
 class ConversationMessageDirection(str, Enum):
     INBOUND = "inbound"
     OUTBOUND = "outbound"
 
+class LabelType(str, Enum):
+    CONTACT = "contact"
+    CONVERSATION = "conversation"
+
 def get_utc_now_without_timezone():
     return datetime.utcnow()
 
@@ -36,6 +51,14 @@ class BaseEventResource(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="The unique ID of the event resource.")
     event_time: datetime = Field(default_factory=get_utc_now_without_timezone, description="The UTC time the event was generated.")
 
+class Label(BaseModel):
+    # The fields in the order of the v2 Label, which inherits name, color and description from BaseLabel.
+    name: str = Field(..., example="High Priority")
+    color: str = Field(..., example="#FF0000")
+    description: Optional[str] = Field(None, example="For critical customer issues.")
+    id: str = Field(..., example="label-123")
+    type: LabelType = Field(..., example=LabelType.CONVERSATION)
+
 # ==============================================================================
 # 2. YOUR PROVIDED EVENT SCHEMAS (Simplified for clarity)
 # ==============================================================================
@@ -68,13 +91,36 @@ class SeaNotifyConversationNewEventDataSchemaBase(DataBase):
 class EventSchemaBase(BaseEventResource):
     id: str
     version: str
+    # Every event narrows event_type to a Literal, the tag that EventResponse dispatches on.
+    event_type: str = Field(..., description="Event type name.")
     workspace: SeaNotifyWorkspaceSchema
     source: SeaNotifySourceSchema
 
 class SeaNotifyConversationNewEvent(EventSchemaBase):
     """Event schema for a new conversation."""
+    event_type: Literal["conversation.new"] = "conversation.new"
     data: SeaNotifyConversationNewEventDataSchemaBase
 
+class SeaNotifyConversationUpdatedEventDataSchema(DataBase):
+    channel: ConversationChannelType
+    status: ConversationStatus
+    updated_at: datetime
+
+class SeaNotifyConversationUpdatedEvent(EventSchemaBase):
+    """Event schema for an updated conversation."""
+    event_type: Literal["conversation.updated"] = "conversation.updated"
+    data: SeaNotifyConversationUpdatedEventDataSchema
+
+class SeaNotifyConversationEndedEventDataSchema(DataBase):
+    channel: ConversationChannelType
+    status: ConversationStatus
+    ended_at: datetime
+
+class SeaNotifyConversationEndedEvent(EventSchemaBase):
+    """Event schema for an ended conversation."""
+    event_type: Literal["conversation.ended"] = "conversation.ended"
+    data: SeaNotifyConversationEndedEventDataSchema
+
 class SeaNotifyMessageNewEventSenderSchema(BaseModel):
     type: SenderType
     id: str
@@ -94,15 +140,117 @@ class SeaNotifyMessageNewEventDataSchema(DataBase):
 
 class SeaNotifyMessageNewEvent(EventSchemaBase):
     """Event schema for a new message."""
+    event_type: Literal["message.new"] = "message.new"
     data: SeaNotifyMessageNewEventDataSchema
 
+class SeaNotifyConversationLabelEventDataSchema(DataBase):
+    label: Label
+
+class SeaNotifyConversationLabelAddedEvent(EventSchemaBase):
+    """Event schema for a label attached to a conversation."""
+    event_type: Literal["conversation.label.added"] = "conversation.label.added"
+    data: SeaNotifyConversationLabelEventDataSchema
+
+class SeaNotifyConversationLabelDeletedEvent(EventSchemaBase):
+    """Event schema for a label removed from a conversation."""
+    event_type: Literal["conversation.label.deleted"] = "conversation.label.deleted"
+    data: SeaNotifyConversationLabelEventDataSchema
+
+class SeaNotifyContactLabelEventDataSchema(BaseModel):
+    contact_id: str
+    contact_name: Optional[str]
+    label: Label
+
+class SeaNotifyContactLabelAddedEvent(EventSchemaBase):
+    """Event schema for a label attached to a contact."""
+    event_type: Literal["contact.label.added"] = "contact.label.added"
+    data: SeaNotifyContactLabelEventDataSchema
+
+class SeaNotifyContactLabelDeletedEvent(EventSchemaBase):
+    """Event schema for a label removed from a contact."""
+    event_type: Literal["contact.label.deleted"] = "contact.label.deleted"
+    data: SeaNotifyContactLabelEventDataSchema
+
+class SeaNotifyCallEventDataSchemaBase(DataBase):
+    call_id: str
+    direction: ConversationMessageDirection
+    from_number: Optional[str]
+    to_number: Optional[str]
+    started_at: datetime
+
+class SeaNotifyCallNewEvent(EventSchemaBase):
+    """Event schema for a new call."""
+    event_type: Literal["call.new"] = "call.new"
+    data: SeaNotifyCallEventDataSchemaBase
+
+class SeaNotifyCallUpdatedEventDataSchema(SeaNotifyCallEventDataSchemaBase):
+    summary: Optional[str]
+
+class SeaNotifyCallUpdatedEvent(EventSchemaBase):
+    """Event schema for an updated call, sent when the call summary is generated."""
+    event_type: Literal["call.updated"] = "call.updated"
+    data: SeaNotifyCallUpdatedEventDataSchema
+
+class SeaNotifyCallEndedEventDataSchema(SeaNotifyCallEventDataSchemaBase):
+    ended_at: datetime
+    finish_reason: SeaNotifyCallFinishReason
+
+class SeaNotifyCallEndedEvent(EventSchemaBase):
+    """Event schema for an ended call."""
+    event_type: Literal["call.ended"] = "call.ended"
+    data: SeaNotifyCallEndedEventDataSchema
+
+class SeaNotifyMeetingEndedEventDataSchema(BaseModel):
+    meeting_id: str
+    meeting_name: str
+    meeting_start_time: datetime
+    duration: Optional[float]
+
+class SeaNotifyMeetingEndedEvent(BaseEventResource):
+    """Event schema for an ended meeting. Meetings have no conversation source."""
+    id: str
+    version: str
+    event_type: Literal["meeting.ended"] = "meeting.ended"
+    workspace: SeaNotifyWorkspaceSchema
+    affect: str
+    data: SeaNotifyMeetingEndedEventDataSchema
+
 # ==============================================================================
 # 3. DEFINE A UNION OF ALL POSSIBLE WEBHOOK PAYLOADS
+# The union is tagged by `event_type` (discriminated unions need pydantic>=1.9): validation reads the tag and
+# validates the payload against that one model only, instead of trying every member in turn.
 # ==============================================================================
-EventResponse = Union[
+EVENT_MODELS = (
     SeaNotifyConversationNewEvent,
+    SeaNotifyConversationUpdatedEvent,
+    SeaNotifyConversationEndedEvent,
     SeaNotifyMessageNewEvent,
-]
+    SeaNotifyConversationLabelAddedEvent,
+    SeaNotifyConversationLabelDeletedEvent,
+    SeaNotifyContactLabelAddedEvent,
+    SeaNotifyContactLabelDeletedEvent,
+    SeaNotifyCallNewEvent,
+    SeaNotifyCallUpdatedEvent,
+    SeaNotifyCallEndedEvent,
+    SeaNotifyMeetingEndedEvent,
+)
+EVENT_TYPES = {model.__fields__["event_type"].default: model for model in EVENT_MODELS}
+
+EventResponse = Annotated[Union[EVENT_MODELS], Field(discriminator="event_type")]
+
+class EventBatch(BaseModel):
+    """Envelope of the events sent in one request to a subscription with batched delivery."""
+    batch_id: str = Field(..., description="The unique ID of the batch.")
+    count: int = Field(..., description="The number of events in the batch.")
+    events: List[EventResponse] = Field(..., description="The events, in the order they occurred.")
+
+# Pydantic v1 has no TypeAdapter, a custom root model validates the bare union.
+class EventEnvelope(BaseModel):
+    __root__: EventResponse
+
+def parse_event(payload: Union[bytes, str]) -> BaseEventResource:
+    """Validate a raw webhook body. Raises pydantic.ValidationError, naming the tag if event_type is unknown."""
+    return EventEnvelope.parse_raw(payload).__root__
 
 # ==============================================================================
 # 4. FASTAPI APP AND ENDPOINT DEFINITION
@@ -114,6 +262,10 @@ class SubscriptionRequest(BaseModel):
     created_by: str = Field(..., description="Identifier for the user or system creating the subscription.", example="user_12345")
     is_enabled: bool = Field(True, description="Set to false to pause sending events.")
     type: str = Field("SEASALT", description="Type of the subscription.", example="SEASALT")
+    batch_delivery: bool = Field(False, description="Set to true to receive several events per request, in an `EventBatch`.")
+    max_batch_size: int = Field(100, ge=1, le=1000, description="The maximum number of events in a batch.")
+    max_batch_linger: float = Field(1.0, ge=0, le=60, description="The maximum number of seconds an event waits for its batch to fill.")
+    coalesce_window: float = Field(0.0, ge=0, le=300, description="Seconds to hold `conversation.updated` and `call.updated` events, sending only the latest update of a conversation or call. 0 sends every update.")
 
 class SubscriptionResponse(BaseModel):
     subscription_id: str = Field(..., description="The unique ID for the created subscription.")
@@ -159,10 +311,10 @@ def custom_openapi():
     openapi_schema.setdefault("components", {}).setdefault("schemas", {})
 
     # Manually build the schemas for the Union type for Pydantic v1
-    event_models = EventResponse.__args__
     one_of_refs = []
+    discriminator_mapping = {}
 
-    for model in event_models:
+    for model in EVENT_MODELS:
         # Use the standard .schema() method from Pydantic v1
         model_schema = model.schema(ref_template="#/components/schemas/{model}")
         
@@ -179,9 +331,19 @@ def custom_openapi():
         
         # Add a reference to this model for the 'oneOf' array
         one_of_refs.append({"$ref": f"#/components/schemas/{model_name}"})
+        discriminator_mapping[model.__fields__["event_type"].default] = f"#/components/schemas/{model_name}"
     
-    # Create the combined 'oneOf' schema for the Union
-    openapi_schema["components"]["schemas"]["EventResponse"] = {"oneOf": one_of_refs}
+    # Create the combined 'oneOf' schema for the Union, tagged by event_type like the validator
+    openapi_schema["components"]["schemas"]["EventResponse"] = {
+        "oneOf": one_of_refs,
+        "discriminator": {"propertyName": "event_type", "mapping": discriminator_mapping},
+    }
+
+    # The batch envelope references the union instead of repeating it
+    event_batch_schema = EventBatch.schema(ref_template="#/components/schemas/{model}")
+    event_batch_schema.pop("definitions", None)
+    event_batch_schema["properties"]["events"]["items"] = {"$ref": "#/components/schemas/EventResponse"}
+    openapi_schema["components"]["schemas"]["EventBatch"] = event_batch_schema
 
     # Define and inject the callbacks object
     webhook_callback = {
@@ -191,9 +353,13 @@ def custom_openapi():
                     'summary': 'Webhook Event Notification',
                     'description': "This is the request your service will send to the client's webhook URL when a subscribed event occurs.",
                     'requestBody': {
-                        'description': 'The event payload. The structure depends on the event type.',
+                        'description': 'The event payload. The structure depends on the event type. '
+                                       'Subscriptions with `batch_delivery` receive an `EventBatch` of events instead.',
                         'required': True,
-                        'content': {'application/json': {'schema': {'$ref': '#/components/schemas/EventResponse'}}}
+                        'content': {'application/json': {'schema': {'oneOf': [
+                            {'$ref': '#/components/schemas/EventResponse'},
+                            {'$ref': '#/components/schemas/EventBatch'},
+                        ]}}}
                     },
                     'responses': {'200': {'description': 'The client acknowledges receipt of the event successfully.'}}
                 }
@@ -1,142 +1,37 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
 import uuid
-from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
-from enum import Enum
+from contextlib import asynccontextmanager
+from typing import Dict, List, Literal, Optional
 
-from fastapi import FastAPI, Body, Path
+import fastapi
+import pydantic
+from fastapi import FastAPI, Body, HTTPException, Path, Query, Request, Response
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from pydantic import BaseModel, Field, AnyHttpUrl, TypeAdapter
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, AnyHttpUrl
 
-# ==============================================================================
-# 1. MOCK DEPENDENCIES (from your seasalt_common_lib)
-# This section creates mock enums and base classes to make the code runnable.
-# ==============================================================================
-
-class ConversationChannelType(str, Enum):
-    SEAX_CALL = "seax_call"
-    WHATSAPP = "whatsapp"
-    VOICE = "voice"
-    SMS = "sms"
-    EMAIL = "email"
-
-class SeaNotifyCallFinishReason(str, Enum):
-    COMPLETED = "completed"
-    CANCELLED = "cancelled"
-    FAILED = "failed"
-
-class SenderType(str, Enum):
-    CUSTOMER = "customer"
-    AGENT = "agent"
-    BOT = "bot"
-    SYSTEM = "system"
-
-class ConversationStatus(str, Enum):
-    PENDING = "pending"
-    ACTIVE = "active"
-    COMPLETED = "completed"
-    CLOSED = "closed"
-
-class MessageDirection(str, Enum):
-    INBOUND = "inbound"
-    OUTBOUND = "outbound"
-
-class MessageType(str, Enum):
-    TEXT = "text"
-    AUDIO = "audio"
-    IMAGE = "image"
-
-class ConversationMessageDirection(str, Enum):
-    INBOUND = "inbound"
-    OUTBOUND = "outbound"
-
-class LabelType(str, Enum):
-    CONTACT = "contact"
-    CONVERSATION = "conversation"
-
-def get_utc_now_without_timezone():
-    return datetime.utcnow()
-
-class BaseEventResource(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="The unique ID of the event resource.")
-    event_time: datetime = Field(default_factory=get_utc_now_without_timezone, description="The UTC time the event was generated.")
-
-class BaseLabel(BaseModel):
-    name: str = Field(..., example="High Priority")
-    color: str = Field(..., example="#FF0000")
-    description: Optional[str] = Field(None, example="For critical customer issues.")
-
-class Label(BaseLabel):
-    id: str = Field(..., example="label-123")
-    type: LabelType = Field(..., example=LabelType.CONVERSATION)
-
-# ==============================================================================
-# 2. YOUR PROVIDED EVENT SCHEMAS
-# All the event schemas that could be sent to the webhook.
-# ==============================================================================
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-class SeaNotifyWorkspaceSchema(BaseModel):
-    id: str
-    name: str
-
-class SeaNotifySourceSchema(BaseModel):
-    id: str
-    type: ConversationChannelType
-    identifier: str
-
-class SeaNotifyCustomerSchema(BaseModel):
-    id: str
-    name: Optional[str]
-    email: Optional[str]
-    phone: Optional[str]
-    channel: ConversationChannelType
-    address: Optional[str]
-
-class DataBase(BaseModel):
-    conversation_id: str
-    conversation_title: str
-
-class SeaNotifyConversationNewEventDataSchemaBase(DataBase):
-    channel: ConversationChannelType
-    customer: SeaNotifyCustomerSchema
-
-class EventSchemaBase(BaseEventResource):
-    id: str
-    version: str
-    workspace: SeaNotifyWorkspaceSchema
-    source: SeaNotifySourceSchema
-
-class SeaNotifyConversationNewEvent(EventSchemaBase):
-    """Event schema for a new conversation."""
-    data: SeaNotifyConversationNewEventDataSchemaBase
-
-class SeaNotifyMessageNewEventSenderSchema(BaseModel):
-    type: SenderType
-    id: str
-    name: Optional[str]
-
-class SeaNotifyMessageNewEventContentSchema(BaseModel):
-    type: str
-    text: str
-    data: Optional[Dict[str, Any]]
-
-class SeaNotifyMessageNewEventDataSchema(DataBase):
-    message_id: str
-    direction: ConversationMessageDirection
-    created_at: datetime
-    sender: SeaNotifyMessageNewEventSenderSchema
-    content: SeaNotifyMessageNewEventContentSchema
-
-class SeaNotifyMessageNewEvent(EventSchemaBase):
-    """Event schema for a new message."""
-    data: SeaNotifyMessageNewEventDataSchema
+from delivery_log import DeliveryLog, DeliveryLogError
+from subscription_registry import Subscription, SubscriptionRegistry
+from webhook_dispatch import WebhookDispatcher
 
 # ==============================================================================
-# 3. DEFINE A UNION OF ALL POSSIBLE WEBHOOK PAYLOADS
+# 1.-3. EVENT SCHEMAS AND THE UNION OF ALL POSSIBLE WEBHOOK PAYLOADS
+# The mock dependencies, the event schemas and the tagged `EventResponse` union live in seanotify_events.py, so
+# that webhook_receiver.py validates exactly the payloads documented here.
 # ==============================================================================
-EventResponse = Union[
-    SeaNotifyConversationNewEvent,
-    SeaNotifyMessageNewEvent,
-]
+from seanotify_events import EventBatch, EventResponse, event_response_adapter
 
 # ==============================================================================
 # 4. FASTAPI APP AND ENDPOINT DEFINITION
@@ -149,18 +44,90 @@ class SubscriptionRequest(BaseModel):
     created_by: str = Field(..., description="Identifier for the user or system creating the subscription.", example="user_12345")
     is_enabled: bool = Field(True, description="Set to false to pause sending events.")
     type: str = Field("SEASALT", description="Type of the subscription.", example="SEASALT")
+    batch_delivery: bool = Field(False, description="Set to true to receive several events per request, in an `EventBatch`.")
+    max_batch_size: int = Field(100, ge=1, le=1000, description="The maximum number of events in a batch.")
+    max_batch_linger: float = Field(1.0, ge=0, le=60, description="The maximum number of seconds an event waits for its batch to fill.")
+    coalesce_window: float = Field(0.0, ge=0, le=300, description="Seconds to hold `conversation.updated` and `call.updated` events, sending only the latest update of a conversation or call. 0 sends every update.")
+
+class SubscriptionUpdateRequest(BaseModel):
+    webhook_url: Optional[AnyHttpUrl] = Field(None, description="The URL to which event notifications will be sent.")
+    event_types: Optional[List[str]] = Field(None, description="A list of event types to subscribe to.")
+    is_enabled: Optional[bool] = Field(None, description="Set to false to pause sending events.")
+    batch_delivery: Optional[bool] = Field(None, description="Set to true to receive several events per request, in an `EventBatch`.")
+    max_batch_size: Optional[int] = Field(None, ge=1, le=1000, description="The maximum number of events in a batch.")
+    max_batch_linger: Optional[float] = Field(None, ge=0, le=60, description="The maximum number of seconds an event waits for its batch to fill.")
+    coalesce_window: Optional[float] = Field(None, ge=0, le=300, description="Seconds to hold `conversation.updated` and `call.updated` events, sending only the latest update of a conversation or call. 0 sends every update.")
 
 class SubscriptionResponse(BaseModel):
     subscription_id: str = Field(..., description="The unique ID for the created subscription.")
     status: str = Field("active", description="The status of the subscription.")
     message: str = Field("Webhook subscription registered successfully.", description="A confirmation message.")
 
+class DeliveryLogEntry(BaseModel):
+    id: int = Field(..., description="The ID of the delivery record.")
+    delivered_at: float = Field(..., description="When the delivery finished, as a unix timestamp.")
+    subscription_id: str
+    workspace_id: str
+    status: Literal["success", "failed", "dropped"] = Field(..., description="`dropped` events were never sent, their subscriber's queue was full.")
+    webhook_url: str
+    event_id: str
+    event_type: str
+    batch_id: Optional[str] = Field(None, description="Shared by the events delivered in the same `EventBatch`.")
+    status_code: Optional[int] = Field(None, description="The HTTP status of the last attempt.")
+    error: Optional[str] = None
+    response_body: Optional[str] = Field(None, description="The start of the webhook's response body.")
+    attempts: int
+    latency: float = Field(..., description="Seconds from publishing the event to the end of its delivery.")
+
+class DeliveryLogPage(BaseModel):
+    records: List[DeliveryLogEntry]
+    next_cursor: Optional[str] = Field(None, description="Pass it as `cursor` to get the next page, null on the last page.")
+
+
+# -- Webhook delivery --
+# Subscriptions are kept in a registry indexed by (workspace_id, event_type) and persisted to a local SQLite file.
+# Services producing events publish them with `await dispatcher.publish(event)`, the dispatcher POSTs them to the
+# webhook_url of every enabled subscription of the event's workspace and type. See webhook_dispatch.py.
+SUBSCRIPTION_DB = os.environ.get(
+    "SEANOTIFY_SUBSCRIPTION_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "subscriptions.db")
+)
+# Every delivery, successful, failed or dropped, is logged. See delivery_log.py.
+DELIVERY_LOG_DB = os.environ.get(
+    "SEANOTIFY_DELIVERY_LOG_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "deliveries.db")
+)
+# Opened by lifespan when the app starts, importing this module (e.g. for its models) creates no files.
+subscription_registry: Optional[SubscriptionRegistry] = None
+delivery_log: Optional[DeliveryLog] = None
+dispatcher: Optional[WebhookDispatcher] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global subscription_registry, delivery_log, dispatcher, openapi_document
+    subscription_registry = SubscriptionRegistry(SUBSCRIPTION_DB)
+    delivery_log = DeliveryLog(DELIVERY_LOG_DB)
+    dispatcher = WebhookDispatcher(subscription_registry, on_result=delivery_log.append)
+    openapi_document = load_openapi_document()
+    await dispatcher.start()
+    yield
+    await dispatcher.close()
+    subscription_registry.close()
+    try:
+        delivery_log.close()
+    except DeliveryLogError as e:
+        logging.error("%s", e)
+
 
 # -- Main FastAPI Application --
+# The OpenAPI document and the docs pages are served by the routes in section 6, from a precomputed cache.
 app = FastAPI(
     title="SeaNotify Webhook API",
     description="This API allows clients to subscribe to real-time event notifications via webhooks.",
     version="1.0.0",
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
+    lifespan=lifespan,
 )
 
 
@@ -178,14 +145,153 @@ async def create_subscription(
     Register a new webhook URL to receive notifications for specific event types.
 
     When a subscribed event (e.g., `conversation.new`) occurs, our system will
-    send a `POST` request to the provided `webhook_url`.
+    send a `POST` request to the provided `webhook_url`. With `batch_delivery`, one request carries up to
+    `max_batch_size` events in an `EventBatch`, and is sent at most `max_batch_linger` seconds after its first event.
 
     **Callbacks:** Check the "Callbacks" section in the documentation below to see the structure of the
     request that will be sent to your webhook.
     """
-    # In a real application, you would save the subscription details to a database.
-    print(f"Creating subscription for workspace: {workspace_id}")
-    return SubscriptionResponse(subscription_id=f"sub_{uuid.uuid4()}")
+    subscription_id = f"sub_{uuid.uuid4()}"
+    dispatcher.subscribe(
+        Subscription(
+            subscription_id=subscription_id,
+            workspace_id=workspace_id,
+            webhook_url=str(subscription_request.webhook_url),
+            event_types=frozenset(subscription_request.event_types),
+            is_enabled=subscription_request.is_enabled,
+            created_by=subscription_request.created_by,
+            type=subscription_request.type,
+            batch_delivery=subscription_request.batch_delivery,
+            max_batch_size=subscription_request.max_batch_size,
+            max_batch_linger=subscription_request.max_batch_linger,
+            coalesce_window=subscription_request.coalesce_window,
+        )
+    )
+    return SubscriptionResponse(subscription_id=subscription_id)
+
+
+def _workspace_subscription(workspace_id: str, subscription_id: str) -> Subscription:
+    subscription = subscription_registry.get(subscription_id)
+    if subscription is None or subscription.workspace_id != workspace_id:
+        raise HTTPException(status_code=404, detail=f"Subscription {subscription_id} not found.")
+    return subscription
+
+
+@app.patch(
+    "/notify/api/v1/workspaces/{workspace_id}/subscription/{subscription_id}",
+    response_model=SubscriptionResponse,
+    summary="Update a Webhook Subscription",
+    tags=["Subscriptions"],
+)
+async def update_subscription(
+    workspace_id: str = Path(..., description="The ID of the workspace.", example="ws-a9b8c7d6"),
+    subscription_id: str = Path(..., description="The ID of the subscription."),
+    subscription_update: SubscriptionUpdateRequest = Body(...),
+):
+    """
+    Change the webhook URL or the event types of a subscription, or pause and resume it with `is_enabled`.
+    """
+    _workspace_subscription(workspace_id, subscription_id)
+    fields = subscription_update.model_dump(exclude_none=True)
+    if "webhook_url" in fields:
+        fields["webhook_url"] = str(fields["webhook_url"])
+    subscription = subscription_registry.update(subscription_id, **fields)
+    return SubscriptionResponse(
+        subscription_id=subscription_id,
+        status="active" if subscription.is_enabled else "disabled",
+        message="Webhook subscription updated successfully.",
+    )
+
+
+@app.delete(
+    "/notify/api/v1/workspaces/{workspace_id}/subscription/{subscription_id}",
+    response_model=SubscriptionResponse,
+    summary="Delete a Webhook Subscription",
+    tags=["Subscriptions"],
+)
+async def delete_subscription(
+    workspace_id: str = Path(..., description="The ID of the workspace.", example="ws-a9b8c7d6"),
+    subscription_id: str = Path(..., description="The ID of the subscription."),
+):
+    """
+    Stop sending events to the subscription's webhook URL. Events already queued for it are still delivered.
+    """
+    _workspace_subscription(workspace_id, subscription_id)
+    dispatcher.unsubscribe(subscription_id)
+    return SubscriptionResponse(
+        subscription_id=subscription_id, status="deleted", message="Webhook subscription deleted successfully."
+    )
+
+
+@app.get(
+    "/notify/api/v1/workspaces/{workspace_id}/deliveries",
+    response_model=DeliveryLogPage,
+    summary="List Webhook Deliveries",
+    tags=["Deliveries"],
+)
+async def list_deliveries(
+    workspace_id: str = Path(..., description="The ID of the workspace.", example="ws-a9b8c7d6"),
+    subscription_id: Optional[str] = Query(None, description="Only the deliveries of this subscription."),
+    status: Optional[Literal["success", "failed", "dropped"]] = Query(None, description="Only the deliveries with this status."),
+    since: Optional[float] = Query(None, description="Only the deliveries at or after this unix timestamp."),
+    until: Optional[float] = Query(None, description="Only the deliveries before this unix timestamp."),
+    order: Literal["desc", "asc"] = Query("desc", description="`desc` lists the newest deliveries first."),
+    limit: int = Query(100, ge=1, le=1000, description="The maximum number of deliveries per page."),
+    cursor: Optional[str] = Query(None, description="The `next_cursor` of the previous page."),
+):
+    """
+    One page of the delivery log of a workspace, or of one of its subscriptions. Follow `next_cursor` for the next page.
+    """
+    try:
+        page = delivery_log.query(
+            workspace_id=workspace_id,
+            subscription_id=subscription_id,
+            status=status,
+            since=since,
+            until=until,
+            order=order,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return DeliveryLogPage(
+        records=[DeliveryLogEntry(**vars(record)) for record in page.records], next_cursor=page.next_cursor
+    )
+
+
+@app.get(
+    "/notify/api/v1/workspaces/{workspace_id}/deliveries/export",
+    summary="Export Webhook Deliveries",
+    tags=["Deliveries"],
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/gzip": {}}, "description": "The gzip compressed JSONL or CSV export."}},
+)
+async def export_deliveries(
+    workspace_id: str = Path(..., description="The ID of the workspace.", example="ws-a9b8c7d6"),
+    format: Literal["jsonl", "csv"] = Query("jsonl", description="The format of the export."),
+    subscription_id: Optional[str] = Query(None, description="Only the deliveries of this subscription."),
+    status: Optional[Literal["success", "failed", "dropped"]] = Query(None, description="Only the deliveries with this status."),
+    since: Optional[float] = Query(None, description="Only the deliveries at or after this unix timestamp."),
+    until: Optional[float] = Query(None, description="Only the deliveries before this unix timestamp."),
+):
+    """
+    Stream the matching deliveries, oldest first, as a gzip compressed JSONL or CSV file.
+    """
+    chunks = delivery_log.iter_export(
+        format,
+        workspace_id=workspace_id,
+        subscription_id=subscription_id,
+        status=status,
+        since=since,
+        until=until,
+        order="asc",
+    )
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="deliveries-{workspace_id}.{format}.gz"'},
+    )
 
 # ==============================================================================
 # 5. CUSTOM OPENAPI SCHEMA GENERATION (THE FIX)
@@ -211,13 +317,17 @@ def custom_openapi():
                     'summary': 'Webhook Event Notification',
                     'description': "This is the request your service will send to the client's webhook URL when a subscribed event occurs.",
                     'requestBody': {
-                        'description': 'The event payload. The structure depends on the event type.',
+                        'description': 'The event payload. The structure depends on the event type. '
+                                       'Subscriptions with `batch_delivery` receive an `EventBatch` of events instead.',
                         'required': True,
                         'content': {
                             'application/json': {
                                 'schema': {
-                                    # This uses a reference to the Union model defined below
-                                    '$ref': '#/components/schemas/EventResponse'
+                                    # These reference the Union model and the batch envelope defined below
+                                    'oneOf': [
+                                        {'$ref': '#/components/schemas/EventResponse'},
+                                        {'$ref': '#/components/schemas/EventBatch'},
+                                    ]
                                 }
                             }
                         }
@@ -244,16 +354,153 @@ def custom_openapi():
         # The original line `EventResponse.model_json_schema(...)` is incorrect because
         # `model_json_schema` is a method on Pydantic models, not Union types.
         # The correct way to generate a schema for a Union is with a TypeAdapter.
-        adapter = TypeAdapter(EventResponse)
-        event_response_schema = adapter.json_schema(ref_template="#/components/schemas/{model}")
+        event_response_schema = event_response_adapter.json_schema(ref_template="#/components/schemas/{model}")
 
         # Move the generated sub-model schemas from '$defs' to the main components section
         openapi_schema["components"]["schemas"].update(event_response_schema.pop("$defs", {}))
         openapi_schema["components"]["schemas"]["EventResponse"] = event_response_schema
 
+        event_batch_schema = EventBatch.model_json_schema(ref_template="#/components/schemas/{model}")
+        openapi_schema["components"]["schemas"].update(event_batch_schema.pop("$defs", {}))
+        event_batch_schema["properties"]["events"]["items"] = {"$ref": "#/components/schemas/EventResponse"}
+        openapi_schema["components"]["schemas"]["EventBatch"] = event_batch_schema
+
     # Cache the schema and return it
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
 # Assign the custom function to the app. This overrides the default schema generation.
 app.openapi = custom_openapi
+
+
+# ==============================================================================
+# 6. PRECOMPUTED OPENAPI DOCUMENT
+# The schema is built once, serialized and compressed, and written to a cache file named after a hash of the
+# python sources of this directory and the fastapi and pydantic versions. Every uvicorn worker loads the same bytes instead
+# of rebuilding the schema, and a code change or an upgrade produces a new cache file. Build it ahead of a deployment with:
+#     python main_pydantic_2.py build-openapi
+# ==============================================================================
+OPENAPI_URL = "/openapi.json"
+OPENAPI_CACHE_DIR = os.environ.get(
+    "SEANOTIFY_OPENAPI_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".openapi-cache")
+)
+
+
+class OpenAPIDocument:
+    """The serialized OpenAPI document, with its compressed variants and ETag."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.encodings = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli:
+            self.encodings["br"] = brotli.compress(body)
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "public, max-age=0, must-revalidate", "Vary": "Accept-Encoding"}
+        if _etag_matches(request.headers.get("if-none-match", ""), self.etag):
+            return Response(status_code=304, headers=headers)
+
+        qualities = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        chosen, chosen_quality = None, 0.0
+        # br wins a tie, it is the smaller of the two.
+        for encoding in ("br", "gzip"):
+            quality = qualities.get(encoding, qualities.get("*", 0.0))
+            if encoding in self.encodings and quality > chosen_quality:
+                chosen, chosen_quality = encoding, quality
+        if chosen:
+            headers["Content-Encoding"] = chosen
+            return Response(self.encodings[chosen], media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists etag or is "*". The comparison is weak, W/"x" matches "x"."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """The q-value of every coding of an Accept-Encoding header, e.g. {"gzip": 1.0, "br": 0.0} for "gzip, br;q=0"."""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *parameters = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def openapi_cache_path() -> str:
+    """
+    The cache file of the current code, named after a hash of the python sources of this directory and of the
+    fastapi and pydantic versions, which generate the schema from them.
+    """
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    source_hash = hashlib.sha256(f"fastapi {fastapi.__version__} pydantic {pydantic.VERSION}\n".encode())
+    for name in sorted(os.listdir(source_dir)):
+        if name.endswith(".py"):
+            with open(os.path.join(source_dir, name), "rb") as f:
+                source_hash.update(f.read())
+    return os.path.join(OPENAPI_CACHE_DIR, f"openapi-{source_hash.hexdigest()[:16]}.json")
+
+
+def build_openapi_cache(path: Optional[str] = None) -> str:
+    """Build the OpenAPI document and write it atomically to the cache, so concurrent workers never read a partial file."""
+    path = path or openapi_cache_path()
+    body = json.dumps(custom_openapi(), separators=(",", ":")).encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_openapi_document() -> OpenAPIDocument:
+    path = openapi_cache_path()
+    if not os.path.exists(path):
+        try:
+            build_openapi_cache(path)
+        except OSError:
+            # A read-only deployment without a prebuilt cache still serves the document, built in memory.
+            return OpenAPIDocument(json.dumps(custom_openapi(), separators=(",", ":")).encode())
+    with open(path, "rb") as f:
+        return OpenAPIDocument(f.read())
+
+
+# Loaded by lifespan when the app starts.
+openapi_document: Optional[OpenAPIDocument] = None
+
+
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi_json(request: Request):
+    return openapi_document.response(request)
+
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui_html():
+    return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=f"{app.title} - Swagger UI")
+
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc_html():
+    return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["build-openapi"]:
+        print(build_openapi_cache(sys.argv[2] if len(sys.argv) > 2 else None))
@@ -0,0 +1,267 @@
+"""
+The SeaNotify webhook event schemas (pydantic v2), shared by main_pydantic_2.py, which documents them as the
+callback payloads of a subscription, and webhook_receiver.py, which receives them.
+"""
+
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+# ==============================================================================
+# 1. MOCK DEPENDENCIES (from your seasalt_common_lib)
+# This section creates mock enums and base classes to make the code runnable.
+# ==============================================================================
+
+class ConversationChannelType(str, Enum):
+    SEAX_CALL = "seax_call"
+    WHATSAPP = "whatsapp"
+    VOICE = "voice"
+    SMS = "sms"
+    EMAIL = "email"
+
+class SeaNotifyCallFinishReason(str, Enum):
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+class SenderType(str, Enum):
+    CUSTOMER = "customer"
+    AGENT = "agent"
+    BOT = "bot"
+    SYSTEM = "system"
+
+class ConversationStatus(str, Enum):
+    PENDING = "pending"
+    ACTIVE = "active"
+    COMPLETED = "completed"
+    CLOSED = "closed"
+
+class MessageDirection(str, Enum):
+    INBOUND = "inbound"
+    OUTBOUND = "outbound"
+
+class MessageType(str, Enum):
+    TEXT = "text"
+    AUDIO = "audio"
+    IMAGE = "image"
+
+class ConversationMessageDirection(str, Enum):
+    INBOUND = "inbound"
+    OUTBOUND = "outbound"
+
+class LabelType(str, Enum):
+    CONTACT = "contact"
+    CONVERSATION = "conversation"
+
+def get_utc_now_without_timezone():
+    return datetime.utcnow()
+
+class BaseEventResource(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="The unique ID of the event resource.")
+    event_time: datetime = Field(default_factory=get_utc_now_without_timezone, description="The UTC time the event was generated.")
+
+class BaseLabel(BaseModel):
+    name: str = Field(..., example="High Priority")
+    color: str = Field(..., example="#FF0000")
+    description: Optional[str] = Field(None, example="For critical customer issues.")
+
+class Label(BaseLabel):
+    id: str = Field(..., example="label-123")
+    type: LabelType = Field(..., example=LabelType.CONVERSATION)
+
+# ==============================================================================
+# 2. YOUR PROVIDED EVENT SCHEMAS
+# All the event schemas that could be sent to the webhook.
+# ==============================================================================
+
+class SeaNotifyWorkspaceSchema(BaseModel):
+    id: str
+    name: str
+
+class SeaNotifySourceSchema(BaseModel):
+    id: str
+    type: ConversationChannelType
+    identifier: str
+
+class SeaNotifyCustomerSchema(BaseModel):
+    id: str
+    name: Optional[str]
+    email: Optional[str]
+    phone: Optional[str]
+    channel: ConversationChannelType
+    address: Optional[str]
+
+class DataBase(BaseModel):
+    conversation_id: str
+    conversation_title: str
+
+class SeaNotifyConversationNewEventDataSchemaBase(DataBase):
+    channel: ConversationChannelType
+    customer: SeaNotifyCustomerSchema
+
+class EventSchemaBase(BaseEventResource):
+    id: str
+    version: str
+    # Every event narrows event_type to a Literal, the tag that EventResponse dispatches on.
+    event_type: str = Field(..., description="Event type name.")
+    workspace: SeaNotifyWorkspaceSchema
+    source: SeaNotifySourceSchema
+
+class SeaNotifyConversationNewEvent(EventSchemaBase):
+    """Event schema for a new conversation."""
+    event_type: Literal["conversation.new"] = "conversation.new"
+    data: SeaNotifyConversationNewEventDataSchemaBase
+
+class SeaNotifyConversationUpdatedEventDataSchema(DataBase):
+    channel: ConversationChannelType
+    status: ConversationStatus
+    updated_at: datetime
+
+class SeaNotifyConversationUpdatedEvent(EventSchemaBase):
+    """Event schema for an updated conversation."""
+    event_type: Literal["conversation.updated"] = "conversation.updated"
+    data: SeaNotifyConversationUpdatedEventDataSchema
+
+class SeaNotifyConversationEndedEventDataSchema(DataBase):
+    channel: ConversationChannelType
+    status: ConversationStatus
+    ended_at: datetime
+
+class SeaNotifyConversationEndedEvent(EventSchemaBase):
+    """Event schema for an ended conversation."""
+    event_type: Literal["conversation.ended"] = "conversation.ended"
+    data: SeaNotifyConversationEndedEventDataSchema
+
+class SeaNotifyMessageNewEventSenderSchema(BaseModel):
+    type: SenderType
+    id: str
+    name: Optional[str]
+
+class SeaNotifyMessageNewEventContentSchema(BaseModel):
+    type: str
+    text: str
+    data: Optional[Dict[str, Any]]
+
+class SeaNotifyMessageNewEventDataSchema(DataBase):
+    message_id: str
+    direction: ConversationMessageDirection
+    created_at: datetime
+    sender: SeaNotifyMessageNewEventSenderSchema
+    content: SeaNotifyMessageNewEventContentSchema
+
+class SeaNotifyMessageNewEvent(EventSchemaBase):
+    """Event schema for a new message."""
+    event_type: Literal["message.new"] = "message.new"
+    data: SeaNotifyMessageNewEventDataSchema
+
+class SeaNotifyConversationLabelEventDataSchema(DataBase):
+    label: Label
+
+class SeaNotifyConversationLabelAddedEvent(EventSchemaBase):
+    """Event schema for a label attached to a conversation."""
+    event_type: Literal["conversation.label.added"] = "conversation.label.added"
+    data: SeaNotifyConversationLabelEventDataSchema
+
+class SeaNotifyConversationLabelDeletedEvent(EventSchemaBase):
+    """Event schema for a label removed from a conversation."""
+    event_type: Literal["conversation.label.deleted"] = "conversation.label.deleted"
+    data: SeaNotifyConversationLabelEventDataSchema
+
+class SeaNotifyContactLabelEventDataSchema(BaseModel):
+    contact_id: str
+    contact_name: Optional[str]
+    label: Label
+
+class SeaNotifyContactLabelAddedEvent(EventSchemaBase):
+    """Event schema for a label attached to a contact."""
+    event_type: Literal["contact.label.added"] = "contact.label.added"
+    data: SeaNotifyContactLabelEventDataSchema
+
+class SeaNotifyContactLabelDeletedEvent(EventSchemaBase):
+    """Event schema for a label removed from a contact."""
+    event_type: Literal["contact.label.deleted"] = "contact.label.deleted"
+    data: SeaNotifyContactLabelEventDataSchema
+
+class SeaNotifyCallEventDataSchemaBase(DataBase):
+    call_id: str
+    direction: ConversationMessageDirection
+    from_number: Optional[str]
+    to_number: Optional[str]
+    started_at: datetime
+
+class SeaNotifyCallNewEvent(EventSchemaBase):
+    """Event schema for a new call."""
+    event_type: Literal["call.new"] = "call.new"
+    data: SeaNotifyCallEventDataSchemaBase
+
+class SeaNotifyCallUpdatedEventDataSchema(SeaNotifyCallEventDataSchemaBase):
+    summary: Optional[str]
+
+class SeaNotifyCallUpdatedEvent(EventSchemaBase):
+    """Event schema for an updated call, sent when the call summary is generated."""
+    event_type: Literal["call.updated"] = "call.updated"
+    data: SeaNotifyCallUpdatedEventDataSchema
+
+class SeaNotifyCallEndedEventDataSchema(SeaNotifyCallEventDataSchemaBase):
+    ended_at: datetime
+    finish_reason: SeaNotifyCallFinishReason
+
+class SeaNotifyCallEndedEvent(EventSchemaBase):
+    """Event schema for an ended call."""
+    event_type: Literal["call.ended"] = "call.ended"
+    data: SeaNotifyCallEndedEventDataSchema
+
+class SeaNotifyMeetingEndedEventDataSchema(BaseModel):
+    meeting_id: str
+    meeting_name: str
+    meeting_start_time: datetime
+    duration: Optional[float]
+
+class SeaNotifyMeetingEndedEvent(BaseEventResource):
+    """Event schema for an ended meeting. Meetings have no conversation source."""
+    id: str
+    version: str
+    event_type: Literal["meeting.ended"] = "meeting.ended"
+    workspace: SeaNotifyWorkspaceSchema
+    affect: str
+    data: SeaNotifyMeetingEndedEventDataSchema
+
+# ==============================================================================
+# 3. DEFINE A UNION OF ALL POSSIBLE WEBHOOK PAYLOADS
+# The union is tagged by `event_type`: validation reads the tag and validates the payload against that one
+# model only, instead of trying every member in turn. The generated `oneOf` gets a matching `discriminator`.
+# ==============================================================================
+EVENT_MODELS = (
+    SeaNotifyConversationNewEvent,
+    SeaNotifyConversationUpdatedEvent,
+    SeaNotifyConversationEndedEvent,
+    SeaNotifyMessageNewEvent,
+    SeaNotifyConversationLabelAddedEvent,
+    SeaNotifyConversationLabelDeletedEvent,
+    SeaNotifyContactLabelAddedEvent,
+    SeaNotifyContactLabelDeletedEvent,
+    SeaNotifyCallNewEvent,
+    SeaNotifyCallUpdatedEvent,
+    SeaNotifyCallEndedEvent,
+    SeaNotifyMeetingEndedEvent,
+)
+EVENT_TYPES = {model.model_fields["event_type"].default: model for model in EVENT_MODELS}
+
+EventResponse = Annotated[Union[EVENT_MODELS], Field(discriminator="event_type")]
+
+event_response_adapter = TypeAdapter(EventResponse)
+
+
+class EventBatch(BaseModel):
+    """Envelope of the events sent in one request to a subscription with batched delivery."""
+    batch_id: str = Field(..., description="The unique ID of the batch.")
+    count: int = Field(..., description="The number of events in the batch.")
+    events: List[EventResponse] = Field(..., description="The events, in the order they occurred.")
+
+
+def parse_event(payload: Union[bytes, str]) -> BaseEventResource:
+    """Validate a raw webhook body. Raises pydantic.ValidationError, naming the tag if event_type is unknown."""
+    return event_response_adapter.validate_json(payload)
@@ -0,0 +1,308 @@
+"""
+The SeaNotify webhook subscriptions, indexed by (workspace_id, event_type).
+
+Matching an event to its subscribers is one dict lookup that returns a ready-made tuple of the enabled
+subscriptions of that workspace and event type, however many subscriptions exist in total. Adding, updating,
+enabling, disabling and removing a subscription only touches the index entries of its own event types.
+
+Subscriptions are written through to a SQLite file and loaded back when the registry is opened. Measure the
+matching cost as the number of subscriptions grows with:
+
+    python subscription_registry.py --subscriptions 1000 10000 100000 500000
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    subscription_id TEXT PRIMARY KEY,
+    workspace_id TEXT NOT NULL,
+    webhook_url TEXT NOT NULL,
+    event_types TEXT NOT NULL,
+    is_enabled INTEGER NOT NULL,
+    created_by TEXT,
+    type TEXT NOT NULL,
+    batch_delivery INTEGER NOT NULL DEFAULT 0,
+    max_batch_size INTEGER NOT NULL DEFAULT 100,
+    max_batch_linger REAL NOT NULL DEFAULT 1.0,
+    coalesce_window REAL NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+)
+"""
+# Columns added after the first version of the table, added to existing files when they are opened.
+_ADDED_COLUMNS = {
+    "batch_delivery": "INTEGER NOT NULL DEFAULT 0",
+    "max_batch_size": "INTEGER NOT NULL DEFAULT 100",
+    "max_batch_linger": "REAL NOT NULL DEFAULT 1.0",
+    "coalesce_window": "REAL NOT NULL DEFAULT 0",
+}
+_COLUMNS = (
+    "subscription_id",
+    "workspace_id",
+    "webhook_url",
+    "event_types",
+    "is_enabled",
+    "created_by",
+    "type",
+    "batch_delivery",
+    "max_batch_size",
+    "max_batch_linger",
+    "coalesce_window",
+)
+
+
+@dataclass(frozen=True)
+class Subscription:
+    subscription_id: str
+    workspace_id: str
+    webhook_url: str
+    event_types: FrozenSet[str]
+    is_enabled: bool = True
+    created_by: Optional[str] = None
+    type: str = "SEASALT"
+    # Batched delivery: up to max_batch_size events per POST, sent at most max_batch_linger seconds late.
+    batch_delivery: bool = False
+    max_batch_size: int = 100
+    max_batch_linger: float = 1.0
+    # Seconds conversation.updated and call.updated events are held so that newer updates can replace them, 0 is off.
+    coalesce_window: float = 0.0
+
+    def _row(self) -> tuple:
+        return (
+            self.subscription_id,
+            self.workspace_id,
+            self.webhook_url,
+            json.dumps(sorted(self.event_types)),
+            int(self.is_enabled),
+            self.created_by,
+            self.type,
+            int(self.batch_delivery),
+            self.max_batch_size,
+            self.max_batch_linger,
+            self.coalesce_window,
+            datetime.now(timezone.utc).isoformat(),
+        )
+
+
+class SubscriptionRegistry:
+    """
+    All subscriptions in memory, indexed for matching, and persisted to the SQLite file at path.
+    Without a path the registry is in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, Subscription] = {}
+        # Enabled subscriptions only, keyed by (workspace_id, event_type).
+        self._index: Dict[Tuple[str, str], Dict[str, Subscription]] = {}
+        # Immutable snapshots of the index entries returned by match(), dropped when their entry changes.
+        self._matches: Dict[Tuple[str, str], Tuple[Subscription, ...]] = {}
+        self._connection = None
+        if path:
+            self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(_SCHEMA)
+            existing_columns = {row[1] for row in self._connection.execute("PRAGMA table_info(subscriptions)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in existing_columns:
+                    self._connection.execute(f"ALTER TABLE subscriptions ADD COLUMN {column} {definition}")
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def get(self, subscription_id: str) -> Optional[Subscription]:
+        return self._subscriptions.get(subscription_id)
+
+    def list(self, workspace_id: Optional[str] = None) -> List[Subscription]:
+        return [
+            subscription
+            for subscription in self._subscriptions.values()
+            if workspace_id is None or subscription.workspace_id == workspace_id
+        ]
+
+    def match(self, workspace_id: str, event_type: str) -> Tuple[Subscription, ...]:
+        """The enabled subscriptions of workspace_id to event_type."""
+        key = (workspace_id, event_type)
+        matches = self._matches.get(key)
+        if matches is None:
+            with self._lock:
+                entry = self._index.get(key)
+                if not entry:
+                    # Only the keys of the index are cached, so the cache can not grow with every published key.
+                    return ()
+                matches = self._matches[key] = tuple(entry.values())
+        return matches
+
+    def add(self, subscription: Subscription) -> Subscription:
+        """Insert a subscription, or replace the one with the same subscription_id."""
+        self.add_many([subscription])
+        return subscription
+
+    def add_many(self, subscriptions: Iterable[Subscription]):
+        """Insert or replace many subscriptions in a single transaction."""
+        subscriptions = list(subscriptions)
+        with self._lock:
+            self._put(subscriptions)
+
+    def update(self, subscription_id: str, **fields) -> Subscription:
+        """Change some fields of a subscription, e.g. update(id, webhook_url=..., event_types=...)."""
+        if "event_types" in fields:
+            fields["event_types"] = frozenset(fields["event_types"])
+        # Read and write under one lock, two concurrent updates of different fields must not undo each other.
+        with self._lock:
+            subscription = self._subscriptions.get(subscription_id)
+            if subscription is None:
+                raise KeyError(subscription_id)
+            subscription = replace(subscription, **fields)
+            self._put([subscription])
+        return subscription
+
+    def set_enabled(self, subscription_id: str, is_enabled: bool) -> Subscription:
+        return self.update(subscription_id, is_enabled=is_enabled)
+
+    def remove(self, subscription_id: str) -> Optional[Subscription]:
+        with self._lock:
+            subscription = self._subscriptions.pop(subscription_id, None)
+            if subscription:
+                self._write("DELETE FROM subscriptions WHERE subscription_id = ?", [(subscription_id,)])
+                self._unindex(subscription)
+        return subscription
+
+    def close(self):
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+
+    def _load(self):
+        rows = self._connection.execute(f"SELECT {', '.join(_COLUMNS)} FROM subscriptions").fetchall()
+        for row in rows:
+            values = dict(zip(_COLUMNS, row))
+            values["event_types"] = frozenset(json.loads(values["event_types"]))
+            values["is_enabled"] = bool(values["is_enabled"])
+            values["batch_delivery"] = bool(values["batch_delivery"])
+            subscription = Subscription(**values)
+            self._subscriptions[subscription.subscription_id] = subscription
+            self._reindex(subscription)
+
+    def _write(self, statement: str, rows: List[tuple]):
+        if self._connection is None:
+            return
+        self._connection.execute("BEGIN")
+        try:
+            self._connection.executemany(statement, rows)
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _put(self, subscriptions: List[Subscription]):
+        """Insert or replace subscriptions, with the lock held."""
+        self._write(
+            "INSERT OR REPLACE INTO subscriptions "
+            f"({', '.join(_COLUMNS)}, updated_at) VALUES (?{', ?' * len(_COLUMNS)})",
+            [subscription._row() for subscription in subscriptions],
+        )
+        for subscription in subscriptions:
+            self._unindex(self._subscriptions.get(subscription.subscription_id))
+            self._subscriptions[subscription.subscription_id] = subscription
+            self._reindex(subscription)
+
+    def _reindex(self, subscription: Subscription):
+        if not subscription.is_enabled:
+            return
+        for event_type in subscription.event_types:
+            key = (subscription.workspace_id, event_type)
+            self._index.setdefault(key, {})[subscription.subscription_id] = subscription
+            self._matches.pop(key, None)
+
+    def _unindex(self, subscription: Optional[Subscription]):
+        if subscription is None:
+            return
+        for event_type in subscription.event_types:
+            key = (subscription.workspace_id, event_type)
+            entry = self._index.get(key)
+            if entry and entry.pop(subscription.subscription_id, None) is not None:
+                if not entry:
+                    del self._index[key]
+                self._matches.pop(key, None)
+
+
+def _benchmark(sizes: List[int], workspaces: int, lookups: int):
+    event_types = ("conversation.new", "conversation.updated", "message.new", "call.new", "call.ended", "meeting.ended")
+    print(f"{'subscriptions':>13} {'add s':>8} {'match us':>9} {'update us':>10}")
+    for size in sizes:
+        registry = SubscriptionRegistry()
+        subscriptions = [
+            Subscription(
+                subscription_id=f"sub-{index}",
+                workspace_id=f"ws-{index % workspaces}",
+                webhook_url=f"https://example.com/hooks/{index}",
+                event_types=frozenset(random.sample(event_types, 2)),
+                is_enabled=index % 10 != 0,
+            )
+            for index in range(size)
+        ]
+        start_time = time.perf_counter()
+        registry.add_many(subscriptions)
+        add_seconds = time.perf_counter() - start_time
+
+        keys = [(f"ws-{random.randrange(workspaces)}", random.choice(event_types)) for _ in range(lookups)]
+        start_time = time.perf_counter()
+        for workspace_id, event_type in keys:
+            registry.match(workspace_id, event_type)
+        match_seconds = time.perf_counter() - start_time
+
+        updated = random.sample(subscriptions, min(1000, size))
+        start_time = time.perf_counter()
+        for subscription in updated:
+            registry.set_enabled(subscription.subscription_id, not subscription.is_enabled)
+        update_seconds = time.perf_counter() - start_time
+        print(
+            f"{size:>13} {add_seconds:>8.2f} {match_seconds / lookups * 1e6:>9.2f}"
+            f" {update_seconds / len(updated) * 1e6:>10.2f}"
+        )
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--subscriptions",
+        dest="subscriptions",
+        type=int,
+        nargs="+",
+        required=False,
+        default=[1000, 10000, 100000],
+        help="Set the registry sizes to measure.",
+    )
+    parser.add_argument(
+        "--workspaces",
+        dest="workspaces",
+        type=int,
+        required=False,
+        default=1000,
+        help="Set the number of workspaces the subscriptions are spread over.",
+    )
+    parser.add_argument(
+        "--lookups",
+        dest="lookups",
+        type=int,
+        required=False,
+        default=100000,
+        help="Set the number of timed match() calls per size.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    _benchmark(args.subscriptions, args.workspaces, args.lookups)
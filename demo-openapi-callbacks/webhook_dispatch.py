@@ -0,0 +1,684 @@
+"""
+Delivery side of the SeaNotify webhook subscriptions created with main_pydantic_2.py.
+
+- Every published event is routed to the enabled subscriptions of its workspace and event type, looked up in a
+  SubscriptionRegistry. The event is serialized once, all of its subscribers share the same bytes.
+- Every subscriber has its own bounded queue and delivery workers, so a slow or failing endpoint only fills its
+  own queue. When that queue is full the overflow policy drops an event for that subscriber alone, and reports it
+  as a failed delivery, instead of stalling the other subscribers.
+- The publisher is slowed down only when the deliveries pending over all subscribers exceed max_pending, i.e. when
+  the dispatcher as a whole cannot keep up.
+- All deliveries share one pooled aiohttp session.
+- Subscriptions with batch_delivery get up to max_batch_size events per POST, in an EventBatch envelope
+  {"batch_id": ..., "count": n, "events": [...]}. A batch is sent when it is full or max_batch_linger seconds
+  after its first event was taken from the queue. The envelope joins the already serialized event bodies.
+- Subscriptions with a coalesce_window hold conversation.updated and call.updated events for that many seconds.
+  A newer update of the same conversation or call replaces the held one, so only the latest state is sent.
+  A conversation.new/ended or call.new/ended event first releases the held update of its entity, so it stays in
+  order behind it in the subscriber queue.
+- Every delivery worker of a subscriber has its own queue. The events of one conversation or call always go to the
+  same worker, so they are delivered (and retried) one after the other in the order they were published. Events
+  of no entity go to the shortest queue.
+
+LocalReceiver is a stand-in webhook endpoint to try the dispatcher locally, e.g. with 200 subscribers of which
+5 answer slowly and 5 always fail:
+
+    python webhook_dispatch.py --subscribers 200 --slow-subscribers 5 --failing-subscribers 5 --events 1000
+
+The demo receiver runs in the same process as the dispatcher, so the throughput it reports is a lower bound.
+
+Prerequisites:
+- pip install aiohttp
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError:  # pragma: no cover - only needed to actually deliver webhooks
+    aiohttp = None
+    web = None
+
+from subscription_registry import Subscription, SubscriptionRegistry
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest")
+# The events that carry the latest state of a conversation or call and may be coalesced, and the entity they update.
+COALESCED_EVENT_TYPES = {"conversation.updated": "conversation", "call.updated": "call"}
+# Every event type of a conversation or call, with the data field identifying it.
+ENTITY_EVENT_TYPES = {
+    "conversation.new": ("conversation", "conversation_id"),
+    "conversation.updated": ("conversation", "conversation_id"),
+    "conversation.ended": ("conversation", "conversation_id"),
+    "call.new": ("call", "call_id"),
+    "call.updated": ("call", "call_id"),
+    "call.ended": ("call", "call_id"),
+}
+RESPONSE_BODY_MAX_CHARS = 1000
+
+
+@dataclass
+class EncodedEvent:
+    """An event as it is queued: its routing keys and its JSON body, serialized once for every subscriber."""
+    event_id: str
+    event_type: str
+    workspace_id: str
+    body: bytes
+    # "conversation:<id>" or "call:<id>" for the events of a conversation or call.
+    entity: Optional[str] = None
+    published_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class DeliveryResult:
+    """The outcome of delivering one event. The events of a batch share a batch_id and the outcome of its POST."""
+    subscription_id: str
+    workspace_id: str
+    webhook_url: str
+    event_id: str
+    event_type: str
+    batch_id: Optional[str] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    response_body: Optional[str] = None
+    attempts: int = 0
+    latency: float = 0.0
+    delivered_at: float = field(default_factory=time.time)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status_code is not None and 200 <= self.status_code < 300
+
+
+@dataclass
+class SubscriberStats:
+    queued: int = 0
+    delivered: int = 0
+    failed: int = 0
+    dropped: int = 0
+    retries: int = 0
+    requests: int = 0
+    coalesced: int = 0
+
+
+def _field(value: Any, name: str) -> Any:
+    return value[name] if isinstance(value, dict) else getattr(value, name)
+
+
+def encode_event(event: Any) -> EncodedEvent:
+    """Serialize a pydantic event model (v1 or v2) or an already decoded event dict."""
+    if isinstance(event, dict):
+        body = json.dumps(event, separators=(",", ":"), default=str).encode()
+    elif hasattr(event, "model_dump_json"):
+        body = event.model_dump_json().encode()
+    else:
+        body = event.json().encode()
+    event_type = _field(event, "event_type")
+    entity = None
+    if event_type in ENTITY_EVENT_TYPES:
+        entity_name, id_field = ENTITY_EVENT_TYPES[event_type]
+        entity = f"{entity_name}:{_field(_field(event, 'data'), id_field)}"
+    return EncodedEvent(
+        event_id=str(_field(event, "id")),
+        event_type=event_type,
+        workspace_id=str(_field(_field(event, "workspace"), "id")),
+        body=body,
+        entity=entity,
+    )
+
+
+def encode_batch(batch_id: str, events: List[EncodedEvent]) -> bytes:
+    """The EventBatch envelope of events, built from their serialized bodies without decoding them again."""
+    return b"".join(
+        (
+            b'{"batch_id":',
+            json.dumps(batch_id).encode(),
+            b',"count":',
+            str(len(events)).encode(),
+            b',"events":[',
+            b",".join(event.body for event in events),
+            b"]}",
+        )
+    )
+
+
+class _SubscriberChannel:
+    """The bounded queues and the delivery workers of one subscription, one queue per worker."""
+
+    def __init__(self, dispatcher: "WebhookDispatcher", subscription: Subscription):
+        self.dispatcher = dispatcher
+        self.subscription = subscription
+        self.stats = SubscriberStats()
+        concurrency = max(1, dispatcher.concurrency_per_subscriber)
+        # queue_size is shared by the workers of the subscription.
+        self.queues: "List[asyncio.Queue[EncodedEvent]]" = [
+            asyncio.Queue(maxsize=max(1, -(-dispatcher.queue_size // concurrency))) for _ in range(concurrency)
+        ]
+        # The held update of every entity, with the timer that releases it into the queue.
+        self._held: Dict[str, Tuple[EncodedEvent, asyncio.TimerHandle]] = {}
+        self.workers = [
+            asyncio.create_task(self._work(queue), name=f"webhook-{subscription.subscription_id}-{index}")
+            for index, queue in enumerate(self.queues)
+        ]
+
+    def qsize(self) -> int:
+        return sum(queue.qsize() for queue in self.queues)
+
+    def _queue_of(self, event: EncodedEvent) -> "asyncio.Queue[EncodedEvent]":
+        # One worker delivers all events of an entity, a second worker could overtake a retried event.
+        if event.entity:
+            return self.queues[hash(event.entity) % len(self.queues)]
+        return min(self.queues, key=lambda queue: queue.qsize())
+
+    def offer(self, event: EncodedEvent, subscription: Subscription) -> bool:
+        """Queue or hold event without waiting. Returns False if the queue was full and event was dropped."""
+        self.subscription = subscription
+        if event.entity and (subscription.coalesce_window > 0 or self._held):
+            held = self._held.pop(event.entity, None)
+            if held:
+                held[1].cancel()
+            if event.event_type in COALESCED_EVENT_TYPES and subscription.coalesce_window > 0:
+                if held:
+                    # The newer update carries the latest state, the held one is never sent.
+                    self.stats.coalesced += 1
+                    self.dispatcher._delivery_done()
+                timer = asyncio.get_running_loop().call_later(subscription.coalesce_window, self._release, event.entity)
+                self._held[event.entity] = (event, timer)
+                return True
+            if held:
+                self._release_event(held[0])
+        return self._enqueue(event)
+
+    def release_all(self):
+        """Queue every held update now."""
+        for entity in list(self._held):
+            self._held[entity][1].cancel()
+            self._release(entity)
+
+    def _release(self, entity: str):
+        held = self._held.pop(entity, None)
+        if held:
+            self._release_event(held[0])
+
+    def _release_event(self, event: EncodedEvent):
+        # A held event was already counted as pending when it was offered.
+        if not self._enqueue(event):
+            self.dispatcher._delivery_done()
+
+    def _enqueue(self, event: EncodedEvent) -> bool:
+        queue = self._queue_of(event)
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            if self.dispatcher.overflow == "drop_newest":
+                self.dispatcher._report_dropped(self, event)
+                return False
+            self.dispatcher._report_dropped(self, queue.get_nowait())
+            queue.task_done()
+            self.dispatcher._delivery_done()
+            queue.put_nowait(event)
+        self.stats.queued += 1
+        return True
+
+    async def _work(self, queue: "asyncio.Queue[EncodedEvent]"):
+        while True:
+            events = [await queue.get()]
+            try:
+                subscription = self.dispatcher._refresh_subscription(self)
+                if subscription.batch_delivery:
+                    await self._fill_batch(queue, events, subscription)
+                await self.dispatcher._deliver(self, events)
+            except Exception as e:
+                logging.warning("webhook worker of %s failed: %s %s", self.subscription.subscription_id, e.__class__.__name__, e)
+            finally:
+                for _ in events:
+                    queue.task_done()
+                    self.dispatcher._delivery_done()
+
+    async def _fill_batch(self, queue: "asyncio.Queue[EncodedEvent]", events: List[EncodedEvent], subscription: Subscription):
+        """Add queued events to the batch until it is full or max_batch_linger has passed."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + subscription.max_batch_linger
+        while len(events) < subscription.max_batch_size:
+            if not queue.empty():
+                events.append(queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                events.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def join(self):
+        self.release_all()
+        await asyncio.gather(*(queue.join() for queue in self.queues))
+
+    async def close(self, drain: bool):
+        if drain:
+            await self.join()
+        for _, timer in self._held.values():
+            timer.cancel()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+
+class WebhookDispatcher:
+    """
+    Fan events out to the webhook_url of every matching subscription of registry.
+
+    on_result(result) is called with a DeliveryResult for every delivery, successful, failed or dropped.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[SubscriptionRegistry] = None,
+        queue_size: int = 1000,
+        concurrency_per_subscriber: int = 4,
+        max_pending: int = 100000,
+        overflow: str = "drop_oldest",
+        pool_size: int = 1000,
+        pool_size_per_host: int = 0,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        on_result: Optional[Callable[[DeliveryResult], None]] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow}")
+        self.registry = registry if registry is not None else SubscriptionRegistry()
+        self.queue_size = queue_size
+        self.concurrency_per_subscriber = concurrency_per_subscriber
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_result = on_result
+        self._channels: Dict[str, _SubscriberChannel] = {}
+        # The channels of removed subscriptions still delivering their queued events. The event loop only keeps
+        # weak references to tasks, these would be collected mid-delivery otherwise.
+        self._closing: Set[asyncio.Task] = set()
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._pending = 0
+        self._below_max_pending: Optional[asyncio.Event] = None
+
+    async def start(self) -> "WebhookDispatcher":
+        if aiohttp is None:
+            raise ImportError("delivering webhooks requires aiohttp, please run `pip install aiohttp`")
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size_per_host),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Content-Type": "application/json"},
+        )
+        self._below_max_pending = asyncio.Event()
+        self._below_max_pending.set()
+        return self
+
+    async def close(self, drain: bool = True):
+        """
+        Stop the dispatcher, after delivering everything still queued if drain is set. The events of the subscriptions
+        removed by unsubscribe are delivered either way, as unsubscribe promised.
+        """
+        channels = list(self._channels.values())
+        self._channels.clear()
+        await asyncio.gather(*(channel.close(drain) for channel in channels), *self._closing)
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "WebhookDispatcher":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def subscribe(self, subscription: Subscription):
+        """Add or replace a subscription. Events already queued for it are delivered to its new webhook_url."""
+        self.registry.add(subscription)
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        """Remove a subscription. Events already queued for it are still delivered."""
+        channel = self._channels.pop(subscription_id, None)
+        if channel:
+            task = asyncio.create_task(channel.close(drain=True), name=f"webhook-{subscription_id}-close")
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        return self.registry.remove(subscription_id) is not None
+
+    async def publish(self, event: Any) -> int:
+        """Queue event for every matching subscription and return how many subscriptions it was queued for."""
+        while self._pending >= self.max_pending:
+            self._below_max_pending.clear()
+            await self._below_max_pending.wait()
+
+        encoded = event if isinstance(event, EncodedEvent) else encode_event(event)
+        queued = 0
+        for subscription in self.registry.match(encoded.workspace_id, encoded.event_type):
+            channel = self._channels.get(subscription.subscription_id)
+            if channel is None:
+                channel = self._channels[subscription.subscription_id] = _SubscriberChannel(self, subscription)
+            if channel.offer(encoded, subscription):
+                self._pending += 1
+                queued += 1
+        return queued
+
+    async def join(self):
+        """Wait until every queued event has been delivered, or has failed."""
+        await asyncio.gather(*(channel.join() for channel in list(self._channels.values())))
+
+    def stats(self) -> Dict[str, SubscriberStats]:
+        return {subscription_id: channel.stats for subscription_id, channel in self._channels.items()}
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {subscription_id: channel.qsize() for subscription_id, channel in self._channels.items()}
+
+    def _refresh_subscription(self, channel: _SubscriberChannel) -> Subscription:
+        # The registry has the latest version of the subscription, e.g. after its webhook_url was updated.
+        channel.subscription = self.registry.get(channel.subscription.subscription_id) or channel.subscription
+        return channel.subscription
+
+    async def _deliver(self, channel: _SubscriberChannel, events: List[EncodedEvent]):
+        subscription = self._refresh_subscription(channel)
+        if subscription.batch_delivery:
+            batch_id = str(uuid.uuid4())
+            body = encode_batch(batch_id, events)
+        else:
+            batch_id, body = None, events[0].body
+        result = DeliveryResult(
+            subscription_id=subscription.subscription_id,
+            workspace_id=events[0].workspace_id,
+            webhook_url=subscription.webhook_url,
+            event_id=events[0].event_id,
+            event_type=events[0].event_type,
+            batch_id=batch_id,
+        )
+        while True:
+            result.attempts += 1
+            result.status_code, result.error, retry_after = None, None, None
+            channel.stats.requests += 1
+            try:
+                async with self._session.post(subscription.webhook_url, data=body) as response:
+                    result.status_code = response.status
+                    # Reading the body releases the connection back to the pool.
+                    result.response_body = (await response.text(errors="replace"))[:RESPONSE_BODY_MAX_CHARS]
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result.error = f"{e.__class__.__name__} {e}".strip()
+
+            if result.ok:
+                channel.stats.delivered += len(events)
+                break
+            if result.error is None:
+                result.error = f"HTTP {result.status_code}"
+            retryable = result.status_code is None or result.status_code == 429 or result.status_code >= 500
+            if not retryable or result.attempts > self.max_retries:
+                channel.stats.failed += len(events)
+                logging.debug("webhook %s of %s failed: %s", batch_id or result.event_id, subscription.subscription_id, result.error)
+                break
+            channel.stats.retries += 1
+            # The sleep only holds a worker of this subscriber, the others keep delivering.
+            await asyncio.sleep(self._retry_delay(result.attempts, retry_after))
+
+        delivered_at = time.time()
+        now = time.monotonic()
+        for event in events:
+            self._report(
+                replace(
+                    result,
+                    workspace_id=event.workspace_id,
+                    event_id=event.event_id,
+                    event_type=event.event_type,
+                    latency=now - event.published_at,
+                    delivered_at=delivered_at,
+                )
+            )
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        delay = random.uniform(0, self.retry_backoff * (2 ** (attempt - 1)))
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def _delivery_done(self):
+        self._pending -= 1
+        if self._pending < self.max_pending and self._below_max_pending:
+            self._below_max_pending.set()
+
+    def _report_dropped(self, channel: _SubscriberChannel, event: EncodedEvent):
+        channel.stats.dropped += 1
+        subscription = channel.subscription
+        self._report(
+            DeliveryResult(
+                subscription_id=subscription.subscription_id,
+                workspace_id=event.workspace_id,
+                webhook_url=subscription.webhook_url,
+                event_id=event.event_id,
+                event_type=event.event_type,
+                error="subscriber queue full",
+                latency=time.monotonic() - event.published_at,
+            )
+        )
+
+    def _report(self, result: DeliveryResult):
+        if self.on_result:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logging.warning("failed to handle the delivery result of %s: %s %s", result.event_id, e.__class__.__name__, e)
+
+
+class LocalReceiver:
+    """
+    A stand-in for the webhook endpoints of many subscribers, served on one local port.
+    endpoint(name, delay, status) returns the URL of an endpoint that answers every POST with status after delay seconds.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        if web is None:
+            raise ImportError("LocalReceiver requires aiohttp, please run `pip install aiohttp`")
+        self.host = host
+        self.port = port
+        self.received: Dict[str, int] = {}
+        self._behaviors: Dict[str, tuple] = {}
+        self._runner: Optional["web.AppRunner"] = None
+
+    def endpoint(self, name: str, delay: float = 0.0, status: int = 200) -> str:
+        self._behaviors[name] = (delay, status)
+        return f"http://{self.host}:{self.port}/hooks/{name}"
+
+    async def start(self) -> "LocalReceiver":
+        app = web.Application()
+        app.router.add_post("/hooks/{name}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        await web.SockSite(self._runner, sock, backlog=1024).start()
+        return self
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: "web.Request") -> "web.Response":
+        name = request.match_info["name"]
+        await request.read()
+        delay, status = self._behaviors.get(name, (0.0, 404))
+        if delay:
+            await asyncio.sleep(delay)
+        self.received[name] = self.received.get(name, 0) + 1
+        return web.Response(status=status, text='{"status": "received"}', content_type="application/json")
+
+
+def _sample_events(workspace_id: str, count: int) -> Iterable[dict]:
+    for index in range(count):
+        yield {
+            "id": str(uuid.uuid4()),
+            "version": "0.0.1",
+            "event_type": "message.new",
+            "workspace": {"id": workspace_id, "name": "Demo Workspace"},
+            "source": {"id": "source-456", "type": "sms", "identifier": "+15555550100"},
+            "data": {
+                "conversation_id": f"conv-{index % 100}",
+                "conversation_title": "Demo",
+                "message_id": f"msg-{index}",
+                "direction": "inbound",
+                "created_at": "2025-06-20T23:44:30",
+                "sender": {"type": "customer", "id": "customer-1", "name": None},
+                "content": {"type": "text", "text": f"Message {index}", "data": None},
+            },
+        }
+
+
+async def _run_demo(args: argparse.Namespace):
+    receiver = await LocalReceiver().start()
+    latencies: Dict[str, List[float]] = {"fast": [], "slow": [], "failing": []}
+    kinds: Dict[str, str] = {}
+
+    def on_result(result: DeliveryResult):
+        if result.ok:
+            latencies[kinds[result.subscription_id]].append(result.latency)
+
+    dispatcher = WebhookDispatcher(
+        queue_size=args.queue_size,
+        concurrency_per_subscriber=args.concurrency_per_subscriber,
+        pool_size=args.pool_size,
+        max_retries=1,
+        retry_backoff=0.05,
+        on_result=on_result,
+    )
+    batch_fields = dict(batch_delivery=True, max_batch_size=args.batch_size, max_batch_linger=0.1) if args.batch_size > 1 else {}
+    async with dispatcher:
+        for index in range(args.subscribers):
+            if index < args.slow_subscribers:
+                kind, url = "slow", receiver.endpoint(f"sub-{index}", delay=args.slow_delay)
+            elif index < args.slow_subscribers + args.failing_subscribers:
+                kind, url = "failing", receiver.endpoint(f"sub-{index}", status=503)
+            else:
+                kind, url = "fast", receiver.endpoint(f"sub-{index}")
+            kinds[f"sub-{index}"] = kind
+            dispatcher.subscribe(Subscription(f"sub-{index}", "ws-demo", url, frozenset({"message.new"}), **batch_fields))
+
+        start_time = time.monotonic()
+        for event in _sample_events("ws-demo", args.events):
+            await dispatcher.publish(event)
+        publish_seconds = time.monotonic() - start_time
+        print(f"published {args.events} events in {publish_seconds:.2f}s ({args.events / publish_seconds:.0f} events/s)")
+
+        fast_ids = [subscription_id for subscription_id, kind in kinds.items() if kind == "fast"]
+        await asyncio.gather(*(dispatcher._channels[subscription_id].join() for subscription_id in fast_ids))
+        fast_seconds = time.monotonic() - start_time
+        fast_deliveries = len(latencies["fast"])
+        print(f"fast subscribers received {fast_deliveries} deliveries in {fast_seconds:.2f}s ({fast_deliveries / fast_seconds:.0f}/s)")
+
+        stats = dispatcher.stats()
+        for kind in ("fast", "slow", "failing"):
+            kind_stats = [stats[subscription_id] for subscription_id, k in kinds.items() if k == kind and subscription_id in stats]
+            kind_latencies = sorted(latencies[kind])
+            p99 = f"{kind_latencies[int(len(kind_latencies) * 0.99)]:.3f}s" if kind_latencies else "-"
+            print(
+                f"{kind:<8} subscribers={len(kind_stats):>4} delivered={sum(s.delivered for s in kind_stats):>8}"
+                f" failed={sum(s.failed for s in kind_stats):>6} dropped={sum(s.dropped for s in kind_stats):>6}"
+                f" requests={sum(s.requests for s in kind_stats):>8} p99 latency={p99}"
+            )
+        await dispatcher.close(drain=False)
+    await receiver.close()
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--subscribers",
+        dest="subscribers",
+        type=int,
+        required=False,
+        default=50,
+        help="Set the number of subscriptions to the demo workspace.",
+    )
+    parser.add_argument(
+        "--slow-subscribers",
+        dest="slow_subscribers",
+        type=int,
+        required=False,
+        default=5,
+        help="Set how many of the subscribers answer after --slow-delay seconds.",
+    )
+    parser.add_argument(
+        "--slow-delay",
+        dest="slow_delay",
+        type=float,
+        required=False,
+        default=0.5,
+        help="Set the response delay of the slow subscribers in seconds.",
+    )
+    parser.add_argument(
+        "--failing-subscribers",
+        dest="failing_subscribers",
+        type=int,
+        required=False,
+        default=5,
+        help="Set how many of the subscribers always answer 503.",
+    )
+    parser.add_argument(
+        "--events",
+        dest="events",
+        type=int,
+        required=False,
+        default=500,
+        help="Set the number of events to publish.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        dest="batch_size",
+        type=int,
+        required=False,
+        default=1,
+        help="Set a max batch size above 1 to subscribe with batched delivery.",
+    )
+    parser.add_argument(
+        "--queue-size",
+        dest="queue_size",
+        type=int,
+        required=False,
+        default=1000,
+        help="Set the queue size of every subscriber.",
+    )
+    parser.add_argument(
+        "--concurrency-per-subscriber",
+        dest="concurrency_per_subscriber",
+        type=int,
+        required=False,
+        default=4,
+        help="Set the number of concurrent deliveries to every subscriber.",
+    )
+    parser.add_argument(
+        "--pool-size",
+        dest="pool_size",
+        type=int,
+        required=False,
+        default=1000,
+        help="Set the number of pooled connections shared by all subscribers.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(_run_demo(parse_args()))
@@ -0,0 +1,325 @@
+"""
+A reference receiver for the SeaNotify webhooks sent by webhook_dispatch.py, built to acknowledge fast.
+
+- The request path only validates the envelope of an event: id, version, event_type, workspace and source. The
+  `data` of the event is not validated before the webhook is acknowledged.
+- Events are deduplicated by id in a bounded cache, with a time to live. A redelivered event, e.g. after a timeout
+  on the sender side, is acknowledged again and not processed twice.
+- An event is acknowledged before it is processed, so it is processed at most once: the sender does not resend an
+  event whose validation or handler fails. Its id is dropped from the cache though, so a later redelivery of the
+  event is processed again.
+- Accepted events go to a bounded queue. Background workers validate them against their full event model of
+  seanotify_events.py and hand them to the event handler. When the queue is full the webhook is answered with
+  `503` and a `Retry-After`, which the dispatcher retries.
+- Both request shapes of the callback are accepted: a single event, and an EventBatch of events.
+
+Run it with:
+
+    python webhook_receiver.py --port 8001
+    uvicorn webhook_receiver:app --port 8001
+
+and point a subscription's webhook_url to http://127.0.0.1:8001/webhook. GET /stats returns the counters.
+
+Prerequisites:
+- pip install fastapi "pydantic>=2.0" uvicorn
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, Union
+
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+from seanotify_events import EVENT_TYPES, BaseEventResource
+
+EventHandler = Callable[[BaseEventResource], Awaitable[None]]
+
+
+# -- Envelopes, validated before a webhook is acknowledged --
+class WorkspaceRef(BaseModel):
+    id: str
+
+
+class SourceRef(BaseModel):
+    id: str
+    type: str
+
+
+class EventEnvelope(BaseModel):
+    """The fields of an event checked on the request path. Every other field, `data` included, is ignored."""
+    id: str
+    version: str
+    event_type: Literal[tuple(EVENT_TYPES)]
+    workspace: WorkspaceRef
+    # meeting.ended has no source.
+    source: Optional[SourceRef] = None
+
+
+class BatchEnvelope(BaseModel):
+    """An EventBatch whose events are kept as decoded JSON, and only checked with EventEnvelope."""
+    batch_id: str
+    count: int
+    events: List[Dict[str, Any]]
+
+
+# A body with a batch_id is a batch, any other body must be a single event.
+_inbound_adapter = TypeAdapter(Annotated[Union[BatchEnvelope, EventEnvelope], Field(union_mode="left_to_right")])
+
+
+class DedupeCache:
+    """The ids of the events seen in the last ttl seconds, at most max_size of them, oldest evicted first."""
+
+    def __init__(self, max_size: int = 100000, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Event id -> expiry time, in insertion order, so the oldest entries are always at the front.
+        self._expiries: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def __contains__(self, event_id: str) -> bool:
+        expiry = self._expiries.get(event_id)
+        return expiry is not None and expiry > time.monotonic()
+
+    def discard(self, event_id: str):
+        self._expiries.pop(event_id, None)
+
+    def add(self, event_id: str):
+        now = time.monotonic()
+        self._expiries.pop(event_id, None)
+        self._expiries[event_id] = now + self.ttl
+        while self._expiries:
+            oldest_id, expiry = next(iter(self._expiries.items()))
+            if len(self._expiries) <= self.max_size and expiry > now:
+                break
+            del self._expiries[oldest_id]
+
+
+@dataclass
+class ReceiverStats:
+    requests: int = 0
+    accepted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    throttled: int = 0
+    processed: int = 0
+    invalid: int = 0
+    handler_errors: int = 0
+
+
+async def log_event(event: BaseEventResource):
+    logging.info("received %s %s of workspace %s", event.event_type, event.id, event.workspace.id)
+
+
+class WebhookReceiver:
+    """
+    Acknowledges webhook bodies after checking their envelopes, and processes the events in the background.
+    handler is awaited with every event, validated against its full event model.
+    """
+
+    def __init__(
+        self,
+        handler: Optional[EventHandler] = None,
+        queue_size: int = 10000,
+        workers: int = 4,
+        dedupe_size: int = 100000,
+        dedupe_ttl: float = 3600.0,
+        retry_after: int = 1,
+    ):
+        self.handler = handler or log_event
+        self.queue_size = queue_size
+        self.worker_count = workers
+        self.retry_after = retry_after
+        self.seen = DedupeCache(dedupe_size, dedupe_ttl)
+        self.stats = ReceiverStats()
+        self.queue: Optional["asyncio.Queue[Tuple[str, str, Union[bytes, Dict[str, Any]]]]"] = None
+        self.workers: List[asyncio.Task] = []
+
+    async def start(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.queue_size)
+            self.workers = [
+                asyncio.create_task(self._work(), name=f"webhook-receiver-{index}") for index in range(self.worker_count)
+            ]
+
+    async def join(self):
+        """Wait until every accepted event has been processed."""
+        if self.queue is not None:
+            await self.queue.join()
+
+    async def close(self, drain: bool = True):
+        if self.queue is None:
+            return
+        if drain:
+            await self.join()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.queue = None
+        self.workers = []
+
+    def receive(self, body: bytes) -> Dict[str, int]:
+        """
+        Check the envelope of a webhook body and queue its new events. Raises HTTPException 422 for an invalid
+        envelope, and 503 when the queue has no room for the new events, in which case none of them is queued.
+        """
+        self.stats.requests += 1
+        try:
+            inbound = _inbound_adapter.validate_json(body)
+            if isinstance(inbound, BatchEnvelope):
+                envelopes = [EventEnvelope.model_validate(event) for event in inbound.events]
+                payloads = inbound.events
+            else:
+                envelopes = [inbound]
+                payloads = [body]
+        except ValidationError as e:
+            self.stats.rejected += 1
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_input=False))
+
+        new_events = []
+        new_ids = set()
+        for envelope, payload in zip(envelopes, payloads):
+            if envelope.id in self.seen or envelope.id in new_ids:
+                continue
+            new_ids.add(envelope.id)
+            new_events.append((envelope.id, envelope.event_type, payload))
+        duplicates = len(envelopes) - len(new_events)
+        if self.queue is None or self.queue_size - self.queue.qsize() < len(new_events):
+            self.stats.throttled += 1
+            raise HTTPException(status_code=503, detail="Too many events pending.", headers={"Retry-After": str(self.retry_after)})
+        for event in new_events:
+            self.queue.put_nowait(event)
+        for event_id in new_ids:
+            self.seen.add(event_id)
+        self.stats.accepted += len(new_events)
+        self.stats.duplicates += duplicates
+        return {"accepted": len(new_events), "duplicates": duplicates}
+
+    async def _work(self):
+        while True:
+            event_id, event_type, payload = await self.queue.get()
+            try:
+                model = EVENT_TYPES[event_type]
+                if isinstance(payload, bytes):
+                    event = model.model_validate_json(payload)
+                else:
+                    event = model.model_validate(payload)
+            except ValidationError as e:
+                self.stats.invalid += 1
+                logging.warning("invalid %s event: %s", event_type, e)
+                self.seen.discard(event_id)
+                self.queue.task_done()
+                continue
+            try:
+                await self.handler(event)
+                self.stats.processed += 1
+            except Exception as e:
+                self.stats.handler_errors += 1
+                logging.warning("failed to handle %s %s: %s %s", event_type, event.id, e.__class__.__name__, e)
+                # The event was already acknowledged, only a redelivery can bring it back.
+                self.seen.discard(event_id)
+            finally:
+                self.queue.task_done()
+
+
+def create_app(receiver: WebhookReceiver) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await receiver.start()
+        yield
+        await receiver.close()
+
+    app = FastAPI(title="SeaNotify Webhook Receiver", lifespan=lifespan)
+    app.state.receiver = receiver
+
+    @app.post("/webhook")
+    async def receive_webhook(request: Request):
+        # The raw body, not a pydantic body parameter: the events are validated by the workers.
+        return receiver.receive(await request.body())
+
+    @app.get("/stats")
+    async def receiver_stats():
+        return {
+            **asdict(receiver.stats),
+            "queued": receiver.queue.qsize() if receiver.queue is not None else 0,
+            "seen": len(receiver.seen),
+        }
+
+    return app
+
+
+app = create_app(WebhookReceiver())
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--host",
+        dest="host",
+        type=str,
+        required=False,
+        default="127.0.0.1",
+        help="Set the address to listen on.",
+    )
+    parser.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        required=False,
+        default=8001,
+        help="Set the port to listen on.",
+    )
+    parser.add_argument(
+        "--queue-size",
+        dest="queue_size",
+        type=int,
+        required=False,
+        default=10000,
+        help="Set the number of accepted events that may wait for a worker.",
+    )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=4,
+        help="Set the number of background workers processing events.",
+    )
+    parser.add_argument(
+        "--dedupe-size",
+        dest="dedupe_size",
+        type=int,
+        required=False,
+        default=100000,
+        help="Set the number of event ids remembered for deduplication.",
+    )
+    parser.add_argument(
+        "--dedupe-ttl",
+        dest="dedupe_ttl",
+        type=float,
+        required=False,
+        default=3600.0,
+        help="Set the number of seconds an event id is remembered for deduplication.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    receiver = WebhookReceiver(
+        queue_size=args.queue_size,
+        workers=args.workers,
+        dedupe_size=args.dedupe_size,
+        dedupe_ttl=args.dedupe_ttl,
+    )
+    uvicorn.run(create_app(receiver), host=args.host, port=args.port)
@@ -0,0 +1,558 @@
+"""
+A client for the SeaX analytics endpoint that caches the metrics per day, see content/en/SeaX/analytics.md.
+
+Every call of generate_metric_report recomputes its whole date range on the server, while dashboards ask again and
+again for ranges that mostly overlap. CachedAnalyticsClient keeps the result of every metric per day in a SQLite
+file, keyed by workspace, metric and the filters the metric uses, and only requests the days it does not have:
+
+- communication_volume, total_usage, conversation_breakdown and agent_activity are requested one day at a time, all
+  the metrics missing a day in one request, and summed (or concatenated) locally.
+- activity_trend and label_usage are requested with time_unit=day over the runs of missing days, split per day and
+  regrouped locally by the requested time_unit.
+- conversation_overview, label_overview, conversation_overview_yearly and every metric requested with a
+  range_type or with a range not made of whole days have no per-day form. Their whole result is cached instead.
+
+The requests of a report run concurrently. A day is only final once it has been fetched after it ended (in the
+timezone of the report) plus settle_seconds: until then, e.g. for the current day, it is fetched again after
+hot_ttl seconds. Final days are kept for settled_ttl seconds, 0 keeps them until the cache file is deleted.
+
+Two values cannot be derived from per-day results and are null in a merged report: the change_percent of
+activity_trend and the user_count of the conversation_breakdown channels (a user active on two days is one user).
+Request these metrics with cache=False when they are needed.
+
+Example usage:
+    store = AnalyticsCacheStore("analytics_cache.db")
+    async with CachedAnalyticsClient(api_key, store, workspace_id="ws") as client:
+        report = await client.report(
+            ["activity_trend", "communication_volume"], "2024-01-01", "2024-01-31", timezone="America/Los_Angeles"
+        )
+"""
+
+import asyncio
+import decimal
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - only needed to actually request the metrics
+    aiohttp = None
+
+from rate_limit import AttemptFailed, RateLimiter, RetryPolicy, parse_retry_after, send_with_retries_async
+
+DEFAULT_BASE_URL = "https://seax.seasalt.ai"
+ENDPOINT = "analytics-api/v1/generate_metric_report"
+
+DAILY = "daily"
+PERIODS = "periods"
+SNAPSHOT = "snapshot"
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    kind: str
+    # The request fields the result of the metric depends on, besides the date range.
+    filters: Tuple[str, ...]
+
+
+METRICS = {
+    "communication_volume": MetricSpec(DAILY, ("timezone",)),
+    "total_usage": MetricSpec(DAILY, ("timezone",)),
+    "conversation_breakdown": MetricSpec(DAILY, ("timezone",)),
+    "agent_activity": MetricSpec(DAILY, ("timezone", "agents")),
+    "activity_trend": MetricSpec(PERIODS, ("timezone", "message_type")),
+    "label_usage": MetricSpec(PERIODS, ("timezone", "labels")),
+    "conversation_overview": MetricSpec(SNAPSHOT, ("timezone", "range_type", "exclude_empty_response")),
+    "conversation_overview_yearly": MetricSpec(SNAPSHOT, ("timezone", "year")),
+    "label_overview": MetricSpec(SNAPSHOT, ()),
+}
+REQUEST_FIELDS = (
+    "message_type",
+    "time_unit",
+    "timezone",
+    "start_date",
+    "end_date",
+    "range_type",
+    "exclude_empty_response",
+    "labels",
+    "agents",
+    "year",
+)
+# The longest run of days requested at once for a PERIODS metric.
+MAX_RUN_DAYS = 92
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS days (
+        workspace TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        filters TEXT NOT NULL,
+        day TEXT NOT NULL,
+        value TEXT,
+        fetched_at REAL NOT NULL,
+        PRIMARY KEY (workspace, metric, filters, day)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        workspace TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        filters TEXT NOT NULL,
+        value TEXT,
+        fetched_at REAL NOT NULL,
+        PRIMARY KEY (workspace, metric, filters)
+    ) WITHOUT ROWID
+    """,
+)
+
+
+class AnalyticsError(Exception):
+    pass
+
+
+class AnalyticsCacheStore:
+    """The cached results, one row per (workspace, metric, filters, day), in a single SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+
+    def get_days(
+        self, workspace: str, metric: str, filters: str, first_day: str, last_day: str
+    ) -> Dict[str, Tuple[Optional[object], float]]:
+        """{day: (value, fetched_at)} of the cached days between first_day and last_day."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT day, value, fetched_at FROM days"
+                " WHERE workspace = ? AND metric = ? AND filters = ? AND day BETWEEN ? AND ?",
+                (workspace, metric, filters, first_day, last_day),
+            ).fetchall()
+        return {day: (json.loads(value) if value is not None else None, fetched_at) for day, value, fetched_at in rows}
+
+    def put_days(self, workspace: str, metric: str, filters: str, values: Dict[str, Optional[object]], fetched_at: float):
+        rows = [
+            (workspace, metric, filters, day, json.dumps(value, separators=(",", ":")) if value is not None else None, fetched_at)
+            for day, value in values.items()
+        ]
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany("INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def get_snapshot(self, workspace: str, metric: str, filters: str) -> Optional[Tuple[object, float]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, fetched_at FROM snapshots WHERE workspace = ? AND metric = ? AND filters = ?",
+                (workspace, metric, filters),
+            ).fetchone()
+        return (json.loads(row[0]) if row[0] is not None else None, row[1]) if row else None
+
+    def put_snapshot(self, workspace: str, metric: str, filters: str, value: object, fetched_at: float):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                (workspace, metric, filters, json.dumps(value, separators=(",", ":")), fetched_at),
+            )
+
+    def clear(self, workspace: Optional[str] = None) -> int:
+        """Delete the cached results, of one workspace or of all, and return the number of rows deleted."""
+        where, parameters = (" WHERE workspace = ?", (workspace,)) if workspace else ("", ())
+        with self._lock:
+            deleted = self._connection.execute(f"DELETE FROM days{where}", parameters).rowcount
+            deleted += self._connection.execute(f"DELETE FROM snapshots{where}", parameters).rowcount
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+@dataclass
+class CacheStats:
+    requests: int = 0
+    days_cached: int = 0
+    days_fetched: int = 0
+    snapshots_cached: int = 0
+    snapshots_fetched: int = 0
+
+
+# -- Days and ranges --
+def _parse_bound(value: str) -> Tuple[date, Optional[str]]:
+    """(day, time of day) of a start_date or end_date, the time is None for a plain YYYY-MM-DD date."""
+    if len(value) == 10:
+        return date.fromisoformat(value), None
+    parsed = datetime.fromisoformat(value)
+    # A bound with an offset is not a day of the report timezone, leave it to the server.
+    return parsed.date(), parsed.strftime("%H:%M:%S") if parsed.tzinfo is None else "offset"
+
+
+def day_range(start_date: str, end_date: str) -> Optional[Tuple[date, date]]:
+    """(first day, last day) when the range is made of whole days, None otherwise."""
+    first, start_time = _parse_bound(start_date)
+    last, end_time = _parse_bound(end_date)
+    if start_time not in (None, "00:00:00") or end_time not in (None, "23:59:59"):
+        return None
+    return first, last
+
+
+def _days(first: date, last: date) -> Iterable[date]:
+    for offset in range((last - first).days + 1):
+        yield first + timedelta(days=offset)
+
+
+def _runs(days: List[date], max_days: int = MAX_RUN_DAYS) -> List[Tuple[date, date]]:
+    """The sorted days as runs of consecutive days, at most max_days long."""
+    runs: List[Tuple[date, date]] = []
+    for day in days:
+        if runs and (day - runs[-1][1]).days == 1 and (day - runs[-1][0]).days < max_days:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def _day_fields(first: date, last: date) -> dict:
+    return {"start_date": f"{first.isoformat()}T00:00:00", "end_date": f"{last.isoformat()}T23:59:59"}
+
+
+# -- Merging the days --
+def _decimals(value: float) -> int:
+    """The number of decimals value is written with, e.g. 2 for 0.25."""
+    if not math.isfinite(value):
+        return 0
+    return max(0, -decimal.Decimal(repr(value)).as_tuple().exponent)
+
+
+def _sum(values: Iterable[object], not_additive: Tuple[str, ...] = ()) -> object:
+    """The sum of the numbers in values, recursively through dicts. Fields in not_additive are null."""
+    total: Optional[object] = None
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            total = total if isinstance(total, dict) else {}
+            for key, item in value.items():
+                total[key] = None if key in not_additive else _sum([total.get(key), item], not_additive)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            previous = total or 0
+            total = previous + value
+            if isinstance(total, float):
+                # Binary floats drift when added, e.g. 4926.299999999999 for 4926.3, the sum is rounded back to the
+                # precision of its terms.
+                total = round(total, max(_decimals(previous), _decimals(value)))
+        else:
+            # A string, a list or a boolean: the last one wins.
+            total = value
+    return total
+
+
+def _period(day: str, time_unit: str) -> str:
+    return {"year": day[:4], "month": day[:7]}.get(time_unit, day)
+
+
+def merge_activity_trend(days: Dict[str, Optional[dict]], time_unit: str) -> dict:
+    periods: Dict[str, dict] = {}
+    for day, counts in sorted(days.items()):
+        if counts:
+            period = _period(day, time_unit)
+            periods[period] = _sum([periods.get(period), counts])
+    data = [dict({"period": period}, **counts) for period, counts in periods.items()]
+    return {"time_unit": time_unit, "data": data, "change_percent": None}
+
+
+def merge_label_usage(days: Dict[str, Optional[list]], time_unit: str) -> list:
+    periods: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for day, labels in sorted(days.items()):
+        for label in labels or []:
+            counts = periods[_period(day, time_unit)]
+            counts[label["name"]] = counts.get(label["name"], 0) + label["count"]
+    return [
+        {"period": period, "labels": [{"name": name, "count": count} for name, count in counts.items()]}
+        for period, counts in periods.items()
+    ]
+
+
+def merge_agent_activity(days: Dict[str, Optional[dict]]) -> dict:
+    # A session spanning midnight is part of both days.
+    sessions = {}
+    for _, value in sorted(days.items()):
+        for session in (value or {}).get("agents", []):
+            sessions[(session.get("agent_id"), session.get("status"), session.get("start_time"))] = session
+    return {"agents": sorted(sessions.values(), key=lambda s: (s.get("agent_id") or "", s.get("start_time") or ""))}
+
+
+def merge_days(metric: str, days: Dict[str, Optional[object]], time_unit: str) -> object:
+    if metric == "activity_trend":
+        return merge_activity_trend(days, time_unit)
+    if metric == "label_usage":
+        return merge_label_usage(days, time_unit)
+    if metric == "agent_activity":
+        return merge_agent_activity(days)
+    if metric == "conversation_breakdown":
+        return _sum([days[day] for day in sorted(days)], not_additive=("user_count",)) or {}
+    return _sum([days[day] for day in sorted(days)]) or {}
+
+
+def split_days(metric: str, value: object, first: date, last: date) -> Dict[str, Optional[object]]:
+    """The per-day values of a PERIODS metric requested with time_unit=day, None for the days without data."""
+    days: Dict[str, Optional[object]] = {day.isoformat(): None for day in _days(first, last)}
+    entries = value.get("data", []) if metric == "activity_trend" else value or []
+    for entry in entries:
+        day = str(entry.get("period", ""))[:10]
+        if day in days:
+            if metric == "activity_trend":
+                days[day] = {key: count for key, count in entry.items() if key != "period"}
+            else:
+                days[day] = entry.get("labels", [])
+    return days
+
+
+# -- The client --
+class CachedAnalyticsClient:
+    """
+    Requests the analytics metrics through an AnalyticsCacheStore. The workspace of the API key keys the cache, set
+    workspace_id to name it, by default it is a hash of the API key.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        store: AnalyticsCacheStore,
+        workspace_id: Optional[str] = None,
+        base_url: str = DEFAULT_BASE_URL,
+        concurrency: int = 8,
+        timeout: float = 60.0,
+        hot_ttl: float = 300.0,
+        settled_ttl: float = 0.0,
+        settle_seconds: float = 3600.0,
+        rate_limit: Optional[float] = None,
+        max_retries: int = 3,
+    ):
+        self.api_key = api_key
+        self.store = store
+        self.workspace = workspace_id or hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        self.url = f"{base_url.rstrip('/')}/{ENDPOINT}"
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.hot_ttl = hot_ttl
+        self.settled_ttl = settled_ttl
+        self.settle_seconds = settle_seconds
+        self.retry_policy = RetryPolicy(max_retries=max_retries)
+        self.bucket = RateLimiter(default_rate=rate_limit).bucket(self.workspace, ENDPOINT)
+        self.stats = CacheStats()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def __aenter__(self) -> "CachedAnalyticsClient":
+        if aiohttp is None:
+            raise ImportError("requesting the analytics requires aiohttp, please run `pip install aiohttp`")
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"accept": "application/json", "X-API-Key": self.api_key},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    def _fresh(self, fetched_at: float, covers_until: Optional[float], now: float) -> bool:
+        """A result fetched once the period it covers had settled is fresh for settled_ttl, any other for hot_ttl."""
+        if covers_until is not None and fetched_at >= covers_until + self.settle_seconds:
+            return not self.settled_ttl or now - fetched_at < self.settled_ttl
+        return now - fetched_at < self.hot_ttl
+
+    async def report(
+        self,
+        metrics: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        timezone: str = "UTC",
+        cache: bool = True,
+        **filters,
+    ) -> dict:
+        """
+        The response of generate_metric_report for metrics, start_date and end_date (YYYY-MM-DD or ISO 8601) and the
+        other request fields in filters, e.g. time_unit="day" or labels=["support"]. With cache=False every metric
+        is requested from the server, and the result is not cached.
+        """
+        unknown = [metric for metric in metrics if metric not in METRICS]
+        if unknown:
+            raise ValueError(f"Unsupported metric: {', '.join(unknown)}")
+        request = {key: value for key, value in filters.items() if value is not None}
+        unexpected = set(request) - set(REQUEST_FIELDS)
+        if unexpected:
+            raise ValueError(f"Unexpected request fields: {', '.join(sorted(unexpected))}")
+        request.update(timezone=timezone, start_date=start_date, end_date=end_date)
+        request = {key: value for key, value in request.items() if value is not None}
+        if not cache:
+            response = await self._post(dict(request, metrics=list(metrics)))
+            return {metric: response.get(metric) for metric in metrics}
+
+        zone = ZoneInfo(timezone)
+        today = datetime.now(zone).date()
+        days = day_range(start_date, end_date) if start_date and end_date and not request.get("range_type") else None
+        by_day = [metric for metric in metrics if METRICS[metric].kind != SNAPSHOT and days]
+        snapshots = [metric for metric in metrics if metric not in by_day]
+
+        now = time.time()
+        cached: Dict[str, Dict[str, Optional[object]]] = {}
+        missing: Dict[str, List[date]] = {}
+        if by_day:
+            first, last = days[0], min(days[1], today)
+            for metric in by_day:
+                rows = self.store.get_days(
+                    self.workspace, metric, self._filters(metric, request), first.isoformat(), last.isoformat()
+                )
+                cached[metric] = {}
+                missing[metric] = []
+                for day in _days(first, last):
+                    row = rows.get(day.isoformat())
+                    covers_until = datetime.combine(day + timedelta(days=1), datetime.min.time(), zone).timestamp()
+                    if row and self._fresh(row[1], covers_until, now):
+                        cached[metric][day.isoformat()] = row[0]
+                    else:
+                        missing[metric].append(day)
+                self.stats.days_cached += len(cached[metric])
+                self.stats.days_fetched += len(missing[metric])
+
+        results: Dict[str, object] = {}
+        stale_snapshots = []
+        for metric in snapshots:
+            row = self.store.get_snapshot(self.workspace, metric, self._filters(metric, request, snapshot=True))
+            if row and self._fresh(row[1], self._snapshot_covers_until(metric, request, zone), now):
+                results[metric] = row[0]
+                self.stats.snapshots_cached += 1
+            else:
+                stale_snapshots.append(metric)
+        self.stats.snapshots_fetched += len(stale_snapshots)
+
+        # Every request runs to its end and caches its days, even when another one fails.
+        outcomes = await asyncio.gather(
+            *self._fetch_days(request, missing, cached),
+            *self._fetch_snapshots(request, stale_snapshots, results),
+            return_exceptions=True,
+        )
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors:
+            raise errors[0]
+        time_unit = request.get("time_unit", "month")
+        for metric in by_day:
+            results[metric] = merge_days(metric, cached[metric], time_unit)
+        return {metric: results.get(metric) for metric in metrics}
+
+    def _filters(self, metric: str, request: dict, snapshot: bool = False) -> str:
+        """The cache key of the request fields the result of metric depends on."""
+        fields = METRICS[metric].filters
+        if snapshot:
+            fields += ("start_date", "end_date", "time_unit")
+        values = {}
+        for field in fields:
+            value = request.get(field)
+            values[field] = sorted(value) if isinstance(value, list) else value
+        return json.dumps(values, sort_keys=True, separators=(",", ":"))
+
+    def _snapshot_covers_until(self, metric: str, request: dict, zone: ZoneInfo) -> Optional[float]:
+        """When the period of a snapshot ends, None when it is relative to now and never settles."""
+        if metric == "conversation_overview_yearly" and request.get("year"):
+            return datetime(int(request["year"]) + 1, 1, 1, tzinfo=zone).timestamp()
+        if metric != "label_overview" and not request.get("range_type") and request.get("end_date"):
+            end_day, _ = _parse_bound(request["end_date"])
+            return datetime.combine(end_day + timedelta(days=1), datetime.min.time(), zone).timestamp()
+        return None
+
+    def _fetch_days(self, request: dict, missing: Dict[str, List[date]], cached: Dict[str, Dict[str, object]]):
+        """The requests of the missing days: one per day for the DAILY metrics, one per run for the PERIODS ones."""
+        base = {key: value for key, value in request.items() if key not in ("start_date", "end_date")}
+        daily: Dict[date, List[str]] = defaultdict(list)
+        runs: Dict[Tuple[date, date], List[str]] = defaultdict(list)
+        for metric, days in missing.items():
+            if METRICS[metric].kind == DAILY:
+                for day in days:
+                    daily[day].append(metric)
+            else:
+                for run in _runs(days):
+                    runs[run].append(metric)
+
+        async def fetch_day(day: date, metrics: List[str]):
+            fetched_at = time.time()
+            response = await self._post(dict(base, metrics=metrics, **_day_fields(day, day)))
+            for metric in metrics:
+                value = response.get(metric)
+                self.store.put_days(self.workspace, metric, self._filters(metric, request), {day.isoformat(): value}, fetched_at)
+                cached[metric][day.isoformat()] = value
+
+        async def fetch_run(first: date, last: date, metrics: List[str]):
+            fetched_at = time.time()
+            response = await self._post(dict(base, metrics=metrics, time_unit="day", **_day_fields(first, last)))
+            for metric in metrics:
+                values = split_days(metric, response.get(metric), first, last)
+                self.store.put_days(self.workspace, metric, self._filters(metric, request), values, fetched_at)
+                cached[metric].update(values)
+
+        return [fetch_day(day, metrics) for day, metrics in daily.items()] + [
+            fetch_run(first, last, metrics) for (first, last), metrics in runs.items()
+        ]
+
+    def _fetch_snapshots(self, request: dict, metrics: List[str], results: Dict[str, object]):
+        """One request for all the snapshot metrics, but conversation_overview_yearly, which is costly, on its own."""
+        groups = [[metric for metric in metrics if metric != "conversation_overview_yearly"]]
+        if "conversation_overview_yearly" in metrics:
+            groups.append(["conversation_overview_yearly"])
+
+        async def fetch(group: List[str]):
+            fetched_at = time.time()
+            response = await self._post(dict(request, metrics=group))
+            for metric in group:
+                results[metric] = response.get(metric)
+                filters = self._filters(metric, request, snapshot=True)
+                self.store.put_snapshot(self.workspace, metric, filters, results[metric], fetched_at)
+
+        return [fetch(group) for group in groups if group]
+
+    async def _post(self, body: dict) -> dict:
+        """POST generate_metric_report. Reading metrics is idempotent, 429, 5xx and connection errors are retried."""
+
+        async def send() -> dict:
+            status_code = None
+            retry_after = None
+            async with self._slots:
+                self.stats.requests += 1
+                try:
+                    async with self._session.post(self.url, json=body) as response:
+                        status_code = response.status
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        text = await response.text()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = f"{e.__class__.__name__} {e}"
+                else:
+                    if 200 <= status_code < 300:
+                        return json.loads(text)
+                    error = f"HTTP {status_code}: {text[:500]}"
+            raise AttemptFailed(
+                AnalyticsError(f"generate_metric_report {body['metrics']} failed: {error}"), status_code, retry_after
+            )
+
+        # NOTE: The slot is only held while a request is in flight, not while it waits for a token or a retry.
+        return await send_with_retries_async(
+            send, self.retry_policy, idempotent=True, bucket=self.bucket, description="generate_metric_report"
+        )
@@ -0,0 +1,317 @@
+"""
+Print a SeaX analytics report, read from the per-day cache of analytics_cache.py as far as possible.
+
+The first report of a range requests every day of it, concurrently. The next reports of overlapping ranges only
+request the days not cached yet and the days that have not settled, e.g. today, once --hot-ttl has passed.
+The report has the format of the generate_metric_report response, see content/en/SeaX/analytics.md.
+
+Prerequisites:
+- Python 3.9+
+- pip install aiohttp
+
+Example usage:
+    python analytics_report.py --api-key xxx --metrics activity_trend communication_volume label_usage \\
+        --start-date 2024-01-01 --end-date 2024-03-31 --time-unit month --timezone America/Los_Angeles
+    python analytics_report.py --api-key xxx --metrics conversation_overview agent_activity --range-type last_7_days
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+from analytics_cache import DEFAULT_BASE_URL, METRICS, AnalyticsCacheStore, AnalyticsError, CachedAnalyticsClient
+
+
+async def run_report(args: argparse.Namespace, store: AnalyticsCacheStore) -> dict:
+    async with CachedAnalyticsClient(
+        args.api_key,
+        store,
+        workspace_id=args.workspace_id,
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        hot_ttl=args.hot_ttl,
+        settled_ttl=args.settled_ttl,
+        settle_seconds=args.settle_seconds,
+        rate_limit=args.rate_limit,
+        max_retries=args.max_retries,
+    ) as client:
+        start_time = time.monotonic()
+        report = await client.report(
+            args.metrics,
+            args.start_date,
+            args.end_date,
+            timezone=args.timezone,
+            cache=not args.no_cache,
+            message_type=args.message_type,
+            time_unit=args.time_unit,
+            range_type=args.range_type,
+            exclude_empty_response=args.exclude_empty_response or None,
+            labels=args.labels,
+            agents=args.agents,
+            year=args.year,
+        )
+        stats = client.stats
+        logging.info(
+            "%d requests in %.2fs, days: %d cached, %d fetched, snapshots: %d cached, %d fetched",
+            stats.requests,
+            time.monotonic() - start_time,
+            stats.days_cached,
+            stats.days_fetched,
+            stats.snapshots_cached,
+            stats.snapshots_fetched,
+        )
+    return report
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--api-key",
+        dest="api_key",
+        type=str,
+        required=False,
+        default=os.environ.get("SEAX_API_KEY"),
+        help="Set the SeaX API key, SEAX_API_KEY by default.",
+    )
+    parser.add_argument(
+        "--workspace-id",
+        dest="workspace_id",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the workspace of the API key, which keys the cache. A hash of the API key by default.",
+    )
+    parser.add_argument(
+        "--base-url",
+        dest="base_url",
+        type=str,
+        required=False,
+        default=DEFAULT_BASE_URL,
+        help="Set the analytics API base URL, the endpoint is <base-url>/analytics-api/v1/generate_metric_report.",
+    )
+    parser.add_argument(
+        "--metrics",
+        dest="metrics",
+        type=str,
+        nargs="+",
+        choices=sorted(METRICS),
+        required=False,
+        default=None,
+        help="Set the metrics of the report.",
+    )
+    parser.add_argument(
+        "--start-date",
+        dest="start_date",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the first day of the report, YYYY-MM-DD, or an ISO 8601 datetime.",
+    )
+    parser.add_argument(
+        "--end-date",
+        dest="end_date",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the last day of the report, YYYY-MM-DD, or an ISO 8601 datetime.",
+    )
+    parser.add_argument(
+        "--timezone",
+        dest="timezone",
+        type=str,
+        required=False,
+        default="UTC",
+        help="Set the timezone of the days, e.g. America/Los_Angeles.",
+    )
+    parser.add_argument(
+        "--time-unit",
+        dest="time_unit",
+        type=str,
+        choices=("day", "month", "year"),
+        required=False,
+        default=None,
+        help="Set the periods of activity_trend and label_usage, month by default.",
+    )
+    parser.add_argument(
+        "--message-type",
+        dest="message_type",
+        type=str,
+        choices=("messages", "calls"),
+        required=False,
+        default=None,
+        help="Set what activity_trend counts, messages by default.",
+    )
+    parser.add_argument(
+        "--range-type",
+        dest="range_type",
+        type=str,
+        choices=("last_day", "last_7_days", "last_30_days", "last_90_days", "last_180_days"),
+        required=False,
+        default=None,
+        help="Set the predefined range of conversation_overview and agent_activity.",
+    )
+    parser.add_argument(
+        "--exclude-empty-response",
+        dest="exclude_empty_response",
+        action="store_true",
+        help="Leave the conversations without a bot or agent reply out of conversation_overview.",
+    )
+    parser.add_argument(
+        "--labels",
+        dest="labels",
+        type=str,
+        nargs="+",
+        required=False,
+        default=None,
+        help="Set the labels of label_usage, all labels by default.",
+    )
+    parser.add_argument(
+        "--agents",
+        dest="agents",
+        type=str,
+        nargs="+",
+        required=False,
+        default=None,
+        help="Set the agents of agent_activity, all agents by default.",
+    )
+    parser.add_argument(
+        "--year",
+        dest="year",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the year of conversation_overview_yearly, YYYY.",
+    )
+    parser.add_argument(
+        "--cache-db",
+        dest="cache_db",
+        type=str,
+        required=False,
+        default=os.environ.get("SEAX_ANALYTICS_CACHE_DB", "analytics_cache.db"),
+        help="Set the SQLite file of the cache, SEAX_ANALYTICS_CACHE_DB or analytics_cache.db by default.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Request the whole report from the server, without reading or writing the cache.",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        dest="clear_cache",
+        action="store_true",
+        help="Delete the cached results of the workspace, and exit unless --metrics is set.",
+    )
+    parser.add_argument(
+        "--hot-ttl",
+        dest="hot_ttl",
+        type=float,
+        required=False,
+        default=300.0,
+        help="Set the seconds a day that has not settled yet, e.g. today, is cached.",
+    )
+    parser.add_argument(
+        "--settled-ttl",
+        dest="settled_ttl",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the seconds a settled day is cached, 0 to keep it.",
+    )
+    parser.add_argument(
+        "--settle-seconds",
+        dest="settle_seconds",
+        type=float,
+        required=False,
+        default=3600.0,
+        help="Set the seconds after its end a day settles, late data included.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        type=int,
+        required=False,
+        default=8,
+        help="Set the maximum number of requests in flight.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=float,
+        required=False,
+        default=None,
+        help="Set the maximum number of requests per second.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        dest="max_retries",
+        type=int,
+        required=False,
+        default=3,
+        help="Set the maximum number of retries of a throttled or failed request.",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        required=False,
+        default=60.0,
+        help="Set the timeout of a request in seconds.",
+    )
+    parser.add_argument(
+        "--output",
+        dest="output",
+        type=str,
+        required=False,
+        default=None,
+        help="Set a file to write the report to, stdout by default.",
+    )
+    parser.add_argument(
+        "--log-level",
+        dest="log_level",
+        type=str,
+        required=False,
+        default="INFO",
+        help="Set the log level, e.g. DEBUG.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)-8s %(message)s", stream=sys.stderr)
+    if not args.api_key:
+        print("Set --api-key or SEAX_API_KEY.", file=sys.stderr)
+        return 2
+    if not args.metrics and not args.clear_cache:
+        print("Set --metrics.", file=sys.stderr)
+        return 2
+    store = AnalyticsCacheStore(args.cache_db)
+    try:
+        if args.clear_cache:
+            workspace = CachedAnalyticsClient(args.api_key, store, workspace_id=args.workspace_id).workspace
+            logging.info("deleted %d cached results", store.clear(workspace))
+            if not args.metrics:
+                return 0
+        try:
+            report = asyncio.run(run_report(args, store))
+        except AnalyticsError as e:
+            logging.error("%s", e)
+            return 1
+    finally:
+        store.close()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
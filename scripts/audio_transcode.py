@@ -0,0 +1,209 @@
+"""
+Streaming WAV transcoder used by import_meeting_audio.py before uploading.
+
+It mixes every channel down to mono, resamples to the target sample rate with a windowed-sinc
+interpolator and re-encodes the samples, reading and writing the file block by block so memory
+stays flat whatever the length of the recording.
+
+Prerequisites:
+- pip install numpy
+
+Example usage:
+    python audio_transcode.py input_48k_stereo.wav output_8k_mono.wav --sample-rate 8000 --encoding pcm_s16le
+"""
+
+import argparse
+import logging
+import wave
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is only needed when transcoding
+    np = None
+
+# Target encodings that can be stored in a WAV container, mapped to their sample width in bytes.
+WAV_ENCODINGS = {
+    "pcm_u8": 1,
+    "pcm_s16le": 2,
+}
+# Sample widths of the PCM WAV files that can be decoded, mapped to their encoding name.
+_SAMPLE_WIDTH_ENCODINGS = {
+    1: "pcm_u8",
+    2: "pcm_s16le",
+    3: "pcm_s24le",
+    4: "pcm_s32le",
+}
+# Number of zero crossings of the sinc kernel on each side, at the lower of the two sample rates.
+_KERNEL_ZERO_CROSSINGS = 16
+
+
+@dataclass
+class AudioFormat:
+    audio_format: str
+    sample_rate: int
+    encoding: str
+    channels: int
+
+
+def read_wav_format(path: str) -> Optional[AudioFormat]:
+    """Return the format declared in the WAV header, or None if the file is not a PCM WAV file."""
+    try:
+        with wave.open(path, "rb") as reader:
+            return AudioFormat(
+                audio_format="wav",
+                sample_rate=reader.getframerate(),
+                encoding=_SAMPLE_WIDTH_ENCODINGS[reader.getsampwidth()],
+                channels=reader.getnchannels(),
+            )
+    except (wave.Error, EOFError, KeyError):
+        return None
+
+
+def transcode_wav(
+    src_path: str,
+    dst_path: str,
+    sample_rate: int,
+    encoding: str = "pcm_s16le",
+    block_frames: int = 65536,
+) -> AudioFormat:
+    """Mix src_path down to mono, resample it to sample_rate and write it to dst_path with the given encoding."""
+    if np is None:
+        raise ImportError("transcoding audio requires numpy, please run `pip install numpy`")
+    if encoding not in WAV_ENCODINGS:
+        raise ValueError(f"unsupported encoding {encoding}, should be one of {list(WAV_ENCODINGS)}")
+
+    with wave.open(src_path, "rb") as reader, wave.open(dst_path, "wb") as writer:
+        src_rate = reader.getframerate()
+        sample_width = reader.getsampwidth()
+        channels = reader.getnchannels()
+        writer.setnchannels(1)
+        writer.setsampwidth(WAV_ENCODINGS[encoding])
+        writer.setframerate(sample_rate)
+
+        resampler = _StreamingResampler(src_rate, sample_rate)
+        for block in _read_blocks(reader, block_frames):
+            mono = _decode_pcm(block, sample_width).reshape(-1, channels).mean(axis=1)
+            writer.writeframes(_encode_pcm(resampler.process(mono), encoding))
+        writer.writeframes(_encode_pcm(resampler.flush(), encoding))
+
+    logging.debug(
+        f"transcoded {src_path} ({src_rate}Hz, {channels}ch, {sample_width * 8}bit) to {dst_path} ({sample_rate}Hz, 1ch, {encoding})"
+    )
+    return AudioFormat(audio_format="wav", sample_rate=sample_rate, encoding=encoding, channels=1)
+
+
+def _read_blocks(reader: wave.Wave_read, block_frames: int) -> Iterator[bytes]:
+    while True:
+        block = reader.readframes(block_frames)
+        if not block:
+            return
+        yield block
+
+
+def _decode_pcm(data: bytes, sample_width: int) -> "np.ndarray":
+    """Decode little endian PCM samples to float32 in [-1, 1)."""
+    if sample_width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if sample_width == 2:
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(samples >= 1 << 23, samples - (1 << 24), samples)
+        return samples.astype(np.float32) / float(1 << 23)
+    if sample_width == 4:
+        return np.frombuffer(data, dtype="<i4").astype(np.float32) / float(1 << 31)
+    raise ValueError(f"unsupported sample width {sample_width}")
+
+
+def _encode_pcm(samples: "np.ndarray", encoding: str) -> bytes:
+    samples = np.clip(samples, -1.0, 1.0)
+    if encoding == "pcm_u8":
+        return np.round(samples * 127.0 + 128.0).astype(np.uint8).tobytes()
+    return np.round(samples * 32767.0).astype("<i2").tobytes()
+
+
+class _StreamingResampler:
+    """
+    Band-limited (windowed-sinc) resampler that accepts the signal in arbitrary blocks.
+    Output sample n is taken at input position n * src_rate / dst_rate. The input samples that are still
+    within the kernel reach of the next output sample are carried over to the next block.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.step = src_rate / dst_rate
+        # Cut off at the Nyquist frequency of the lower rate to avoid aliasing when downsampling.
+        self.cutoff = min(1.0, dst_rate / src_rate)
+        self.half_width = int(np.ceil(_KERNEL_ZERO_CROSSINGS / self.cutoff))
+        self._taps = np.arange(-self.half_width, self.half_width + 1)
+        # The buffer starts with half a kernel of silence so the first output sample is centered on input 0.
+        self._buffer = np.zeros(self.half_width, dtype=np.float32)
+        self._buffer_offset = -self.half_width
+        self._next_output = 0
+        self._input_length = 0
+
+    def process(self, samples: "np.ndarray") -> "np.ndarray":
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32)])
+        self._input_length += len(samples)
+        return self._drain(available_end=self._buffer_offset + len(self._buffer) - self.half_width - 1)
+
+    def flush(self) -> "np.ndarray":
+        """Pad the end of the signal with silence and return the remaining output samples."""
+        self._buffer = np.concatenate([self._buffer, np.zeros(self.half_width + 1, dtype=np.float32)])
+        # ceil(n * dst_rate / src_rate) samples in all. The padding covers the kernel of the positions up to the
+        # end of the input, the last one of them lies past the last input sample when upsampling.
+        output_length = int(np.ceil(self._input_length / self.step))
+        return self._drain(
+            available_end=self._buffer_offset + len(self._buffer) - self.half_width - 1, output_limit=output_length
+        )
+
+    def _drain(self, available_end: int, output_limit: Optional[int] = None) -> "np.ndarray":
+        # Output positions whose whole kernel lies inside the buffered input.
+        last_output = int(np.floor(available_end / self.step))
+        if output_limit is not None:
+            last_output = min(last_output, output_limit - 1)
+        if last_output < self._next_output:
+            return np.zeros(0, dtype=np.float32)
+
+        positions = np.arange(self._next_output, last_output + 1) * self.step
+        base = np.floor(positions).astype(np.int64)
+        indices = base[:, None] + self._taps[None, :]
+        distance = positions[:, None] - indices
+        window = 0.5 + 0.5 * np.cos(np.pi * np.clip(distance / (self.half_width + 1), -1.0, 1.0))
+        kernel = self.cutoff * np.sinc(self.cutoff * distance) * window
+        output = (self._buffer[indices - self._buffer_offset] * kernel).sum(axis=1)
+
+        self._next_output = last_output + 1
+        # Drop the input samples that no later output sample can reach.
+        keep_from = int(np.floor(self._next_output * self.step)) - self.half_width
+        if keep_from > self._buffer_offset:
+            self._buffer = self._buffer[keep_from - self._buffer_offset :]
+            self._buffer_offset = keep_from
+        return output.astype(np.float32)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("src_path", type=str, help="The wav file to transcode.")
+    parser.add_argument("dst_path", type=str, help="Where to write the transcoded wav file.")
+    parser.add_argument(
+        "--sample-rate",
+        dest="sample_rate",
+        type=int,
+        required=False,
+        default=8000,
+        help="Set the output sample rate.",
+    )
+    parser.add_argument(
+        "--encoding",
+        dest="encoding",
+        type=str,
+        required=False,
+        default="pcm_s16le",
+        choices=list(WAV_ENCODINGS),
+        help="Set the output encoding.",
+    )
+    args = parser.parse_args()
+    print(transcode_wav(args.src_path, args.dst_path, args.sample_rate, args.encoding))
@@ -0,0 +1,148 @@
+"""
+Persistent state of send_wabp_campaign.py runs, so that a re-run never messages the same destination twice.
+
+A destination is claimed, in the same transaction as the batch it belongs to, before the campaign request of the
+batch is sent. The outcome of the request then settles the batch:
+- sent: the campaign was created, its id is recorded.
+- failed: the request was rejected or never reached the server, the claims are released and a re-run sends
+  these destinations again.
+- unknown: the request may have reached the server, e.g. it timed out. The claims are kept, a re-run skips
+  these destinations unless it is asked to resend them.
+The store is a single SQLite file.
+"""
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+BATCH_SENDING = "sending"
+BATCH_SENT = "sent"
+BATCH_FAILED = "failed"
+BATCH_UNKNOWN = "unknown"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS batches (
+        batch_id INTEGER PRIMARY KEY,
+        status TEXT NOT NULL,
+        destinations INTEGER NOT NULL,
+        campaign_id TEXT,
+        error TEXT,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS destinations (
+        destination TEXT PRIMARY KEY,
+        batch_id INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS destinations_batch ON destinations (batch_id)",
+)
+
+
+@dataclass
+class BatchRecord:
+    batch_id: int
+    status: str
+    destinations: int
+    campaign_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CampaignStateStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+        # Batches still sending were cut off by the end of the previous run, their requests may have been sent.
+        self._connection.execute(
+            "UPDATE batches SET status = ?, error = ? WHERE status = ?",
+            (BATCH_UNKNOWN, "interrupted while sending", BATCH_SENDING),
+        )
+
+    def is_claimed(self, destination: str) -> bool:
+        with self._lock:
+            row = self._connection.execute("SELECT 1 FROM destinations WHERE destination = ?", (destination,)).fetchone()
+        return row is not None
+
+    def claim(self, destinations: List[str]) -> int:
+        """Record a new batch of destinations, before its request is sent, and return its batch_id."""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                cursor = self._connection.execute(
+                    "INSERT INTO batches (status, destinations, updated_at) VALUES (?, ?, ?)",
+                    (BATCH_SENDING, len(destinations), _now()),
+                )
+                batch_id = cursor.lastrowid
+                self._connection.executemany(
+                    "INSERT INTO destinations (destination, batch_id) VALUES (?, ?)",
+                    [(destination, batch_id) for destination in destinations],
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return batch_id
+
+    def settle(self, batch_id: int, status: str, campaign_id: Optional[str] = None, error: Optional[str] = None):
+        """Record the outcome of the request of a batch. A failed batch releases its destinations."""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.execute(
+                    "UPDATE batches SET status = ?, campaign_id = ?, error = ?, updated_at = ? WHERE batch_id = ?",
+                    (status, campaign_id, error, _now(), batch_id),
+                )
+                if status == BATCH_FAILED:
+                    self._connection.execute("DELETE FROM destinations WHERE batch_id = ?", (batch_id,))
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def release_unknown(self) -> int:
+        """Release the destinations of the batches with an unknown outcome, so they are sent again."""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._connection.execute(
+                "DELETE FROM destinations WHERE batch_id IN (SELECT batch_id FROM batches WHERE status = ?)",
+                (BATCH_UNKNOWN,),
+            )
+            released = self._connection.execute(
+                "UPDATE batches SET status = ?, error = 'released for resending' WHERE status = ?",
+                (BATCH_FAILED, BATCH_UNKNOWN),
+            ).rowcount
+            self._connection.execute("COMMIT")
+        return released
+
+    def batches(self, statuses: Optional[Iterable[str]] = None) -> List[BatchRecord]:
+        statement = "SELECT batch_id, status, destinations, campaign_id, error FROM batches"
+        parameters: tuple = ()
+        if statuses is not None:
+            statuses = tuple(statuses)
+            statement += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            parameters = statuses
+        with self._lock:
+            rows = self._connection.execute(statement + " ORDER BY batch_id", parameters).fetchall()
+        return [BatchRecord(*row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """The number of destinations per batch status."""
+        with self._lock:
+            rows = self._connection.execute("SELECT status, SUM(destinations) FROM batches GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,566 @@
+"""
+Generate the endpoint modules of seasalt_client from the OpenAPI specs in static/openapi/.
+
+Every service (seax, seachat, seanotify, analytics) becomes a subpackage of seasalt_client with:
+- __init__.py: the base URL of the service and its tags, so the client finds them without importing them.
+- <tag>.py: one class per tag with a method per operation, and its asyncio counterpart Async<Tag>. An operation
+  taking limit/offset and returning a list also gets an iter_<operation> method, yielding the items of every page.
+- models.py: a TypedDict (or type alias) per schema of the spec, used in the annotations of the tag modules. It is
+  only imported by type checkers, so the hundreds of schemas of a spec cost nothing at runtime.
+
+Example usage:
+    python generate_client.py
+    python generate_client.py --output-dir /tmp/seasalt_client seax seanotify
+
+The generated modules are not committed. seasalt_client generates a service on first access when its package is
+missing or was generated from another version of the spec or of this script, see ensure_service. Run this script to
+generate them ahead, e.g. for a deployment that can not write to the package directory.
+"""
+
+import argparse
+import hashlib
+import json
+import keyword
+import os
+import re
+import shutil
+import sys
+import tempfile
+import textwrap
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from openapi_bundles import RefResolver, SpecIndex
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SPECS_DIR = os.path.join(SCRIPT_DIR, "..", "static", "openapi")
+DEFAULT_OUTPUT_DIR = os.path.join(SCRIPT_DIR, "seasalt_client")
+# service: (spec file, base URL the paths of the spec are relative to, display name)
+SERVICES = {
+    "seax": ("seax_openapi.json", "https://seax.seasalt.ai/seax-api", "SeaX"),
+    "seachat": ("seachat.json", "https://chat.seasalt.ai", "SeaChat"),
+    "seanotify": ("seanotify.json", "https://seax.seasalt.ai/notify-api", "SeaNotify"),
+    "analytics": ("analytics.json", "https://seax.seasalt.ai", "analytics"),
+}
+# Sent by the transport from the credentials of the client, never a method parameter.
+_CREDENTIAL_HEADERS = {"x-api-key", "authorization"}
+_RESERVED_NAMES = {"self", "body", "page_size"}
+_PRIMITIVES = {"string": "str", "integer": "int", "number": "float", "boolean": "bool", "null": "None"}
+_DEFAULT_PAGE_SIZE = 100
+_HEADER = "# Generated by generate_client.py from {spec}, do not edit.\n"
+_LINE_LENGTH = 120
+_FINGERPRINT = re.compile(r'^SPEC_FINGERPRINT = "(\w+)"$', re.MULTILINE)
+
+
+def _identifier(name: str) -> str:
+    identifier = re.sub(r"\W", "_", name)
+    if not identifier or identifier[0].isdigit():
+        identifier = "_" + identifier
+    return identifier + "_" if keyword.iskeyword(identifier) else identifier
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "default"
+
+
+def _class_name(tag: str) -> str:
+    return "".join(word.capitalize() for word in re.split(r"[^A-Za-z0-9]+", tag) if word) or "Default"
+
+
+def _literal(value) -> str:
+    """A Python literal of value, strings double quoted like the rest of the repo."""
+    return json.dumps(value) if isinstance(value, str) else repr(value)
+
+
+def _wrap(head: str, items: List[str], tail: str, indent: str) -> List[str]:
+    """head + items + tail on one line if it fits, else one item per line with a trailing comma."""
+    line = f"{indent}{head}{', '.join(items)}{tail}"
+    if len(line) <= _LINE_LENGTH or not items:
+        return [line]
+    return [f"{indent}{head}", *(f"{indent}    {item}," for item in items), f"{indent}{tail}"]
+
+
+def _first_paragraph(text: Optional[str], width: int = 110) -> List[str]:
+    paragraph = (text or "").strip().split("\n\n")[0]
+    return textwrap.wrap(" ".join(paragraph.split()).replace('"""', "'''"), width)
+
+
+class TypeRenderer:
+    """Renders JSON schemas as annotations, collecting the models they reference."""
+
+    def __init__(self, resolver: RefResolver, quote_refs: bool):
+        self.resolver = resolver
+        self.quote_refs = quote_refs
+        self.used: Set[str] = set()
+
+    def render(self, schema: Optional[dict]) -> str:
+        if not isinstance(schema, dict) or not schema:
+            return "Any"
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            if ref.startswith("#/components/schemas/") and ref not in self.resolver.dangling:
+                try:
+                    self.resolver.resolve(ref)
+                except KeyError:
+                    self.resolver.dangling.add(ref)
+                    return "Any"
+                name = _identifier(ref.rsplit("/", 1)[1])
+                self.used.add(name)
+                return f'"{name}"' if self.quote_refs else name
+            return "Any"
+        if "enum" in schema and all(isinstance(value, (str, int, bool)) for value in schema["enum"]):
+            return f"Literal[{', '.join(_literal(value) for value in schema['enum'])}]"
+        if "const" in schema:
+            return f"Literal[{_literal(schema['const'])}]"
+        for combinator in ("anyOf", "oneOf"):
+            if combinator in schema:
+                return self._union(schema[combinator])
+        if "allOf" in schema:
+            # A single allOf is how FastAPI annotates a $ref with a description.
+            return self.render(schema["allOf"][0]) if len(schema["allOf"]) == 1 else "Dict[str, Any]"
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            return self._union([dict(schema, type=item) for item in schema_type])
+        if schema_type == "array":
+            return f"List[{self.render(schema.get('items'))}]"
+        if schema_type == "object" or "properties" in schema or "additionalProperties" in schema:
+            additional = schema.get("additionalProperties")
+            return f"Dict[str, {self.render(additional) if isinstance(additional, dict) else 'Any'}]"
+        if schema_type == "string" and schema.get("format") == "binary":
+            return "bytes"
+        return _PRIMITIVES.get(schema_type, "Any")
+
+    def _union(self, schemas: Iterable[dict]) -> str:
+        members: List[str] = []
+        for schema in schemas:
+            member = self.render(schema)
+            if member not in members:
+                members.append(member)
+        if "Any" in members:
+            return "Any"
+        optional = "None" in members
+        members = [member for member in members if member != "None"]
+        if not members:
+            return "None"
+        annotation = members[0] if len(members) == 1 else f"Union[{', '.join(members)}]"
+        return f"Optional[{annotation}]" if optional else annotation
+
+
+# -- models.py --
+def render_models(spec: dict, spec_name: str, resolver: RefResolver) -> str:
+    renderer = TypeRenderer(resolver, quote_refs=True)
+    blocks = []
+    for name, schema in (spec.get("components", {}).get("schemas") or {}).items():
+        blocks.append(_render_model(_identifier(name), schema, renderer))
+    lines = [
+        _HEADER.format(spec=spec_name),
+        "from typing import Any, Dict, List, Literal, Optional, TypedDict, Union",
+        "",
+        "",
+        "\n\n\n".join(blocks),
+    ]
+    return "\n".join(lines)
+
+
+def _render_model(name: str, schema: dict, renderer: TypeRenderer) -> str:
+    properties = schema.get("properties")
+    if not isinstance(properties, dict) or not properties:
+        return f"{name} = {renderer.render(schema)}"
+
+    required = set(schema.get("required") or ())
+    fields = [(field, renderer.render(field_schema), field in required) for field, field_schema in properties.items()]
+    docstring = _first_paragraph(schema.get("description"), 106)
+    if not all(field.isidentifier() and not keyword.iskeyword(field) for field, _, _ in fields):
+        # Only the functional syntax accepts keys like "from" or "x-id".
+        items = [f"{_literal(field)}: {annotation}" for field, annotation, _ in fields]
+        return "\n".join(_wrap(f"{name} = TypedDict({_literal(name)}, {{", items, "}, total=False)", ""))
+
+    def body(selected) -> List[str]:
+        return [f"    {field}: {annotation}" for field, annotation, _ in selected]
+
+    required_fields = [field for field in fields if field[2]]
+    optional_fields = [field for field in fields if not field[2]]
+    lines = []
+    if required_fields and optional_fields:
+        # Required[] is Python 3.11+, the required keys go in a total base class instead.
+        lines += [f"class _{name}Required(TypedDict):", *body(required_fields), "", ""]
+        lines.append(f"class {name}(_{name}Required, total=False):")
+    else:
+        lines.append(f"class {name}(TypedDict{'' if required_fields else ', total=False'}):")
+    if docstring:
+        lines.append(f'    """{docstring[0]}"""' if len(docstring) == 1 else '    """\n' + "\n".join(f"    {line}" for line in docstring) + '\n    """')
+        lines.append("")
+    lines += body(optional_fields or required_fields)
+    return "\n".join(lines)
+
+
+# -- <tag>.py --
+class Parameter:
+    def __init__(self, name: str, location: str, required: bool, annotation: str):
+        self.name = name
+        self.location = location
+        self.required = required
+        self.annotation = annotation
+        self.argument = _identifier(name)
+
+
+class Operation:
+    def __init__(self, path: str, method: str, operation: dict, method_name: str, renderer: TypeRenderer, resolver: RefResolver):
+        self.path = path
+        self.method = method.upper()
+        self.operation = operation
+        self.method_name = method_name
+        self.parameters: List[Parameter] = []
+        for parameter in operation.get("parameters") or []:
+            if "$ref" in parameter:
+                parameter = resolver.resolve(parameter["$ref"])
+            if parameter["in"] == "header" and parameter["name"].lower() in _CREDENTIAL_HEADERS:
+                continue
+            if parameter["in"] == "cookie":
+                continue
+            self.parameters.append(
+                Parameter(parameter["name"], parameter["in"], parameter.get("required", False) or parameter["in"] == "path", renderer.render(parameter.get("schema")))
+            )
+        arguments: Set[str] = set()
+        for parameter in self.parameters:
+            while parameter.argument in arguments or parameter.argument in _RESERVED_NAMES:
+                parameter.argument += "_"
+            arguments.add(parameter.argument)
+
+        self.content_type = None
+        self.body_annotation = None
+        self.body_required = False
+        request_body = operation.get("requestBody")
+        if request_body:
+            content = request_body.get("content") or {}
+            self.content_type = next(iter(content), "application/json")
+            schema = content.get(self.content_type, {}).get("schema")
+            self.body_annotation = "Dict[str, Any]" if self.content_type == "multipart/form-data" else renderer.render(schema)
+            self.body_required = request_body.get("required", False)
+
+        self.return_annotation, response_schema = self._response(renderer)
+        self.items_key, self.items_annotation = self._pagination(response_schema, renderer, resolver)
+
+    def _response(self, renderer: TypeRenderer) -> Tuple[str, Optional[dict]]:
+        responses = self.operation.get("responses") or {}
+        for status in sorted(code for code in responses if str(code).startswith("2")):
+            content = responses[status].get("content")
+            if not content:
+                return "None", None
+            if "application/json" in content:
+                schema = content["application/json"].get("schema")
+                return renderer.render(schema), schema
+            return "Any", None
+        return "Any", None
+
+    def _pagination(self, schema: Optional[dict], renderer: TypeRenderer, resolver: RefResolver) -> Tuple[Optional[str], Optional[str]]:
+        """(items_key, item annotation) when the operation pages with limit/offset, items_key None for a bare list."""
+        query = {parameter.name for parameter in self.parameters if parameter.location == "query"}
+        if not {"limit", "offset"} <= query or not schema:
+            return None, None
+        if "$ref" in schema:
+            try:
+                schema = resolver.resolve(schema["$ref"])
+            except KeyError:
+                return None, None
+        if schema.get("type") == "array":
+            return "", renderer.render(schema.get("items"))
+        arrays = {}
+        for name, property_schema in (schema.get("properties") or {}).items():
+            for candidate in [property_schema, *property_schema.get("anyOf", ())]:
+                if candidate.get("type") == "array":
+                    arrays[name] = candidate
+        key = "data" if "data" in arrays else (next(iter(arrays)) if len(arrays) == 1 else None)
+        if key is None:
+            return None, None
+        return key, renderer.render(arrays[key].get("items"))
+
+    @property
+    def paginated(self) -> bool:
+        return self.items_key is not None
+
+    def page_size(self) -> int:
+        for parameter in self.operation.get("parameters") or []:
+            if parameter.get("name") == "limit" and "maximum" in (parameter.get("schema") or {}):
+                return min(_DEFAULT_PAGE_SIZE, parameter["schema"]["maximum"])
+        return _DEFAULT_PAGE_SIZE
+
+    def signature(self, pagination: bool = False) -> List[str]:
+        """The parameters of the method: path parameters and the body positional, everything else keyword only."""
+        arguments = ["self"]
+        arguments += [f"{parameter.argument}: {parameter.annotation}" for parameter in self.parameters if parameter.location == "path"]
+        if self.body_annotation and self.body_required:
+            arguments.append(f"body: {self.body_annotation}")
+        keyword_only = []
+        others = [parameter for parameter in self.parameters if parameter.location != "path"]
+        if pagination:
+            others = [parameter for parameter in others if parameter.name not in ("limit", "offset")]
+        keyword_only += [f"{parameter.argument}: {parameter.annotation}" for parameter in others if parameter.required]
+        if self.body_annotation and not self.body_required:
+            keyword_only.append(f"body: Optional[{self.body_annotation}] = None")
+        keyword_only += [
+            f"{parameter.argument}: {_optional(parameter.annotation)} = None" for parameter in others if not parameter.required
+        ]
+        if pagination:
+            keyword_only.append(f"page_size: int = {self.page_size()}")
+        if keyword_only:
+            arguments += ["*", *keyword_only]
+        return arguments
+
+    def docstring(self) -> List[str]:
+        lines = _first_paragraph(self.operation.get("summary")) or [f"{self.method} {self.path}"]
+        description = _first_paragraph(self.operation.get("description"))
+        if description and description != lines:
+            lines += [""] + description
+        if self.operation.get("deprecated"):
+            lines += ["", "Deprecated."]
+        lines += ["", f"{self.method} {self.path}"]
+        return lines
+
+    def request_arguments(self, indent: str) -> List[str]:
+        """The lines of the arguments of _request."""
+        lines = [f"{indent}{_literal(self.method)},", f"{indent}{_literal(self.path)},"]
+        for location, keyword_name in (("path", "path_parameters"), ("query", "query"), ("header", "headers")):
+            selected = [parameter for parameter in self.parameters if parameter.location == location]
+            if selected:
+                items = [f"{_literal(parameter.name)}: {parameter.argument}" for parameter in selected]
+                lines += _wrap(f"{keyword_name}={{", items, "},", indent)
+        if self.body_annotation:
+            lines += [f"{indent}body=body,", f"{indent}content_type={_literal(self.content_type)},"]
+        return lines
+
+
+def _optional(annotation: str) -> str:
+    return annotation if annotation in ("Any", "None") or annotation.startswith("Optional[") else f"Optional[{annotation}]"
+
+
+def _method_name(operation: dict, path: str, method: str) -> str:
+    """The operationId without the route suffix FastAPI appends, e.g. list_campaigns_api_v1_workspace__..._get."""
+    operation_id = operation.get("operationId") or f"{method}_{path}"
+    suffix = "_" + re.sub(r"\W", "_", path.lstrip("/")) + "_" + method
+    if operation_id.endswith(suffix) and len(operation_id) > len(suffix):
+        operation_id = operation_id[: -len(suffix)]
+    return _identifier(_snake(operation_id))
+
+
+def render_tag(tag: str, class_name: str, operations: List[Operation], renderer: TypeRenderer, service: str, spec_name: str) -> str:
+    sync_methods, async_methods = [], []
+    for operation in operations:
+        sync_methods.append(_render_method(operation, asynchronous=False))
+        async_methods.append(_render_method(operation, asynchronous=True))
+        if operation.paginated:
+            sync_methods.append(_render_iterator(operation, asynchronous=False))
+            async_methods.append(_render_iterator(operation, asynchronous=True))
+
+    lines = [
+        _HEADER.format(spec=spec_name),
+        f'"""The {tag} endpoints of the {service} API."""',
+        "",
+        "from __future__ import annotations",
+        "",
+        "from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Union",
+        "",
+        "from .._transport import AsyncEndpoints, Endpoints",
+        "",
+    ]
+    if renderer.used:
+        names = sorted(renderer.used)
+        lines += ["if TYPE_CHECKING:", "    from .models import (", *(f"        {name}," for name in names), "    )", ""]
+    lines += [
+        "",
+        f"class {class_name}(Endpoints):",
+        "\n\n".join(sync_methods),
+        "",
+        "",
+        f"class Async{class_name}(AsyncEndpoints):",
+        "\n\n".join(async_methods),
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def _render_docstring(lines: List[str]) -> List[str]:
+    if len(lines) == 1:
+        return [f'        """{lines[0]}"""']
+    return ['        """', *(f"        {line}".rstrip() for line in lines), '        """']
+
+
+def _render_method(operation: Operation, asynchronous: bool) -> str:
+    lines = [
+        *_wrap(f"{'async ' if asynchronous else ''}def {operation.method_name}(", operation.signature(), f") -> {operation.return_annotation}:", "    "),
+        *_render_docstring(operation.docstring()),
+        f"        return {'await ' if asynchronous else ''}self._request(",
+        *operation.request_arguments("            "),
+        "        )",
+    ]
+    return "\n".join(lines)
+
+
+def _render_iterator(operation: Operation, asynchronous: bool) -> str:
+    forwarded = [parameter for parameter in operation.parameters if parameter.name not in ("limit", "offset")]
+    keyword_arguments = [f"{parameter.argument}={parameter.argument}" for parameter in forwarded]
+    if operation.body_annotation:
+        keyword_arguments.append("body=body")
+    iterator = "AsyncIterator" if asynchronous else "Iterator"
+    items_key = _literal(operation.items_key or None)
+    lines = [
+        *_wrap(f"def iter_{operation.method_name}(", operation.signature(pagination=True), f") -> {iterator}[{operation.items_annotation}]:", "    "),
+        *_render_docstring([f"Every item of {operation.method_name}, fetching page_size items per request."]),
+        *_wrap("kwargs = dict(", keyword_arguments, ")", "        "),
+        f"        return self._paginate(self.{operation.method_name}, {items_key}, kwargs, page_size)",
+    ]
+    return "\n".join(lines)
+
+
+# -- the service package --
+def generate_service(service: str, spec_path: str, base_url: str, display_name: str, output_dir: str) -> dict:
+    with open(spec_path) as f:
+        spec = json.load(f)
+    spec_name = os.path.basename(spec_path)
+    index = SpecIndex(spec, service)
+    package_dir = os.path.join(output_dir, service)
+    os.makedirs(package_dir, exist_ok=True)
+    for name in os.listdir(package_dir):
+        # Tags removed from the spec must not linger as stale modules.
+        if name.endswith(".py"):
+            os.remove(os.path.join(package_dir, name))
+
+    tags: Dict[str, str] = {}
+    operation_count = 0
+    paginated_count = 0
+    for tag, operations in sorted(index.groups("tag").items()):
+        module = _identifier(_snake(tag))
+        renderer = TypeRenderer(index.resolver, quote_refs=False)
+        method_names: Set[str] = set()
+        rendered = []
+        for section, path, method, operation in operations:
+            if section != "paths":
+                continue
+            method_name = _method_name(operation, path, method)
+            while method_name in method_names or f"iter_{method_name}" in method_names:
+                method_name += "_"
+            method_names.add(method_name)
+            rendered.append(Operation(path, method, operation, method_name, renderer, index.resolver))
+        if not rendered:
+            continue
+        for operation in rendered:
+            # An operation named iter_<other> would clash with the iterator of <other>.
+            if operation.paginated and f"iter_{operation.method_name}" in method_names:
+                raise ValueError(f"{service}.{module}: iter_{operation.method_name} is both an operation and an iterator")
+        tags[module] = _class_name(tag)
+        operation_count += len(rendered)
+        paginated_count += sum(operation.paginated for operation in rendered)
+        source = render_tag(tag, tags[module], rendered, renderer, display_name, spec_name)
+        with open(os.path.join(package_dir, f"{module}.py"), "w") as f:
+            f.write(source)
+
+    with open(os.path.join(package_dir, "models.py"), "w") as f:
+        f.write(render_models(spec, spec_name, index.resolver))
+    with open(os.path.join(package_dir, "__init__.py"), "w") as f:
+        f.write(_HEADER.format(spec=spec_name))
+        f.write(f'"""The {display_name} API. The tag modules are imported on first access, see seasalt_client.Client."""\n\n')
+        f.write(f"BASE_URL = {_literal(base_url)}\n")
+        f.write(f'SPEC_FINGERPRINT = "{spec_fingerprint(spec_path)}"\n')
+        f.write("# tag module: endpoint class, the asyncio class is Async<class>.\n")
+        f.write("TAGS = {\n" + "".join(f"    {_literal(module)}: {_literal(class_name)},\n" for module, class_name in tags.items()) + "}\n")
+
+    schemas = len(spec.get("components", {}).get("schemas") or {})
+    if index.resolver.dangling:
+        print(f"{service}: {len(index.resolver.dangling)} dangling refs typed as Any: {', '.join(sorted(index.resolver.dangling))}", file=sys.stderr)
+    return {"tags": len(tags), "operations": operation_count, "paginated": paginated_count, "schemas": schemas}
+
+
+def spec_fingerprint(spec_path: str) -> str:
+    """A hash of the spec and of the generator, written to the generated package to tell when it is outdated."""
+    digest = hashlib.sha256()
+    for path in (spec_path, os.path.abspath(__file__), os.path.join(SCRIPT_DIR, "openapi_bundles.py")):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _generated_fingerprint(package_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(package_dir, "__init__.py")) as f:
+            match = _FINGERPRINT.search(f.read())
+    except OSError:
+        return None
+    return match.group(1) if match else None
+
+
+def ensure_service(service: str, specs_dir: str = DEFAULT_SPECS_DIR, output_dir: str = DEFAULT_OUTPUT_DIR) -> bool:
+    """
+    Generate the package of service unless it was generated from the current spec, and return whether it was.
+    The package is generated in a temporary directory and moved in place, a concurrent import never sees half of it.
+    """
+    spec_file, base_url, display_name = SERVICES[service]
+    spec_path = os.path.join(specs_dir, spec_file)
+    fingerprint = spec_fingerprint(spec_path)
+    package_dir = os.path.join(output_dir, service)
+    if _generated_fingerprint(package_dir) == fingerprint:
+        return False
+    staging_dir = tempfile.mkdtemp(prefix=f".{service}-", dir=output_dir)
+    retired_dir = f"{staging_dir}-retired"
+    try:
+        generate_service(service, spec_path, base_url, display_name, staging_dir)
+        try:
+            if os.path.isdir(package_dir):
+                os.rename(package_dir, retired_dir)
+            os.rename(os.path.join(staging_dir, service), package_dir)
+        except OSError:
+            # Another process generated it at the same time.
+            if _generated_fingerprint(package_dir) != fingerprint:
+                raise
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        shutil.rmtree(retired_dir, ignore_errors=True)
+    return True
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "services",
+        nargs="*",
+        type=str,
+        help=f"Set the services to generate, all of them by default: {', '.join(SERVICES)}.",
+    )
+    parser.add_argument(
+        "--specs-dir",
+        dest="specs_dir",
+        type=str,
+        required=False,
+        default=DEFAULT_SPECS_DIR,
+        help="Set the directory of the OpenAPI specs.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        dest="output_dir",
+        type=str,
+        required=False,
+        default=DEFAULT_OUTPUT_DIR,
+        help="Set the seasalt_client package directory the service packages are written to.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = parse_args(argv)
+    unknown = set(args.services) - set(SERVICES)
+    if unknown:
+        print(f"Unknown services {', '.join(sorted(unknown))}, the services are: {', '.join(SERVICES)}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+    for service in args.services or SERVICES:
+        spec_file, base_url, display_name = SERVICES[service]
+        start_time = time.time()
+        summary = generate_service(service, os.path.join(args.specs_dir, spec_file), base_url, display_name, args.output_dir)
+        print(
+            f"{service}: {summary['operations']} operations ({summary['paginated']} paginated) in {summary['tags']} tag modules,"
+            f" {summary['schemas']} schemas, {time.time() - start_time:.2f}s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,56 +5,616 @@ It provides a command line interface to:
 - upload the audio
 - start the transcription process.
 
+It imports either a single file (--wav-path) or a batch of files (--wav-dir, --wav-glob or --manifest)
+through a bounded worker pool (--concurrency).
+
 Prerequisites:
 - Python 3.8+
 - pip install requests
+- pip install numpy (only for --transcode)
+- pip install aiohttp (only for --engine asyncio)
 
 Example usage:
     python import_meeting_audio.py --access-token eyxxx --workspace-id test --wav-path test.wav --wav-name test.wav
+    python import_meeting_audio.py --access-token eyxxx --workspace-id test --wav-dir ./recordings --concurrency 8
+    python import_meeting_audio.py --access-token eyxxx --workspace-id test --manifest calls.csv
+
+A manifest is a CSV file with a header row, or a JSONL file with one object per line. The `wav_path` column is
+required, relative paths are resolved against the manifest's directory. Any of the columns in MANIFEST_FIELDS
+override the matching command line option for that file.
 """
 
 import argparse
+import asyncio
+import atexit
+import csv
+import glob
+import json
 import logging
+import logging.handlers
+import mmap
+import os
+import queue
+import random
 import sys
+import tempfile
 import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from audio_transcode import WAV_ENCODINGS, AudioFormat, read_wav_format, transcode_wav
+from import_metrics import ImportMetrics
+from import_state import ANALYZE_SUBMITTED, UPLOAD_DONE, ImportRecord, ImportStateStore, hash_file
+from meeting_jobs import FINISHED_JOB_STATUSES, CallbackReceiver, JobTracker, TrackedJob
+from rate_limit import (
+    AttemptFailed,
+    RateLimiter,
+    RetryPolicy,
+    parse_endpoint_rates,
+    parse_retry_after,
+    send_with_retries,
+)
+from seameet_async import AsyncSeaMeetClient, LoggedBody, WorkspaceLimiter
+
+
+# The keep-alive session shared by every backend and upload call, see _init_http_session.
+_http_session: Optional[requests.Session] = None
+# The record of what was already imported, enabled with --state-db.
+_import_state: Optional[ImportStateStore] = None
+# Client-side throttling per (workspace, endpoint), enabled with --rate-limit or --endpoint-rate-limit.
+_rate_limiter: Optional[RateLimiter] = None
+_retry_policy = RetryPolicy()
+# Request and response bodies are logged at DEBUG level for this share of the requests, cut to this many characters.
+_log_body_sample_rate = 1.0
+_log_body_max_chars = 1000
+# Per-stage timings, bytes and errors of the run, printed at the end and written to --metrics-output.
+_metrics = ImportMetrics()
+
+
+# Manifest columns that may override the command line options per file.
+MANIFEST_FIELDS = (
+    "workspace_id",
+    "wav_path",
+    "wav_name",
+    "meeting_name",
+    "meeting_start_time",
+    "customer_number",
+    "customer_name",
+    "agent_name",
+    "direction",
+)
+
 
-root = logging.getLogger()
-root.setLevel("DEBUG")
-handler = logging.StreamHandler(sys.stdout)
-handler.setLevel("DEBUG")
-formatter = logging.Formatter("%(asctime)s [%(name)s] %(levelname)-8s %(message)s")
-handler.setFormatter(formatter)
-root.addHandler(handler)
+@dataclass
+class ImportResult:
+    wav_path: str
+    meeting_id: Optional[str] = None
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
+    skipped: bool = False
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.job_status != "FAILED"
+
+
+def _configure_logging(args: argparse.Namespace):
+    """
+    Log to stdout at --log-level. With --async-logging the records are handed to a queue and formatted and
+    written by a background thread, so the workers never wait for console I/O.
+    """
+    global _log_body_sample_rate, _log_body_max_chars
+    _log_body_sample_rate = args.log_body_sample_rate
+    _log_body_max_chars = args.log_body_max_chars
+
+    root = logging.getLogger()
+    root.setLevel(args.log_level)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(args.log_level)
+    formatter = logging.Formatter("%(asctime)s [%(name)s] %(levelname)-8s %(message)s")
+    handler.setFormatter(formatter)
+    if args.async_logging:
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+    else:
+        root.addHandler(handler)
 
 
 def main(args: argparse.Namespace):
+    global _import_state, _rate_limiter, _retry_policy
     logging.debug("process start")
-    meeting_id = _create_meeting(args)
-    url = _get_meeting_upload_url(args, meeting_id)
-    _upload_audio(args, url)
-    _analyze_meeting_audio(args, meeting_id)
+    _init_http_session(
+        pool_size=args.pool_size or args.concurrency,
+        max_retries=args.max_retries,
+        retry_backoff=args.retry_backoff,
+    )
+    _retry_policy = RetryPolicy(
+        max_retries=args.max_retries, backoff=args.retry_backoff, max_delay=args.max_retry_delay
+    )
+    if args.rate_limit or args.endpoint_rate_limit:
+        _rate_limiter = RateLimiter(
+            default_rate=args.rate_limit,
+            endpoint_rates=parse_endpoint_rates(args.endpoint_rate_limit),
+            burst=args.rate_burst,
+        )
+    if args.state_db:
+        _import_state = ImportStateStore(args.state_db)
+    tracker, receiver = _start_job_tracker(args) if args.wait else (None, None)
+    try:
+        if args.engine == "asyncio":
+            jobs = [args] if args.wav_path else _collect_batch_jobs(args)
+            results = asyncio.run(_run_batch_async(args, jobs, tracker))
+        elif args.wav_path:
+            results = [_import_meeting_audio(args)]
+            _track_job(tracker, results[0])
+        else:
+            results = _run_batch(args, _collect_batch_jobs(args), tracker)
+
+        if tracker:
+            _wait_for_jobs(args, tracker, results)
+    finally:
+        if receiver:
+            receiver.close()
+        if tracker:
+            tracker.close()
+        if _import_state:
+            _import_state.close()
+
+    if args.metrics_output:
+        _metrics.write(args.metrics_output)
+    if tracker or not args.wav_path:
+        _print_batch_summary(results)
+        print(_metrics.summary())
+        if not all(result.ok for result in results):
+            sys.exit(1)
 
     logging.debug("process finished")
 
 
-def _create_meeting(args: argparse.Namespace) -> str:
-    body = {
+def _init_http_session(pool_size: int, max_retries: int = 3, retry_backoff: float = 0.5) -> requests.Session:
+    """
+    Create the shared session so that every worker reuses keep-alive connections to the backend and S3
+    instead of paying a TCP+TLS handshake per request.
+    The session only retries failed connections, which never reached the server. Error responses are retried
+    by _query_backend_service according to _retry_policy.
+    """
+    global _http_session
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=retry_backoff,
+        raise_on_status=False,
+    )
+    # NOTE: pool_connections is the number of hosts kept in the pool (backend and S3),
+    # pool_maxsize the number of connections kept per host.
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    _http_session = session
+    return session
+
+
+def _get_http_session() -> requests.Session:
+    if _http_session is None:
+        return _init_http_session(pool_size=1)
+    return _http_session
+
+
+def _import_meeting_audio(args: argparse.Namespace) -> ImportResult:
+    """Run the whole import of one file. With --state-db the steps already done by a previous run are skipped."""
+    result = ImportResult(wav_path=args.wav_path)
+    if _import_state is None:
+        result.meeting_id, result.job_id = _run_import_steps(args)
+        return result
+
+    with _metrics.time("hash"):
+        content_hash = hash_file(args.wav_path)
+    with _import_state.lock(content_hash):
+        record = _import_state.get(content_hash) or ImportRecord(content_hash=content_hash, wav_path=args.wav_path)
+        if record.completed:
+            return _skipped_result(args, record)
+        result.meeting_id, result.job_id = _run_import_steps(args, record)
+    return result
+
+
+def _skipped_result(args: argparse.Namespace, record: ImportRecord) -> ImportResult:
+    logging.info(f"skipping {args.wav_path}, already imported from {record.wav_path} as {record.meeting_id}")
+    return ImportResult(
+        wav_path=args.wav_path,
+        meeting_id=record.meeting_id,
+        job_id=record.job_id,
+        job_status=record.job_status,
+        skipped=True,
+    )
+
+
+def _run_import_steps(args: argparse.Namespace, record: Optional[ImportRecord] = None) -> Tuple[str, str]:
+    """
+    Create the meeting, upload the audio and start the analysis, and return the meeting id and the job id.
+    Every finished step is saved to the state store right away, so a crash never leads to a second meeting
+    or a second upload for the same audio.
+    """
+
+    def save(**fields):
+        if record:
+            _import_state.update(record.content_hash, args.wav_path, **fields)
+
+    meeting_id = record.meeting_id if record else None
+    if meeting_id:
+        logging.info(f"resuming the import of {args.wav_path} into meeting {meeting_id}")
+    else:
+        with _metrics.time("create"):
+            meeting_id = _create_meeting(args)
+        save(meeting_id=meeting_id)
+
+    if record and record.uploaded:
+        args = _with_existing_audio(args, record)
+    else:
+        args, transcoded_path = _prepare_audio(args)
+        try:
+            with _metrics.time("upload_url"):
+                url = _get_meeting_upload_url(args, meeting_id)
+            with _metrics.time("upload"):
+                _upload_audio(args, url)
+            _metrics.add_bytes("upload", os.path.getsize(args.wav_path))
+        finally:
+            if transcoded_path:
+                os.remove(transcoded_path)
+        save(
+            upload_status=UPLOAD_DONE,
+            audio_format=args.audio_format,
+            audio_sample_rate=args.audio_sample_rate,
+            audio_encoding=args.audio_encoding,
+        )
+
+    with _metrics.time("analyze"):
+        job_id = _analyze_meeting_audio(args, meeting_id)
+    save(analyze_status=ANALYZE_SUBMITTED, job_id=job_id, job_status=None)
+    return meeting_id, job_id
+
+
+def _with_existing_audio(args: argparse.Namespace, record: ImportRecord) -> argparse.Namespace:
+    """Analyze the audio uploaded by a previous run, declared with the format it was uploaded in."""
+    args = _with_audio_format(
+        args, AudioFormat(record.audio_format, record.audio_sample_rate, record.audio_encoding, channels=1)
+    )
+    args.use_existing_audio = True
+    return args
+
+
+def _prepare_audio(args: argparse.Namespace) -> Tuple[argparse.Namespace, Optional[str]]:
+    """
+    Make sure audio_format, audio_sample_rate and audio_encoding describe the bytes that are uploaded.
+    With --transcode the wav file is converted to the declared sample rate and encoding first,
+    and the path of the temporary transcoded file is returned so it can be removed afterwards.
+    """
+    source_format = read_wav_format(args.wav_path)
+    if not args.transcode:
+        if source_format and (source_format.sample_rate, source_format.encoding) != (
+            args.audio_sample_rate,
+            args.audio_encoding,
+        ):
+            logging.warning(
+                f"{args.wav_path} is {source_format.sample_rate}Hz {source_format.encoding}, "
+                f"declaring that instead of {args.audio_sample_rate}Hz {args.audio_encoding}"
+            )
+            args = _with_audio_format(args, source_format)
+        return args, None
+
+    if source_format is None:
+        raise ValueError(f"{args.wav_path} is not a PCM wav file and cannot be transcoded")
+    encoding = args.audio_encoding
+    if encoding not in WAV_ENCODINGS:
+        logging.warning(f"{encoding} cannot be stored in a wav file, transcoding {args.wav_path} to pcm_s16le")
+        encoding = "pcm_s16le"
+
+    fd, transcoded_path = tempfile.mkstemp(suffix=".wav", dir=args.transcode_dir)
+    os.close(fd)
+    try:
+        with _metrics.time("transcode"):
+            target_format = transcode_wav(args.wav_path, transcoded_path, args.audio_sample_rate, encoding)
+    except Exception:
+        os.remove(transcoded_path)
+        raise
+    args = _with_audio_format(args, target_format)
+    args.wav_path = transcoded_path
+    return args, transcoded_path
+
+
+def _with_audio_format(args: argparse.Namespace, audio_format: AudioFormat) -> argparse.Namespace:
+    return argparse.Namespace(
+        **{
+            **vars(args),
+            "audio_format": audio_format.audio_format,
+            "audio_sample_rate": audio_format.sample_rate,
+            "audio_encoding": audio_format.encoding,
+        }
+    )
+
+
+def _collect_batch_jobs(args: argparse.Namespace) -> List[argparse.Namespace]:
+    """Expand --wav-dir, --wav-glob or --manifest into one argument namespace per file."""
+    if args.manifest:
+        rows = _read_manifest(args.manifest)
+    else:
+        pattern = os.path.join(args.wav_dir, "*.wav") if args.wav_dir else args.wav_glob
+        rows = [{"wav_path": path} for path in sorted(glob.glob(pattern, recursive=True))]
+
+    jobs = []
+    for row in rows:
+        overrides = {field: row[field] for field in MANIFEST_FIELDS if row.get(field)}
+        if "wav_path" not in overrides:
+            raise ValueError(f"manifest row without wav_path: {row}")
+        overrides.setdefault("wav_name", os.path.basename(overrides["wav_path"]))
+        jobs.append(argparse.Namespace(**{**vars(args), **overrides}))
+    return jobs
+
+
+def _read_manifest(manifest_path: str) -> List[dict]:
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline="", encoding="utf-8") as f:
+        if manifest_path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    for row in rows:
+        if row.get("wav_path"):
+            row["wav_path"] = os.path.join(base_dir, row["wav_path"])
+    return rows
+
+
+def _run_batch(
+    args: argparse.Namespace, jobs: List[argparse.Namespace], tracker: Optional[JobTracker] = None
+) -> List[ImportResult]:
+    logging.info(f"importing {len(jobs)} files with concurrency {args.concurrency}")
+    results = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(_import_batch_job, job, tracker): job for job in jobs}
+        for future in as_completed(futures):
+            results.append(future.result())
+    return sorted(results, key=lambda result: result.wav_path)
+
+
+def _import_batch_job(job_args: argparse.Namespace, tracker: Optional[JobTracker] = None) -> ImportResult:
+    start_time = time.time()
+    try:
+        result = _import_meeting_audio(job_args)
+        _track_job(tracker, result)
+    except Exception as e:
+        result = ImportResult(wav_path=job_args.wav_path, error=f"{e.__class__.__name__} {e}")
+    result.elapsed = time.time() - start_time
+    return result
+
+
+async def _run_batch_async(
+    args: argparse.Namespace, jobs: List[argparse.Namespace], tracker: Optional[JobTracker] = None
+) -> List[ImportResult]:
+    """
+    The --engine asyncio counterpart of _run_batch. Every file is a task on one event loop, at most --concurrency
+    of them are in flight overall and at most --workspace-concurrency per workspace.
+    """
+    logging.info(f"importing {len(jobs)} files with concurrency {args.concurrency} on asyncio")
+    concurrency = asyncio.Semaphore(args.concurrency)
+    workspace_limiter = WorkspaceLimiter(args.workspace_concurrency or args.concurrency)
+    hash_locks: Dict[str, asyncio.Lock] = {}
+
+    async with AsyncSeaMeetClient(
+        args.access_token,
+        pool_size=args.pool_size or args.concurrency,
+        rate_limiter=_rate_limiter,
+        retry_policy=_retry_policy,
+        log_body_max_chars=_log_body_max_chars,
+    ) as client:
+
+        async def import_job(job_args: argparse.Namespace) -> ImportResult:
+            # The workspace slot first: a task waiting on its busy workspace must not hold a global slot, the
+            # other workspaces would queue behind it.
+            async with workspace_limiter(job_args.workspace_id), concurrency:
+                start_time = time.time()
+                try:
+                    result = await _import_meeting_audio_async(job_args, client, hash_locks)
+                    _track_job(tracker, result)
+                except Exception as e:
+                    result = ImportResult(wav_path=job_args.wav_path, error=f"{e.__class__.__name__} {e}")
+                result.elapsed = time.time() - start_time
+                return result
+
+        results = await asyncio.gather(*(import_job(job) for job in jobs))
+    return sorted(results, key=lambda result: result.wav_path)
+
+
+async def _import_meeting_audio_async(
+    args: argparse.Namespace, client: AsyncSeaMeetClient, hash_locks: Dict[str, asyncio.Lock]
+) -> ImportResult:
+    result = ImportResult(wav_path=args.wav_path)
+    if _import_state is None:
+        result.meeting_id, result.job_id = await _run_import_steps_async(args, client)
+        return result
+
+    loop = asyncio.get_running_loop()
+    with _metrics.time("hash"):
+        content_hash = await loop.run_in_executor(None, hash_file, args.wav_path)
+    async with hash_locks.setdefault(content_hash, asyncio.Lock()):
+        # NOTE: The state store calls are short SQLite statements and are run on the event loop.
+        record = _import_state.get(content_hash) or ImportRecord(content_hash=content_hash, wav_path=args.wav_path)
+        if record.completed:
+            return _skipped_result(args, record)
+        result.meeting_id, result.job_id = await _run_import_steps_async(args, client, record)
+    return result
+
+
+async def _run_import_steps_async(
+    args: argparse.Namespace, client: AsyncSeaMeetClient, record: Optional[ImportRecord] = None
+) -> Tuple[str, str]:
+    """The asyncio counterpart of _run_import_steps."""
+
+    def save(**fields):
+        if record:
+            _import_state.update(record.content_hash, args.wav_path, **fields)
+
+    meeting_id = record.meeting_id if record else None
+    if meeting_id:
+        logging.info(f"resuming the import of {args.wav_path} into meeting {meeting_id}")
+    else:
+        with _metrics.time("create"):
+            response = await client.query(
+                _workspace_url(args, "meetings"),
+                "POST",
+                body=_create_meeting_body(args),
+                rate_limit_key=(args.workspace_id, "create_meeting"),
+            )
+        meeting_id = response["id"]
+        save(meeting_id=meeting_id)
+
+    if record and record.uploaded:
+        args = _with_existing_audio(args, record)
+    else:
+        # Reading the wav header and transcoding are blocking, they run in the default executor.
+        args, transcoded_path = await asyncio.get_running_loop().run_in_executor(None, _prepare_audio, args)
+        try:
+            with _metrics.time("upload_url"):
+                response = await client.query(
+                    _workspace_url(args, f"meetings/{meeting_id}/upload_audio_url"),
+                    "POST",
+                    body={},
+                    url_parameters={"file_name": args.wav_name},
+                    rate_limit_key=(args.workspace_id, "upload_audio_url"),
+                    idempotent=True,
+                )
+            stream = _AudioUploadStream(args.wav_path, chunk_size=args.upload_chunk_size)
+            try:
+                with _metrics.time("upload"):
+                    await client.upload_file(
+                        response["upload_audio_url"],
+                        stream,
+                        retries=args.upload_retries,
+                        retry_backoff=args.retry_backoff,
+                    )
+            finally:
+                stream.close()
+            _metrics.add_bytes("upload", os.path.getsize(args.wav_path))
+        finally:
+            if transcoded_path:
+                os.remove(transcoded_path)
+        save(
+            upload_status=UPLOAD_DONE,
+            audio_format=args.audio_format,
+            audio_sample_rate=args.audio_sample_rate,
+            audio_encoding=args.audio_encoding,
+        )
+
+    with _metrics.time("analyze"):
+        response = await client.query(
+            _workspace_url(args, f"meetings/{meeting_id}/analyze_audio"),
+            "POST",
+            body=_analyze_meeting_audio_body(args, meeting_id),
+            rate_limit_key=(args.workspace_id, "analyze_audio"),
+        )
+    job_id = response.get("job", response).get("id")
+    save(analyze_status=ANALYZE_SUBMITTED, job_id=job_id, job_status=None)
+    return meeting_id, job_id
+
+
+def _track_job(tracker: Optional[JobTracker], result: ImportResult):
+    if tracker and result.job_id and result.job_status not in FINISHED_JOB_STATUSES:
+        tracker.add(result.job_id, result.meeting_id)
+
+
+def _start_job_tracker(args: argparse.Namespace) -> Tuple[JobTracker, Optional[CallbackReceiver]]:
+    os.makedirs(args.output_dir, exist_ok=True)
+    tracker = JobTracker(
+        fetch_job=lambda job_id: _get_job(args, job_id),
+        on_done=lambda job: _on_job_done(args, job),
+        # NOTE: With a callback receiver polling is only a safety net for lost callbacks.
+        initial_interval=args.max_poll_interval if args.callback_port else args.poll_interval,
+        max_interval=args.max_poll_interval,
+        max_polls_per_second=args.max_polls_per_second,
+        poll_concurrency=args.pool_size or args.concurrency,
+    )
+    receiver = None
+    if args.callback_port:
+        receiver = CallbackReceiver(
+            tracker, host=args.callback_host, port=args.callback_port, secret=args.callback_secret
+        ).start()
+    return tracker, receiver
+
+
+def _wait_for_jobs(args: argparse.Namespace, tracker: JobTracker, results: List[ImportResult]):
+    jobs = {job.job_id: job for job in tracker.wait(timeout=args.wait_timeout)}
+    for result in results:
+        job = jobs.get(result.job_id)
+        if job:
+            result.job_status = job.status if job.done.is_set() else f"{job.status}(timeout)"
+
+
+def _on_job_done(args: argparse.Namespace, job: TrackedJob):
+    _metrics.observe("wait", time.monotonic() - job.added_at, error=job.status == "FAILED")
+    if _import_state:
+        _import_state.update_job_status(job.job_id, job.status)
+    _write_job_result(args.output_dir, job)
+
+
+def _write_job_result(output_dir: str, job: TrackedJob):
+    """
+    Write the analysis of a finished job to <output_dir>/<meeting_id>.json.
+    The transcript is only delivered by the analysis callback, the job document is written when there is none.
+    """
+    result = job.callback_payload if job.callback_payload is not None else job.job
+    path = os.path.join(output_dir, f"{job.meeting_id}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    logging.debug(f"wrote the result of meeting {job.meeting_id} to {path}")
+
+
+def _print_batch_summary(results: List[ImportResult]):
+    succeeded = sum(1 for result in results if result.ok)
+    print(f"{'status':<8} {'elapsed':>8}  {'job_status':<16} {'meeting_id':<40} wav_path")
+    for result in results:
+        status = ("SKIPPED" if result.skipped else "OK") if result.ok else "FAILED"
+        detail = result.meeting_id if result.error is None else result.error
+        print(f"{status:<8} {result.elapsed:>7.1f}s  {result.job_status or '':<16} {detail or '':<40} {result.wav_path}")
+    skipped = sum(1 for result in results if result.skipped)
+    print(f"imported {succeeded}/{len(results)} files ({skipped} skipped), {len(results) - succeeded} failed")
+
+
+def _workspace_url(args: argparse.Namespace, path: str) -> str:
+    return f"{args.seameet_url_base}/api/v1/workspaces/{args.workspace_id}/{path}"
+
+
+def _create_meeting_body(args: argparse.Namespace) -> dict:
+    return {
         "meeting_name": args.meeting_name,
         "channel_type": "PHONE",
         "language": args.meeting_language,
         "start_time": args.meeting_start_time,
     }
-    url = f"{args.seameet_url_base}/api/v1/workspaces/{args.workspace_id}/meetings"
+
+
+def _create_meeting(args: argparse.Namespace) -> str:
+    url = _workspace_url(args, "meetings")
     response = _query_backend_service(
         access_token=args.access_token,
         url=url,
         method="POST",
-        body=body,
+        body=_create_meeting_body(args),
+        rate_limit_key=(args.workspace_id, "create_meeting"),
     )
     return response["id"]
 
@@ -62,28 +622,127 @@ def _create_meeting(args: argparse.Namespace) -> str:
 def _get_meeting_upload_url(args: argparse.Namespace, meeting_id: str) -> str:
     body = {}
     url_parameters = {"file_name": args.wav_name}
-    url = f"{args.seameet_url_base}/api/v1/workspaces/{args.workspace_id}/meetings/{meeting_id}/upload_audio_url"
+    url = _workspace_url(args, f"meetings/{meeting_id}/upload_audio_url")
     response = _query_backend_service(
         access_token=args.access_token,
         url=url,
         method="POST",
         body=body,
         url_parameters=url_parameters,
+        rate_limit_key=(args.workspace_id, "upload_audio_url"),
+        idempotent=True,
     )
     return response["upload_audio_url"]
 
 
-def _upload_audio(args: argparse.Namespace, url: str):
+class _AudioUploadStream:
+    """
+    A read-only file-like view over a memory-mapped audio file.
+    Every read returns a memoryview of the next chunk, so the file is never copied into the process
+    and memory use stays flat whatever the size of the recording.
+    It also keeps track of the bytes handed to the connection to report the upload throughput.
+    """
 
-    with open(args.wav_path, "rb") as f:
-        response = requests.put(url, data=f)
-        response.raise_for_status()
+    def __init__(self, path: str, chunk_size: int, progress_interval: float = 5.0):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+        self._file = open(path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+        self._view = memoryview(self._mmap) if self._mmap else memoryview(b"")
+        self._position = 0
+        self._start_time = time.time()
+        self._last_progress_time = self._start_time
 
-    logging.debug((f"uploaded {args.wav_path} to s3"))
+    def __len__(self) -> int:
+        return self._size
 
+    def __iter__(self):
+        while True:
+            chunk = self.read()
+            if not chunk:
+                return
+            yield chunk
 
-def _analyze_meeting_audio(args: argparse.Namespace, meeting_id: str) -> str:
-    body = {
+    def read(self, size: int = -1) -> memoryview:
+        # NOTE: The size requested by the http client is ignored, chunks are always chunk_size bytes.
+        end = min(self._position + self.chunk_size, self._size)
+        chunk = self._view[self._position : end]
+        self._position = end
+        if chunk:
+            self._log_progress()
+        return chunk
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._size
+        self._position = max(0, min(offset, self._size))
+        if self._position == 0:
+            self._start_time = self._last_progress_time = time.time()
+        return self._position
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self._position / max(time.time() - self._start_time, 1e-6)
+
+    def close(self):
+        self._view.release()
+        try:
+            if self._mmap:
+                self._mmap.close()
+        except BufferError:
+            # A chunk is still referenced by the http client, the mapping is released with it.
+            pass
+        self._file.close()
+
+    def _log_progress(self):
+        now = time.time()
+        if now - self._last_progress_time >= self.progress_interval or self._position == self._size:
+            self._last_progress_time = now
+            logging.debug(
+                f"uploading {self.path}: {self._position}/{self._size} bytes, {self.bytes_per_second / 1024:.1f} KiB/s"
+            )
+
+
+def _upload_audio(args: argparse.Namespace, url: str):
+    # NOTE: The presigned S3 url accepts a single PUT of the whole object, it cannot append to a partial upload.
+    # A failed transfer is therefore retried by rewinding the stream, which costs no extra memory.
+    stream = _AudioUploadStream(args.wav_path, chunk_size=args.upload_chunk_size)
+    try:
+        for attempt in range(args.upload_retries + 1):
+            stream.seek(0)
+            try:
+                response = _get_http_session().put(url, data=stream)
+                response.raise_for_status()
+                break
+            except requests.RequestException as e:
+                if attempt == args.upload_retries:
+                    raise
+                delay = args.retry_backoff * (2**attempt)
+                logging.warning(
+                    f"failed to upload {args.wav_path} at byte {stream.tell()}/{len(stream)}, "
+                    f"retrying in {delay:.1f}s: {e.__class__.__name__} {e}"
+                )
+                time.sleep(delay)
+
+        logging.debug(
+            (
+                f"uploaded {args.wav_path} to s3, {len(stream)} bytes, "
+                f"{stream.bytes_per_second / 1024:.1f} KiB/s"
+            )
+        )
+    finally:
+        stream.close()
+
+
+def _analyze_meeting_audio_body(args: argparse.Namespace, meeting_id: str) -> dict:
+    return {
         "meeting_id": meeting_id,
         "channel": 1,
         "audio_start_offset": args.audio_start_offset,
@@ -111,12 +770,28 @@ def _analyze_meeting_audio(args: argparse.Namespace, meeting_id: str) -> str:
         "reset_meeting": args.reset_meeting,
         "queue_type": args.queue_type,
     }
-    url = f"{args.seameet_url_base}/api/v1/workspaces/{args.workspace_id}/meetings/{meeting_id}/analyze_audio"
-    _query_backend_service(
+
+
+def _analyze_meeting_audio(args: argparse.Namespace, meeting_id: str) -> str:
+    url = _workspace_url(args, f"meetings/{meeting_id}/analyze_audio")
+    response = _query_backend_service(
         access_token=args.access_token,
         url=url,
         method="POST",
-        body=body,
+        body=_analyze_meeting_audio_body(args, meeting_id),
+        rate_limit_key=(args.workspace_id, "analyze_audio"),
+    )
+    return response.get("job", response).get("id")
+
+
+def _get_job(args: argparse.Namespace, job_id: str) -> dict:
+    url = _workspace_url(args, f"jobs/{job_id}")
+    return _query_backend_service(
+        access_token=args.access_token,
+        url=url,
+        method="GET",
+        rate_limit_key=(args.workspace_id, "get_job"),
+        idempotent=True,
     )
 
 
@@ -128,44 +803,70 @@ def _query_backend_service(
     headers: dict = {},
     url_parameters: dict = {},
     timeout: Optional[float] = None,
+    rate_limit_key: Optional[Tuple[str, str]] = None,
+    idempotent: bool = False,
 ) -> dict:
-    start_time = time.time()
-    response = None
-    try:
-        if url_parameters:
-            url += "?" + urllib.parse.urlencode(url_parameters)
-        final_headers = {
-            "accept": r"application/json",
-            "Content-Type": r"application/json",
-            "Authorization": f"Bearer {access_token}",
-        }
+    """
+    Send a request to the backend, paced by the (workspace_id, endpoint) bucket of rate_limit_key.
+    A throttled (429) request is always retried, other failures only if the request is idempotent.
+    """
+    if url_parameters:
+        url += "?" + urllib.parse.urlencode(url_parameters)
+    final_headers = {
+        "accept": r"application/json",
+        "Content-Type": r"application/json",
+        "Authorization": f"Bearer {access_token}",
+    }
+    if headers:
+        final_headers.update(headers)
+    bucket = _rate_limiter.bucket(*rate_limit_key) if _rate_limiter and rate_limit_key else None
 
-        if headers:
-            final_headers.update(headers)
-        # NOTE: Extend default timeout to wait the Backend API-Server responding.
-        # - Especially the post_final_transcription is taking too long.
-        session = requests.Session()
-        request = requests.Request(method, url, json=body, headers=final_headers)
-        response = session.send(request.prepare(), timeout=timeout)
-        response.raise_for_status()
-        if not response.text:
-            return {}
-        result_json = response.json()
-        logging.debug(
-            (
-                f"finish a request to API server, time elapsed: {time.time()-start_time:.3f}s, method: {method}, url:{url}"
-                f", method: {method}, body: {body}, response body: {result_json}"
+    def send() -> dict:
+        start_time = time.time()
+        response = None
+        try:
+            # NOTE: Extend default timeout to wait the Backend API-Server responding.
+            # - Especially the post_final_transcription is taking too long.
+            response = _get_http_session().request(method, url, json=body, headers=final_headers, timeout=timeout)
+            response.raise_for_status()
+            if not response.text:
+                return {}
+            result_json = response.json()
+            # NOTE: Only the sampled requests log their bodies, and the bodies are rendered lazily by the handler.
+            if _log_body_sample_rate >= 1 or random.random() < _log_body_sample_rate:
+                logging.debug(
+                    "finish a request to API server, time elapsed: %.3fs, method: %s, url:%s, body: %s, response body: %s",
+                    time.time() - start_time,
+                    method,
+                    url,
+                    LoggedBody(body, _log_body_max_chars),
+                    LoggedBody(result_json, _log_body_max_chars),
+                )
+            else:
+                logging.debug(
+                    "finish a request to API server, time elapsed: %.3fs, method: %s, url:%s",
+                    time.time() - start_time,
+                    method,
+                    url,
+                )
+            return result_json
+        except Exception as e:
+            logging.warning(
+                "failed to request API server, time elapsed: %.3fs, method: %s, url:%s, error: %s %s %s",
+                time.time() - start_time,
+                method,
+                url,
+                e.__class__.__name__,
+                e,
+                LoggedBody(response.text if response else "", _log_body_max_chars),
             )
-        )
-        return result_json
-    except Exception as e:
-        logging.warning(
-            (
-                f"failed to request API server, time elapsed: {time.time()-start_time:.3f}s, method: {method}, url:{url}, "
-                f"error: {e.__class__.__name__} {e} {response.text if response else ''}"
-            )
-        )
-        raise e
+            if not isinstance(e, requests.RequestException):
+                raise e
+            status_code = response.status_code if response is not None else None
+            retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+            raise AttemptFailed(e, status_code, retry_after)
+
+    return send_with_retries(send, _retry_policy, idempotent, bucket=bucket, description=f"{method} {url}")
 
 
 if __name__ == "__main__":
@@ -177,19 +878,258 @@ if __name__ == "__main__":
         required=True,
         help="Set the workspace id.",
     )
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--wav-path",
         dest="wav_path",
         type=str,
-        required=True,
         help="Set the wav path.",
     )
+    source.add_argument(
+        "--wav-dir",
+        dest="wav_dir",
+        type=str,
+        help="Import every *.wav file in the directory.",
+    )
+    source.add_argument(
+        "--wav-glob",
+        dest="wav_glob",
+        type=str,
+        help="Import every file matching the glob pattern, e.g. 'recordings/**/*.wav'.",
+    )
+    source.add_argument(
+        "--manifest",
+        dest="manifest",
+        type=str,
+        help="Import the files listed in a CSV or JSONL manifest.",
+    )
     parser.add_argument(
         "--wav-name",
         dest="wav_name",
         type=str,
-        required=True,
-        help="Set the wav name.",
+        required=False,
+        help="Set the wav name. Defaults to the file name of the wav path.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        type=int,
+        required=False,
+        default=4,
+        help="The number of files imported in parallel in batch mode.",
+    )
+    parser.add_argument(
+        "--log-level",
+        dest="log_level",
+        type=str.upper,
+        required=False,
+        default="DEBUG",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Set the log level. Use INFO or above for large batches, request bodies are only logged at DEBUG.",
+    )
+    parser.add_argument(
+        "--log-body-sample-rate",
+        dest="log_body_sample_rate",
+        type=float,
+        required=False,
+        default=1.0,
+        help="The share of requests, between 0 and 1, whose request and response bodies are logged at DEBUG level.",
+    )
+    parser.add_argument(
+        "--log-body-max-chars",
+        dest="log_body_max_chars",
+        type=int,
+        required=False,
+        default=1000,
+        help="Truncate the logged request and response bodies to this many characters.",
+    )
+    parser.add_argument(
+        "--async-logging",
+        dest="async_logging",
+        action="store_true",
+        help="Format and write the logs on a background thread through a queue.",
+    )
+    parser.add_argument(
+        "--metrics-output",
+        dest="metrics_output",
+        type=str,
+        required=False,
+        help="Write the per-stage metrics of the run to this file, in the Prometheus text format for *.prom files and as JSON otherwise.",
+    )
+    parser.add_argument(
+        "--engine",
+        dest="engine",
+        type=str,
+        required=False,
+        default="threads",
+        choices=["threads", "asyncio"],
+        help="Import with a thread pool, or with asyncio tasks on one event loop (requires aiohttp).",
+    )
+    parser.add_argument(
+        "--workspace-concurrency",
+        dest="workspace_concurrency",
+        type=int,
+        required=False,
+        help="The maximum number of files imported in parallel per workspace. Defaults to --concurrency.",
+    )
+    parser.add_argument(
+        "--pool-size",
+        dest="pool_size",
+        type=int,
+        required=False,
+        help="The number of keep-alive connections kept per host. Defaults to --concurrency.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        dest="max_retries",
+        type=int,
+        required=False,
+        default=3,
+        help=(
+            "Retry a request up to this many times. Failed connections and 429 responses are always retried, even "
+            "for POST requests. Other errors and 500/502/503/504 responses only for the GET requests."
+        ),
+    )
+    parser.add_argument(
+        "--retry-backoff",
+        dest="retry_backoff",
+        type=float,
+        required=False,
+        default=0.5,
+        help="The backoff factor in seconds between retries, doubled on every retry.",
+    )
+    parser.add_argument(
+        "--max-retry-delay",
+        dest="max_retry_delay",
+        type=float,
+        required=False,
+        default=60.0,
+        help="The maximum delay in seconds before a retry, unless the server asks for longer with Retry-After.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=float,
+        required=False,
+        help="The maximum number of requests per second to each backend endpoint, per workspace.",
+    )
+    parser.add_argument(
+        "--endpoint-rate-limit",
+        dest="endpoint_rate_limit",
+        type=str,
+        action="append",
+        required=False,
+        help=(
+            "Override --rate-limit for one endpoint, e.g. create_meeting=2. Can be repeated. "
+            "Endpoints: create_meeting, upload_audio_url, analyze_audio, get_job."
+        ),
+    )
+    parser.add_argument(
+        "--rate-burst",
+        dest="rate_burst",
+        type=float,
+        required=False,
+        default=1.0,
+        help="The number of requests that may be sent at once before --rate-limit applies.",
+    )
+    parser.add_argument(
+        "--state-db",
+        dest="state_db",
+        type=str,
+        required=False,
+        help=(
+            "Record the progress of every file in this SQLite file, keyed by a hash of the audio content. "
+            "A re-run skips the files that were imported and resumes the ones that were interrupted."
+        ),
+    )
+    parser.add_argument(
+        "--wait",
+        dest="wait",
+        action="store_true",
+        help="Wait for the analysis jobs to finish and write their results to --output-dir.",
+    )
+    parser.add_argument(
+        "--wait-timeout",
+        dest="wait_timeout",
+        type=float,
+        required=False,
+        help="Stop waiting for the analysis jobs after this many seconds.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        dest="output_dir",
+        type=str,
+        required=False,
+        default="transcripts",
+        help="The directory the results of finished jobs are written to with --wait.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        dest="poll_interval",
+        type=float,
+        required=False,
+        default=5.0,
+        help="The initial interval in seconds between two polls of a job, doubled while its status does not change.",
+    )
+    parser.add_argument(
+        "--max-poll-interval",
+        dest="max_poll_interval",
+        type=float,
+        required=False,
+        default=60.0,
+        help="The maximum interval in seconds between two polls of a job.",
+    )
+    parser.add_argument(
+        "--max-polls-per-second",
+        dest="max_polls_per_second",
+        type=float,
+        required=False,
+        default=10.0,
+        help="The maximum number of job polls per second, shared by all jobs.",
+    )
+    parser.add_argument(
+        "--callback-port",
+        dest="callback_port",
+        type=int,
+        required=False,
+        help="Receive the analysis callbacks on this port with --wait. The workspace callback url must point to it.",
+    )
+    parser.add_argument(
+        "--callback-host",
+        dest="callback_host",
+        type=str,
+        required=False,
+        default="0.0.0.0",
+        help="The address the analysis callback receiver listens on.",
+    )
+    parser.add_argument(
+        "--callback-secret",
+        dest="callback_secret",
+        type=str,
+        required=False,
+        help="The workspace callback key, used to verify the X-Seasalt-Server-Signature header.",
+    )
+    parser.add_argument(
+        "--allow-unsigned-callbacks",
+        dest="allow_unsigned_callbacks",
+        action="store_true",
+        help="Start the callback receiver without --callback-secret, accepting callbacks from anyone who can reach it.",
+    )
+    parser.add_argument(
+        "--upload-chunk-size",
+        dest="upload_chunk_size",
+        type=int,
+        required=False,
+        default=1024 * 1024,
+        help="The size in bytes of the chunks streamed to the upload url.",
+    )
+    parser.add_argument(
+        "--upload-retries",
+        dest="upload_retries",
+        type=int,
+        required=False,
+        default=3,
+        help="Retry a failed audio upload up to this many times.",
     )
     parser.add_argument(
         "--access-token",
@@ -262,6 +1202,19 @@ if __name__ == "__main__":
         default="pcm_s8le",
         help="Set the audio encoding.",
     )
+    parser.add_argument(
+        "--transcode",
+        dest="transcode",
+        action="store_true",
+        help="Mix the wav file down to mono and resample it to --audio-sample-rate before uploading. Requires numpy.",
+    )
+    parser.add_argument(
+        "--transcode-dir",
+        dest="transcode_dir",
+        type=str,
+        required=False,
+        help="The directory for the temporary transcoded files. Defaults to the system temp directory.",
+    )
     parser.add_argument(
         "--scenario",
         dest="scenario",
@@ -335,5 +1288,10 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
+    if args.wait and args.callback_port and not args.callback_secret and not args.allow_unsigned_callbacks:
+        parser.error("--callback-port requires --callback-secret, or --allow-unsigned-callbacks")
+    _configure_logging(args)
+    if args.wav_path and not args.wav_name:
+        args.wav_name = os.path.basename(args.wav_path)
     main(args)
 
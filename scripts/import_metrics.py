@@ -0,0 +1,165 @@
+"""
+Per-stage latency and volume metrics of an import_meeting_audio.py run.
+
+Every stage (create, upload_url, upload, analyze, wait, ...) keeps a fixed-bucket histogram of its durations,
+its error count and the bytes it moved. Recording a sample is a lock and a bisect, nothing is formatted or
+logged on the hot path. The metrics are rendered once at the end of the run, as a text summary, as JSON or in
+the Prometheus text exposition format.
+"""
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Upper bounds in seconds of the histogram buckets, the last bucket is +Inf.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0,
+)
+PERCENTILES = (50, 90, 99)
+
+
+class StageMetrics:
+    def __init__(self, name: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+
+    def observe(self, seconds: float, error: bool = False, size: int = 0):
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bytes += size
+        if error:
+            self.errors += 1
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Estimate a percentile by linear interpolation inside its histogram bucket."""
+        if not self.count:
+            return None
+        rank = self.count * percentile / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max_seconds
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max_seconds)
+            seen += bucket_count
+        return self.max_seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.count if self.count else None,
+            "max_seconds": self.max_seconds,
+            **{f"p{percentile}_seconds": self.percentile(percentile) for percentile in PERCENTILES},
+            "buckets": {
+                **{str(bound): count for bound, count in zip(self.buckets, self.bucket_counts)},
+                "+Inf": self.bucket_counts[-1],
+            },
+        }
+
+
+class ImportMetrics:
+    def __init__(self):
+        self.stages: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+
+    def observe(self, stage: str, seconds: float, error: bool = False, size: int = 0):
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageMetrics(stage)
+            self.stages[stage].observe(seconds, error=error, size=size)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the block as one sample of stage, counting it as an error if it raises."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(stage, time.perf_counter() - start_time, error=True)
+            raise
+        self.observe(stage, time.perf_counter() - start_time)
+
+    def add_bytes(self, stage: str, size: int):
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageMetrics(stage)
+            self.stages[stage].bytes += size
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "elapsed_seconds": time.monotonic() - self._start_time,
+                "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "seameet_import") -> str:
+        lines: List[str] = [
+            f"# HELP {prefix}_stage_duration_seconds Duration of the import stages.",
+            f"# TYPE {prefix}_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = list(self.stages.values())
+            for stage in stages:
+                cumulative = 0
+                for bound, count in zip(list(stage.buckets) + ["+Inf"], stage.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage.name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage.name}"}} {stage.total_seconds}')
+                lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage.name}"}} {stage.count}')
+            lines += [
+                f"# HELP {prefix}_stage_errors_total Failed executions of the import stages.",
+                f"# TYPE {prefix}_stage_errors_total counter",
+            ]
+            lines += [f'{prefix}_stage_errors_total{{stage="{stage.name}"}} {stage.errors}' for stage in stages]
+            lines += [
+                f"# HELP {prefix}_stage_bytes_total Bytes transferred by the import stages.",
+                f"# TYPE {prefix}_stage_bytes_total counter",
+            ]
+            lines += [f'{prefix}_stage_bytes_total{{stage="{stage.name}"}} {stage.bytes}' for stage in stages if stage.bytes]
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        rows = [
+            f"{'stage':<12} {'count':>7} {'errors':>7} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'MiB/s':>8}"
+        ]
+        with self._lock:
+            for stage in self.stages.values():
+                if not stage.count:
+                    continue
+                values = [
+                    stage.total_seconds / stage.count,
+                    *(stage.percentile(percentile) for percentile in PERCENTILES),
+                    stage.max_seconds,
+                ]
+                throughput = (
+                    f"{stage.bytes / stage.total_seconds / 1024 / 1024:>8.2f}" if stage.bytes and stage.total_seconds else f"{'':>8}"
+                )
+                rows.append(
+                    f"{stage.name:<12} {stage.count:>7} {stage.errors:>7} "
+                    + " ".join(f"{value:>8.3f}s" for value in values)
+                    + f" {throughput}"
+                )
+        return "\n".join(rows)
+
+    def write(self, path: str):
+        """Write the metrics to path, in the Prometheus text format for *.prom files and as JSON otherwise."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
@@ -0,0 +1,130 @@
+"""
+Persistent state of import_meeting_audio.py runs, so that a re-run never imports the same audio twice.
+
+Every file is keyed by the SHA-256 of its content and the store records how far its import went:
+the meeting that was created for it, whether the audio was uploaded and whether the analysis was submitted.
+The store is a single SQLite file shared by all the worker threads of a run.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+UPLOAD_DONE = "done"
+ANALYZE_SUBMITTED = "submitted"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS imports (
+    content_hash TEXT PRIMARY KEY,
+    wav_path TEXT NOT NULL,
+    meeting_id TEXT,
+    upload_status TEXT,
+    analyze_status TEXT,
+    job_id TEXT,
+    job_status TEXT,
+    audio_format TEXT,
+    audio_sample_rate INTEGER,
+    audio_encoding TEXT,
+    updated_at TEXT NOT NULL
+)
+"""
+_COLUMNS = (
+    "content_hash",
+    "wav_path",
+    "meeting_id",
+    "upload_status",
+    "analyze_status",
+    "job_id",
+    "job_status",
+    "audio_format",
+    "audio_sample_rate",
+    "audio_encoding",
+)
+
+
+@dataclass
+class ImportRecord:
+    content_hash: str
+    wav_path: str
+    meeting_id: Optional[str] = None
+    upload_status: Optional[str] = None
+    analyze_status: Optional[str] = None
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
+    audio_format: Optional[str] = None
+    audio_sample_rate: Optional[int] = None
+    audio_encoding: Optional[str] = None
+
+    @property
+    def uploaded(self) -> bool:
+        return self.upload_status == UPLOAD_DONE
+
+    @property
+    def completed(self) -> bool:
+        """The analysis was submitted and did not fail, there is nothing left to import."""
+        return self.analyze_status == ANALYZE_SUBMITTED and self.job_status != "FAILED"
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash the file content with SHA-256, reading it in chunks into a reused buffer."""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+class ImportStateStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._hash_locks: Dict[str, threading.Lock] = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+
+    def get(self, content_hash: str) -> Optional[ImportRecord]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM imports WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return ImportRecord(*row) if row else None
+
+    def update(self, content_hash: str, wav_path: str, **fields) -> ImportRecord:
+        """Insert or update the record of content_hash with the given column values."""
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"unknown import state columns: {unknown}")
+        values = {"wav_path": wav_path, **fields, "updated_at": datetime.now(timezone.utc).isoformat()}
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in values)
+        with self._lock:
+            self._connection.execute(
+                f"INSERT INTO imports (content_hash, {', '.join(values)}) VALUES (?{', ?' * len(values)}) "
+                f"ON CONFLICT(content_hash) DO UPDATE SET {assignments}",
+                (content_hash, *values.values()),
+            )
+        return self.get(content_hash)
+
+    def update_job_status(self, job_id: str, job_status: str):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE imports SET job_status = ?, updated_at = ? WHERE job_id = ?",
+                (job_status, datetime.now(timezone.utc).isoformat(), job_id),
+            )
+
+    def lock(self, content_hash: str) -> threading.Lock:
+        """A lock per content hash, so two copies of the same audio in one run are imported only once."""
+        with self._lock:
+            return self._hash_locks.setdefault(content_hash, threading.Lock())
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,703 @@
+"""
+Export the conversations of a SeaX channel and ingest them into partitioned Parquet files.
+
+The export (see content/en/SeaX/export_conversations.md) is triggered, its job is polled until it finishes and the
+ZIP of per-conversation CSV files is downloaded. The CSV files are never unzipped to disk: the members of the ZIP are
+decompressed and parsed in memory by --workers processes, a group of at most --chunk-mib MiB of CSV at a time, and
+the rows are appended to one Parquet file per channel and month:
+
+    <output>/channel=<channel_id>/month=<YYYY-MM>/<export>.parquet
+
+A ZIP ingested with --zip and no --channel-id is partitioned by the channel name in its CSV file names instead.
+Messages without a valid message_time go to month=unknown.
+
+Memory use does not depend on the size of the export: at most two groups per worker are in flight, and every
+partition buffers at most --row-group-rows rows before they are written out as a row group. The download itself is
+streamed to a temporary file, the central directory of a ZIP is at its end so it cannot be read from a socket.
+
+The output is a hive-partitioned dataset, e.g. `pyarrow.dataset.dataset(output, partitioning="hive")` or
+`pandas.read_parquet(output)`. Ingesting the same export again replaces its files, two exports with overlapping
+dates both keep their copy of the shared messages, deduplicate on message_id when reading them.
+
+Prerequisites:
+- Python 3.8+
+- pip install pyarrow requests
+
+Example usage:
+    python ingest_conversation_export.py --api-key xxx --workspace-id ws --channel-id a1b2c3d4-... \\
+        --start-date 2026-02-01 --end-date 2026-02-28 --output conversations/
+    python ingest_conversation_export.py --api-key xxx --workspace-id ws --export-job-id 79f13adf-... --output conversations/
+    python ingest_conversation_export.py --zip SMS_Support_2026-06_1c4639da.zip --channel-id b2c3d4e5-... --output conversations/
+"""
+
+import argparse
+import codecs
+import io
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:  # pragma: no cover - only needed to run the export, not to ingest a ZIP
+    requests = None
+
+from import_metrics import ImportMetrics
+from rate_limit import parse_retry_after
+
+DEFAULT_BASE_URL = "https://seax.seasalt.ai/seax-api"
+FINISHED_EXPORT_STATUSES = ("finished", "failed")
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# The columns of the exported CSV files, in the order they are written to Parquet.
+CSV_COLUMNS = (
+    "message_id",
+    "conversation_id",
+    "contact_name",
+    "contact_phone",
+    "direction",
+    "speaker_type",
+    "speaker_name",
+    "message_time",
+    "message_text",
+    "media_url",
+    "status",
+    "sender_account",
+)
+SCHEMA = pa.schema(
+    [(column, pa.timestamp("us", tz="UTC") if column == "message_time" else pa.string()) for column in CSV_COLUMNS]
+)
+UNKNOWN_MONTH = "unknown"
+# <contact>--<created_at>--<channel>.csv
+_CSV_NAME = re.compile(r"^(?P<contact>.*)--(?P<created_at>\d{4}-\d\d-\d\d_\d{6})--(?P<channel>.+)\.csv$", re.IGNORECASE)
+_UTC_OFFSET = r"(Z|[+-]\d\d(:?\d\d)?)$"
+
+_zip_file: Optional[zipfile.ZipFile] = None
+
+
+@dataclass
+class IngestStats:
+    members: int = 0
+    empty: int = 0
+    invalid: int = 0
+    rows: int = 0
+    unparsed_times: int = 0
+    files: int = 0
+
+
+# -- The export API --
+def _init_http_session(max_retries: int = 3, retry_backoff: float = 0.5) -> "requests.Session":
+    """A session retrying only the connections that failed, which never reached the server."""
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=retry_backoff,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    session.mount("http://", HTTPAdapter(max_retries=retry))
+    return session
+
+
+class ExportError(Exception):
+    pass
+
+
+class ExportClient:
+    def __init__(self, base_url: str, workspace_id: str, api_key: str, request_timeout: float = 60.0):
+        self.url = f"{base_url.rstrip('/')}/api/v1/workspace/{workspace_id}/export-conversations"
+        self.session = _init_http_session()
+        self.session.headers.update({"accept": "application/json", "X-API-Key": api_key})
+        self.request_timeout = request_timeout
+
+    def trigger(self, body: dict) -> str:
+        """Enqueue the export and return its export_job_id. The POST is not retried, except on a 429."""
+        while True:
+            response = self.session.post(self.url, json=body, timeout=self.request_timeout)
+            if response.status_code != 429:
+                break
+            delay = parse_retry_after(response.headers.get("Retry-After")) or 5.0
+            logging.warning("export throttled, retrying in %.1fs", delay)
+            time.sleep(delay)
+        if response.status_code == 409:
+            detail = _detail(response)
+            candidates = detail.get("candidates") if isinstance(detail, dict) else None
+            if candidates:
+                choices = ", ".join(f"{c.get('name')} ({c.get('channel_type')}, {c.get('channel_id')})" for c in candidates)
+                raise ExportError(f"the phone number matches several channels, set --channel-type or --channel-id: {choices}")
+        if response.status_code >= 400:
+            raise ExportError(f"POST export-conversations failed with {response.status_code}: {_detail(response)}")
+        return response.json()["export_job_id"]
+
+    def status(self, export_job_id: str) -> dict:
+        response = self.session.get(f"{self.url}/{export_job_id}", timeout=self.request_timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def wait(self, export_job_id: str, poll_interval: float, max_poll_interval: float, max_wait: float) -> dict:
+        """Poll the job until it is finished or failed, backing off while its status does not change."""
+        deadline = time.monotonic() + max_wait
+        interval = poll_interval
+        last_status = None
+        while True:
+            try:
+                job = self.status(export_job_id)
+            except requests.HTTPError as e:
+                # A throttled or failing poll is tried again later, a 4xx other than 429 will not get better.
+                status_code = e.response.status_code
+                if status_code != 429 and status_code < 500:
+                    raise ExportError(f"GET export job {export_job_id} failed with {status_code}: {_detail(e.response)}")
+                logging.warning("polling export job %s failed with %d", export_job_id, status_code)
+                job = None
+            except requests.ConnectionError as e:
+                logging.warning("polling export job %s failed: %s", export_job_id, e)
+                job = None
+            if job is not None:
+                if job["status"] in FINISHED_EXPORT_STATUSES:
+                    return job
+                if job["status"] != last_status:
+                    logging.info("export job %s is %s", export_job_id, job["status"])
+                    last_status = job["status"]
+                    interval = poll_interval
+                else:
+                    interval = min(interval * 2, max_poll_interval)
+            if time.monotonic() + interval > deadline:
+                raise ExportError(f"export job {export_job_id} did not finish within {max_wait:.0f}s")
+            time.sleep(interval)
+
+    def download(self, url: str, path: str) -> int:
+        """Stream the ZIP to path, DOWNLOAD_CHUNK_SIZE bytes at a time. The presigned URL needs no API key."""
+        size = 0
+        with requests.get(url, stream=True, timeout=self.request_timeout) as response:
+            response.raise_for_status()
+            with open(path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+        return size
+
+    def close(self):
+        self.session.close()
+
+
+def _detail(response) -> object:
+    try:
+        return response.json().get("detail", response.text)
+    except ValueError:
+        return response.text
+
+
+def export_request(args: argparse.Namespace) -> dict:
+    body = {"start_date": args.start_date, "end_date": args.end_date}
+    if args.channel_id:
+        body["channel_id"] = args.channel_id
+    else:
+        body["phone_number"] = args.phone_number
+        if args.channel_type:
+            body["channel_type"] = args.channel_type
+    if args.notification_email:
+        body["notification_email"] = args.notification_email
+    return body
+
+
+# -- Parsing the CSV files, in the worker processes --
+def _init_worker(zip_path: str):
+    """Every worker opens the ZIP once and reads the members of its groups from it."""
+    global _zip_file
+    _zip_file = zipfile.ZipFile(zip_path)
+
+
+def parse_csv(data: bytes) -> pa.Table:
+    """The rows of CSV data in SCHEMA, with the month of every message in a `month` column."""
+    table = pa_csv.read_csv(
+        io.BytesIO(data),
+        read_options=pa_csv.ReadOptions(use_threads=False),
+        # message_text spans several lines whenever a message does.
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={column: pa.string() for column in CSV_COLUMNS},
+            include_columns=list(CSV_COLUMNS),
+            include_missing_columns=True,
+        ),
+    )
+    message_time = parse_message_time(table.column("message_time"))
+    month = pc.fill_null(pc.strftime(message_time, format="%Y-%m"), UNKNOWN_MONTH)
+    table = table.set_column(table.schema.get_field_index("message_time"), "message_time", message_time)
+    return table.cast(SCHEMA).append_column("month", month)
+
+
+def parse_message_time(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """The ISO 8601 message times in UTC. A time without an offset is taken as UTC, one that does not parse is null."""
+    values = pc.if_else(
+        pc.match_substring_regex(values, _UTC_OFFSET), values, pc.binary_join_element_wise(values, "Z", "")
+    )
+    try:
+        return pc.cast(values, pa.timestamp("us", tz="UTC"))
+    except pa.ArrowInvalid:
+        # Only a file with an odd timestamp pays for the value by value fallback.
+        parsed = []
+        for value in values.to_pylist():
+            try:
+                parsed.append(pc.cast(pa.scalar(value), pa.timestamp("us", tz="UTC")).as_py() if value else None)
+            except pa.ArrowInvalid:
+                parsed.append(None)
+        return pa.chunked_array([pa.array(parsed, pa.timestamp("us", tz="UTC"))])
+
+
+def parse_members(names: List[str]) -> Tuple[Optional[pa.Table], Dict[str, int], List[str]]:
+    """
+    Parse a group of members: (their rows or None, counts, errors).
+    A conversation is a few rows, so the members sharing a header are parsed as one CSV, their header lines
+    removed. Parsing them one by one costs more than the parsing itself. A group that does not parse is parsed
+    again member by member, to skip only the invalid ones.
+    """
+    counts = {"members": len(names), "empty": 0, "invalid": 0}
+    bodies: Dict[bytes, List[Tuple[str, bytes]]] = {}
+    for name in names:
+        data = _zip_file.read(name)
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        header, _, body = data.partition(b"\n")
+        if not header.strip():
+            counts["empty"] += 1
+            continue
+        if body and not body.endswith(b"\n"):
+            body += b"\n"
+        bodies.setdefault(header.rstrip(b"\r"), []).append((name, body))
+
+    tables = []
+    errors = []
+    for header, members in bodies.items():
+        if len(members) > 1:
+            try:
+                tables.append(parse_csv(header + b"\n" + b"".join(body for _, body in members)))
+                continue
+            except (pa.ArrowInvalid, UnicodeDecodeError):
+                pass
+        for name, body in members:
+            try:
+                tables.append(parse_csv(header + b"\n" + body))
+            except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+                counts["invalid"] += 1
+                errors.append(f"{name}: {e}")
+    table = pa.concat_tables(tables) if tables else None
+    return table, counts, errors
+
+
+# -- Writing the partitions --
+class PartitionWriter:
+    """One Parquet file per (channel, month), written to a temporary name and renamed once complete."""
+
+    def __init__(self, output: str, file_name: str, row_group_rows: int, compression: str):
+        self.output = output
+        self.file_name = file_name
+        self.row_group_rows = row_group_rows
+        self.compression = compression
+        self.writers: Dict[Tuple[str, str], pq.ParquetWriter] = {}
+        self.buffers: Dict[Tuple[str, str], List[pa.Table]] = {}
+        self.buffered_rows: Dict[Tuple[str, str], int] = {}
+        self.paths: Dict[Tuple[str, str], str] = {}
+
+    def write(self, channel: str, table: pa.Table) -> int:
+        """Append the rows of table to the partitions of their months and return the number of rows."""
+        months = table.column("month")
+        rows = table.drop_columns(["month"])
+        for month in pc.unique(months).to_pylist():
+            key = (channel, month)
+            partition = rows.filter(pc.equal(months, month))
+            self.buffers.setdefault(key, []).append(partition)
+            self.buffered_rows[key] = self.buffered_rows.get(key, 0) + partition.num_rows
+            if self.buffered_rows[key] >= self.row_group_rows:
+                self._flush(key)
+        return table.num_rows
+
+    def _flush(self, key: Tuple[str, str]):
+        if not self.buffered_rows.get(key):
+            return
+        writer = self.writers.get(key)
+        if writer is None:
+            channel, month = key
+            directory = os.path.join(self.output, f"channel={quote(channel, safe='')}", f"month={month}")
+            os.makedirs(directory, exist_ok=True)
+            self.paths[key] = os.path.join(directory, self.file_name)
+            writer = pq.ParquetWriter(f"{self.paths[key]}.tmp", SCHEMA, compression=self.compression)
+            self.writers[key] = writer
+        writer.write_table(pa.concat_tables(self.buffers.pop(key)), row_group_size=self.row_group_rows)
+        self.buffered_rows[key] = 0
+
+    def close(self) -> List[str]:
+        for key in list(self.buffers):
+            self._flush(key)
+        for key, writer in self.writers.items():
+            writer.close()
+            os.replace(f"{self.paths[key]}.tmp", self.paths[key])
+        return sorted(self.paths.values())
+
+    def abort(self):
+        """Drop the incomplete files, the previous files of this export (if any) are left in place."""
+        for key, writer in self.writers.items():
+            writer.close()
+            os.remove(f"{self.paths[key]}.tmp")
+
+
+def member_groups(archive: zipfile.ZipFile, group_bytes: int) -> Iterator[List[str]]:
+    """The CSV members, in groups of at most group_bytes uncompressed bytes (or a single larger member)."""
+    group, size = [], 0
+    for info in archive.infolist():
+        if info.is_dir() or not info.filename.lower().endswith(".csv"):
+            continue
+        if group and size + info.file_size > group_bytes:
+            yield group
+            group, size = [], 0
+        group.append(info.filename)
+        size += info.file_size
+    if group:
+        yield group
+
+
+def channel_of_zip(archive: zipfile.ZipFile) -> Optional[str]:
+    """The channel in the name of the first CSV member, `<contact>--<created_at>--<channel>.csv`."""
+    for name in archive.namelist():
+        match = _CSV_NAME.match(os.path.basename(name))
+        if match:
+            return match.group("channel")
+    return None
+
+
+def ingest_zip(
+    args: argparse.Namespace, zip_path: str, channel: Optional[str], metrics: ImportMetrics
+) -> Tuple[IngestStats, List[str]]:
+    stats = IngestStats()
+    with zipfile.ZipFile(zip_path) as archive:
+        channel = channel or channel_of_zip(archive) or "unknown"
+        groups = member_groups(archive, int(args.chunk_mib * 1024 * 1024))
+        file_name = f"{args.export_name or os.path.splitext(os.path.basename(zip_path))[0]}.parquet"
+        writer = PartitionWriter(args.output, file_name, args.row_group_rows, args.compression)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=args.workers, initializer=_init_worker, initargs=(zip_path,)
+            ) as executor:
+                in_flight = deque()
+                for group in groups:
+                    in_flight.append((time.monotonic(), executor.submit(parse_members, group)))
+                    # Bounded look-ahead: the results are written in order and at most two groups per worker wait.
+                    if len(in_flight) >= 2 * args.workers:
+                        _write_result(in_flight.popleft(), channel, writer, stats, metrics)
+                while in_flight:
+                    _write_result(in_flight.popleft(), channel, writer, stats, metrics)
+            with metrics.time("write"):
+                files = writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+    stats.files = len(files)
+    return stats, files
+
+
+def _write_result(submitted, channel: str, writer: PartitionWriter, stats: IngestStats, metrics: ImportMetrics):
+    submit_time, future = submitted
+    table, counts, errors = future.result()
+    metrics.observe("parse", time.monotonic() - submit_time, error=bool(errors))
+    stats.members += counts["members"]
+    stats.empty += counts["empty"]
+    stats.invalid += counts["invalid"]
+    for error in errors:
+        logging.warning("skipped %s", error)
+    if table is None:
+        return
+    stats.unparsed_times += table.column("message_time").null_count
+    with metrics.time("write"):
+        stats.rows += writer.write(channel, table)
+
+
+# -- Main --
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--api-key",
+        dest="api_key",
+        type=str,
+        required=False,
+        default=os.environ.get("SEAX_API_KEY"),
+        help="Set the SeaX API key, SEAX_API_KEY by default.",
+    )
+    parser.add_argument(
+        "--workspace-id",
+        dest="workspace_id",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the workspace ID.",
+    )
+    parser.add_argument(
+        "--base-url",
+        dest="base_url",
+        type=str,
+        required=False,
+        default=DEFAULT_BASE_URL,
+        help="Set the SeaX API base URL, e.g. https://seax-dev.seasalt.ai/seax-api.",
+    )
+    parser.add_argument(
+        "--channel-id",
+        dest="channel_id",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the channel/phone UUID to export, it also names the channel partition.",
+    )
+    parser.add_argument(
+        "--phone-number",
+        dest="phone_number",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the E.164 phone number of the channel to export, instead of --channel-id.",
+    )
+    parser.add_argument(
+        "--channel-type",
+        dest="channel_type",
+        type=str,
+        choices=("sms", "whatsapp", "messenger", "instagram", "line"),
+        required=False,
+        default=None,
+        help="Set the type of the channel when --phone-number is shared by several channels.",
+    )
+    parser.add_argument(
+        "--start-date",
+        dest="start_date",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the first day of the export, YYYY-MM-DD.",
+    )
+    parser.add_argument(
+        "--end-date",
+        dest="end_date",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the last day of the export, YYYY-MM-DD.",
+    )
+    parser.add_argument(
+        "--notification-email",
+        dest="notification_email",
+        type=str,
+        required=False,
+        default=None,
+        help="Set an email address the download link is also sent to.",
+    )
+    parser.add_argument(
+        "--export-job-id",
+        dest="export_job_id",
+        type=str,
+        required=False,
+        default=None,
+        help="Set an export job already triggered, to wait for and ingest instead of triggering one.",
+    )
+    parser.add_argument(
+        "--zip",
+        dest="zip",
+        type=str,
+        required=False,
+        default=None,
+        help="Set an export ZIP already downloaded, to ingest without calling the API.",
+    )
+    parser.add_argument(
+        "--output",
+        dest="output",
+        type=str,
+        required=True,
+        help="Set the directory of the partitioned Parquet dataset.",
+    )
+    parser.add_argument(
+        "--export-name",
+        dest="export_name",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the name of the Parquet file written in every partition, the name of the ZIP by default.",
+    )
+    parser.add_argument(
+        "--work-dir",
+        dest="work_dir",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the directory the ZIP is downloaded to, the system temporary directory by default.",
+    )
+    parser.add_argument(
+        "--keep-zip",
+        dest="keep_zip",
+        action="store_true",
+        help="Keep the downloaded ZIP in --work-dir after the ingestion.",
+    )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        required=False,
+        default=os.cpu_count() or 1,
+        help="Set the number of processes parsing the CSV files.",
+    )
+    parser.add_argument(
+        "--chunk-mib",
+        dest="chunk_mib",
+        type=float,
+        required=False,
+        default=8.0,
+        help="Set the MiB of uncompressed CSV parsed by a worker at a time.",
+    )
+    parser.add_argument(
+        "--row-group-rows",
+        dest="row_group_rows",
+        type=int,
+        required=False,
+        default=128 * 1024,
+        help="Set the number of rows of a Parquet row group, the most a partition buffers in memory.",
+    )
+    parser.add_argument(
+        "--compression",
+        dest="compression",
+        type=str,
+        choices=("zstd", "snappy", "gzip", "none"),
+        required=False,
+        default="zstd",
+        help="Set the compression of the Parquet files.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        dest="poll_interval",
+        type=float,
+        required=False,
+        default=5.0,
+        help="Set the initial interval in seconds between two polls of the export job, doubled while it does not change.",
+    )
+    parser.add_argument(
+        "--max-poll-interval",
+        dest="max_poll_interval",
+        type=float,
+        required=False,
+        default=60.0,
+        help="Set the maximum interval in seconds between two polls of the export job.",
+    )
+    parser.add_argument(
+        "--max-wait",
+        dest="max_wait",
+        type=float,
+        required=False,
+        default=3600.0,
+        help="Set the maximum time in seconds to wait for the export job.",
+    )
+    parser.add_argument(
+        "--log-level",
+        dest="log_level",
+        type=str,
+        required=False,
+        default="INFO",
+        help="Set the log level, e.g. DEBUG.",
+    )
+    return parser.parse_args(argv)
+
+
+def _validate(args: argparse.Namespace) -> Optional[str]:
+    if args.zip:
+        return None
+    if not args.api_key or not args.workspace_id:
+        return "Set --api-key (or SEAX_API_KEY) and --workspace-id, or ingest a downloaded export with --zip."
+    if args.export_job_id:
+        return None
+    if bool(args.channel_id) == bool(args.phone_number):
+        return "Set exactly one of --channel-id and --phone-number."
+    if not args.start_date or not args.end_date:
+        return "Set --start-date and --end-date."
+    return None
+
+
+def fetch_export(args: argparse.Namespace, metrics: ImportMetrics, work_dir: str) -> Tuple[str, Optional[str]]:
+    """Trigger or resume the export, wait for it and download its ZIP: (path of the ZIP, channel_id)."""
+    client = ExportClient(args.base_url, args.workspace_id, args.api_key)
+    try:
+        export_job_id = args.export_job_id
+        if not export_job_id:
+            export_job_id = client.trigger(export_request(args))
+            logging.info("triggered export job %s", export_job_id)
+        with metrics.time("wait"):
+            job = client.wait(export_job_id, args.poll_interval, args.max_poll_interval, args.max_wait)
+        if job["status"] == "failed":
+            raise ExportError(f"export job {export_job_id} failed: {job.get('error_message')}")
+        zip_name = os.path.basename(job["presigned_url"].split("?", 1)[0]) or f"{export_job_id}.zip"
+        zip_path = os.path.join(work_dir, zip_name)
+        download_start = time.monotonic()
+        size = client.download(job["presigned_url"], zip_path)
+        metrics.observe("download", time.monotonic() - download_start, size=size)
+        logging.info("downloaded %s, %.1f MiB", zip_name, size / 1024 / 1024)
+        return zip_path, job.get("channel_id") or args.channel_id
+    finally:
+        client.close()
+
+
+def main(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)-8s %(message)s", stream=sys.stdout)
+    error = _validate(args)
+    if error:
+        print(error, file=sys.stderr)
+        return 2
+    if args.compression == "none":
+        args.compression = None
+    metrics = ImportMetrics()
+    start_time = time.monotonic()
+
+    work_dir = downloaded_zip = None
+    try:
+        if args.zip:
+            zip_path, channel = args.zip, args.channel_id
+        else:
+            work_dir = args.work_dir or tempfile.mkdtemp(prefix="conversation_export_")
+            os.makedirs(work_dir, exist_ok=True)
+            downloaded_zip, channel = fetch_export(args, metrics, work_dir)
+            zip_path = downloaded_zip
+        stats, files = ingest_zip(args, zip_path, channel, metrics)
+    except ExportError as e:
+        logging.error("%s", e)
+        return 1
+    finally:
+        if work_dir and not args.keep_zip:
+            if not args.work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            elif downloaded_zip and os.path.exists(downloaded_zip):
+                os.remove(downloaded_zip)
+
+    print(
+        f"{stats.members} conversations, {stats.rows} messages in {stats.files} files"
+        f" ({stats.empty} empty, {stats.invalid} invalid, {stats.unparsed_times} messages without a valid time)"
+        f" in {time.monotonic() - start_time:.1f}s"
+    )
+    for path in files:
+        print(f"  {path}")
+    print(metrics.summary())
+    return 0 if stats.invalid == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
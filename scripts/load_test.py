@@ -0,0 +1,334 @@
+"""
+Replay a JSONL request log against a server at a target rate, and report the latency percentiles and throughput.
+
+The requests are sent open loop: request i is due at start + i / --rps whatever the previous responses took, and
+its latency is measured from that due time. A server that slows down therefore shows up in the percentiles instead
+of silently lowering the request rate. --concurrency caps the requests in flight, a request waiting for a slot
+is still timed from its due time. With --rps 0 the log is replayed at its recorded pace, sped up by --speed.
+
+The log has one request per line, mock_server.py --record writes it:
+    {"name": "create_meeting", "method": "POST", "path": "/seameet-api/api/v1/workspaces/ws/meetings", "json": {...}}
+- path is appended to --base-url, or url gives an absolute URL instead.
+- query and headers are optional objects, json the request body.
+- body_bytes sends that many bytes instead, e.g. for an upload.
+- t is the recorded time of the request in seconds, used by --rps 0.
+- name groups the requests in the report, "METHOD path" by default.
+The log is replayed from the start again until --duration or --requests is reached.
+
+Prerequisites:
+- pip install aiohttp
+
+Example usage:
+    python mock_server.py --record requests.log.jsonl
+    python import_meeting_audio.py --seameet-url-base http://127.0.0.1:8090/seameet-api ...
+    python mock_server.py --latency-ms 30 --error-rate 0.01 --endpoint-rate-limit analyze_audio=50
+    python load_test.py --log requests.log.jsonl --rps 200 --duration 60 --access-token x --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+
+from import_metrics import StageMetrics
+
+# From 0.5ms to about 2 minutes, 25% apart, so the interpolated percentiles stay within a few percent.
+LATENCY_BUCKETS = tuple(round(0.0005 * 1.25**index, 6) for index in range(57))
+REPORT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+@lru_cache(maxsize=16)
+def _payload(size: int) -> bytes:
+    """The body of a body_bytes request, shared by every request of that size."""
+    return bytes(size)
+
+
+def read_log(path: str) -> List[dict]:
+    requests_log = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "method" not in entry or not ("path" in entry or "url" in entry):
+                raise ValueError(f"{path}:{line_number}: a request needs a method and a path or url")
+            entry.setdefault("name", f"{entry['method']} {entry.get('path') or entry['url']}")
+            requests_log.append(entry)
+    if not requests_log:
+        raise ValueError(f"{path} has no requests")
+    return requests_log
+
+
+def schedule(requests_log: List[dict], rps: float, speed: float) -> Iterator[Tuple[float, dict]]:
+    """(due time relative to the start, request), endlessly looping over the log."""
+    if rps:
+        index = 0
+        while True:
+            yield index / rps, requests_log[index % len(requests_log)]
+            index += 1
+    first = requests_log[0].get("t", 0.0)
+    # A loop of the log lasts as long as the recording, plus one average gap between two requests.
+    span = requests_log[-1].get("t", 0.0) - first
+    period = span + span / max(len(requests_log) - 1, 1)
+    loop = 0
+    while True:
+        for entry in requests_log:
+            yield (loop * period + entry.get("t", first) - first) / speed, entry
+        loop += 1
+
+
+class LoadReport:
+    def __init__(self):
+        self.by_name: Dict[str, StageMetrics] = {}
+        self.total = StageMetrics("all", buckets=LATENCY_BUCKETS)
+        self.dispatch_lag = StageMetrics("dispatch_lag", buckets=LATENCY_BUCKETS)
+        self.statuses: Dict[str, Counter] = {}
+        self.start_time = time.monotonic()
+        self.end_time: Optional[float] = None
+
+    def observe(self, name: str, seconds: float, status: str, size: int):
+        error = not status.startswith("2")
+        if name not in self.by_name:
+            self.by_name[name] = StageMetrics(name, buckets=LATENCY_BUCKETS)
+            self.statuses[name] = Counter()
+        self.by_name[name].observe(seconds, error=error, size=size)
+        self.total.observe(seconds, error=error, size=size)
+        self.statuses[name][status] += 1
+
+    @property
+    def elapsed(self) -> float:
+        return (self.end_time or time.monotonic()) - self.start_time
+
+    def _stage(self, stage: StageMetrics) -> dict:
+        return {
+            "count": stage.count,
+            "errors": stage.errors,
+            "requests_per_second": stage.count / self.elapsed if self.elapsed else None,
+            "mean_seconds": stage.total_seconds / stage.count if stage.count else None,
+            "max_seconds": stage.max_seconds,
+            **{f"p{percentile}_seconds": stage.percentile(percentile) for percentile in REPORT_PERCENTILES},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "elapsed_seconds": self.elapsed,
+            "total": self._stage(self.total),
+            "dispatch_lag": self._stage(self.dispatch_lag),
+            "requests": {
+                name: dict(self._stage(stage), statuses=dict(self.statuses[name])) for name, stage in self.by_name.items()
+            },
+        }
+
+    def summary(self) -> str:
+        percentiles = "".join(f" {'p' + str(percentile):>9}" for percentile in REPORT_PERCENTILES)
+        rows = [f"{'request':<28} {'count':>7} {'errors':>7} {'req/s':>8} {'mean':>9}{percentiles} {'max':>9}"]
+        for stage in [*self.by_name.values(), self.total]:
+            if not stage.count:
+                continue
+            values = [
+                stage.total_seconds / stage.count,
+                *(stage.percentile(percentile) for percentile in REPORT_PERCENTILES),
+                stage.max_seconds,
+            ]
+            rows.append(
+                f"{stage.name[:28]:<28} {stage.count:>7} {stage.errors:>7} {stage.count / self.elapsed:>8.1f} "
+                + " ".join(f"{value * 1000:>7.1f}ms" for value in values)
+            )
+        statuses = Counter()
+        for counter in self.statuses.values():
+            statuses.update(counter)
+        rows.append(f"statuses: {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))}")
+        lag = self.dispatch_lag.percentile(99)
+        if lag is not None and lag > 0.05:
+            rows.append(
+                f"p99 dispatch lag {lag * 1000:.0f}ms: requests waited for --concurrency or for the generator itself,"
+                " the target rate was not reached."
+            )
+        return "\n".join(rows)
+
+
+async def run(args: argparse.Namespace, requests_log: List[dict]) -> LoadReport:
+    report = LoadReport()
+    headers = {"accept": "application/json"}
+    if args.api_key:
+        headers["X-API-Key"] = args.api_key
+    if args.access_token:
+        headers["Authorization"] = f"Bearer {args.access_token}"
+    for header in args.header or []:
+        name, _, value = header.partition(":")
+        headers[name.strip()] = value.strip()
+    base_url = args.base_url.rstrip("/")
+    slots = asyncio.Semaphore(args.concurrency)
+    tasks = set()
+
+    async def send(session: aiohttp.ClientSession, entry: dict, due: float):
+        if due >= warmup_end:
+            report.dispatch_lag.observe(max(0.0, time.monotonic() - due))
+        kwargs = {"params": entry.get("query"), "headers": dict(headers, **entry.get("headers", {}))}
+        if "json" in entry:
+            kwargs["json"] = entry["json"]
+        elif entry.get("body_bytes"):
+            kwargs["data"] = _payload(entry["body_bytes"])
+        size = 0
+        try:
+            async with session.request(entry["method"], entry.get("url") or base_url + entry["path"], **kwargs) as response:
+                size = len(await response.read())
+                status = str(response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = e.__class__.__name__
+        finally:
+            slots.release()
+        if due >= warmup_end:
+            report.observe(entry["name"], time.monotonic() - due, status, size)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency, limit_per_host=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=args.timeout)) as session:
+        start = time.monotonic()
+        warmup_end = start + args.warmup
+        for count, (offset, entry) in enumerate(schedule(requests_log, args.rps, args.speed)):
+            if (args.requests and count >= args.requests) or (args.duration and offset >= args.duration + args.warmup):
+                break
+            due = start + offset
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await slots.acquire()
+            task = asyncio.create_task(send(session, entry, due))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        report.start_time = warmup_end
+        await asyncio.gather(*tasks)
+    report.end_time = time.monotonic()
+    return report
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--log",
+        dest="log",
+        type=str,
+        required=True,
+        help="Set the JSONL request log to replay.",
+    )
+    parser.add_argument(
+        "--base-url",
+        dest="base_url",
+        type=str,
+        required=False,
+        default="http://127.0.0.1:8090",
+        help="Set the URL the paths of the log are appended to.",
+    )
+    parser.add_argument(
+        "--rps",
+        dest="rps",
+        type=float,
+        required=False,
+        default=50.0,
+        help="Set the target requests per second, 0 to replay the log at its recorded pace.",
+    )
+    parser.add_argument(
+        "--speed",
+        dest="speed",
+        type=float,
+        required=False,
+        default=1.0,
+        help="Set how many times faster than recorded the log is replayed with --rps 0.",
+    )
+    parser.add_argument(
+        "--duration",
+        dest="duration",
+        type=float,
+        required=False,
+        default=30.0,
+        help="Set the duration of the test in seconds after the warmup, 0 to stop after --requests.",
+    )
+    parser.add_argument(
+        "--requests",
+        dest="requests",
+        type=int,
+        required=False,
+        default=0,
+        help="Set the maximum number of requests to send, 0 for no limit.",
+    )
+    parser.add_argument(
+        "--warmup",
+        dest="warmup",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the seconds at the start of the test left out of the report.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        type=int,
+        required=False,
+        default=256,
+        help="Set the maximum number of requests in flight.",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        required=False,
+        default=30.0,
+        help="Set the timeout of a request in seconds.",
+    )
+    parser.add_argument(
+        "--api-key",
+        dest="api_key",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the X-API-Key header of every request.",
+    )
+    parser.add_argument(
+        "--access-token",
+        dest="access_token",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the bearer token of every request.",
+    )
+    parser.add_argument(
+        "--header",
+        dest="header",
+        type=str,
+        action="append",
+        required=False,
+        default=None,
+        help="Set a header of every request, e.g. 'X-Request-Source: load-test'. Can be repeated.",
+    )
+    parser.add_argument(
+        "--output",
+        dest="output",
+        type=str,
+        required=False,
+        default=None,
+        help="Set a file to write the report to as JSON.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(args: argparse.Namespace) -> int:
+    if not args.duration and not args.requests:
+        print("Set --duration or --requests.", file=sys.stderr)
+        return 2
+    requests_log = read_log(args.log)
+    report = asyncio.run(run(args, requests_log))
+    print(report.summary())
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=2)
+    return 0 if report.total.count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
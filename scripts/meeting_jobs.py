@@ -0,0 +1,259 @@
+"""
+Tracks the SeaMeet analysis jobs started by import_meeting_audio.py until they finish.
+
+- JobTracker polls the "Get Job by ID" endpoint for any number of jobs from a single scheduler thread.
+  Every job backs off exponentially while its status does not change, and all jobs share one
+  request budget, so thousands of outstanding jobs cost a bounded number of polls per second.
+- CallbackReceiver is a small HTTP server implementing the "Callback for Call Analysis" POST.
+  Results delivered to it complete the matching job without waiting for the next poll.
+
+See content/en/SeaMeet/audio-upload.md for both APIs.
+"""
+
+import hashlib
+import heapq
+import hmac
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+FINISHED_JOB_STATUSES = ("FINISHED", "FAILED")
+CALLBACK_EVENT_NAME = "dashboard_analysis_finished"
+# The callback carries one transcript, anything much larger is not a callback.
+MAX_CALLBACK_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class TrackedJob:
+    job_id: str
+    meeting_id: str
+    status: str = "QUEUED"
+    interval: float = 0.0
+    job: Optional[dict] = None
+    callback_payload: Optional[dict] = None
+    error_message: Optional[str] = None
+    added_at: float = field(default_factory=time.monotonic)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+
+class JobTracker:
+    """
+    Wait for many analysis jobs at once.
+
+    fetch_job(job_id) returns the job document of the "Get Job by ID" endpoint,
+    on_done(job) is called once per job when it reaches FINISHED or FAILED.
+    """
+
+    def __init__(
+        self,
+        fetch_job: Callable[[str], dict],
+        on_done: Optional[Callable[[TrackedJob], None]] = None,
+        initial_interval: float = 5.0,
+        max_interval: float = 60.0,
+        max_polls_per_second: float = 10.0,
+        poll_concurrency: int = 4,
+    ):
+        self.fetch_job = fetch_job
+        self.on_done = on_done
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.min_poll_spacing = 1.0 / max_polls_per_second
+        self._executor = ThreadPoolExecutor(max_workers=poll_concurrency)
+        self._jobs: Dict[str, TrackedJob] = {}
+        self._jobs_by_meeting: Dict[str, TrackedJob] = {}
+        self._schedule: List[tuple] = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._throttle_until = 0.0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="job-tracker", daemon=True)
+        self._thread.start()
+
+    def add(self, job_id: str, meeting_id: str) -> TrackedJob:
+        """Start tracking a job. Adding a job that is already tracked returns the tracked one."""
+        with self._condition:
+            if job_id in self._jobs:
+                return self._jobs[job_id]
+            job = TrackedJob(job_id=job_id, meeting_id=meeting_id, interval=self.initial_interval)
+            self._jobs[job_id] = job
+            self._jobs_by_meeting[meeting_id] = job
+            self._pending += 1
+            self._schedule_poll(job, time.monotonic() + job.interval)
+        return job
+
+    def complete_from_callback(self, meeting_id: str, payload: dict) -> bool:
+        """Finish the job of meeting_id with the result of an analysis callback. Returns False if it is not tracked."""
+        with self._condition:
+            job = self._jobs_by_meeting.get(meeting_id)
+        if job is None:
+            return False
+        job.callback_payload = payload
+        self._finish(job, "FINISHED")
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> List[TrackedJob]:
+        """Block until every tracked job is done or the timeout expires, and return all tracked jobs."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return list(self._jobs.values())
+
+    def close(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _schedule_poll(self, job: TrackedJob, due_time: float):
+        self._sequence += 1
+        heapq.heappush(self._schedule, (due_time, self._sequence, job.job_id))
+        self._condition.notify_all()
+
+    def _run(self):
+        next_poll_time = 0.0
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    now = time.monotonic()
+                    wake_time = max(next_poll_time, self._throttle_until)
+                    if self._schedule and self._schedule[0][0] <= now and wake_time <= now:
+                        break
+                    due_time = self._schedule[0][0] if self._schedule else now + self.max_interval
+                    self._condition.wait(max(due_time, wake_time) - now)
+                if self._stopped:
+                    return
+                _, _, job_id = heapq.heappop(self._schedule)
+                job = self._jobs[job_id]
+                if job.done.is_set():
+                    continue
+            next_poll_time = time.monotonic() + self.min_poll_spacing
+            self._executor.submit(self._poll, job)
+
+    def _poll(self, job: TrackedJob):
+        try:
+            job.job = self.fetch_job(job.job_id)
+        except Exception as e:
+            status_code = getattr(getattr(e, "response", None), "status_code", None)
+            if status_code == 429 or (status_code or 0) >= 500:
+                # Every job shares the same budget, so the whole tracker backs off when the server is busy.
+                with self._condition:
+                    self._throttle_until = time.monotonic() + job.interval
+            logging.warning(f"failed to poll job {job.job_id}: {e.__class__.__name__} {e}")
+            self._reschedule(job, backoff=True)
+            return
+
+        status = job.job.get("status", job.status)
+        if status in FINISHED_JOB_STATUSES:
+            job.error_message = job.job.get("error_message")
+            self._finish(job, status)
+            return
+        with self._condition:
+            # Poll again soon after the job starts running, back off while it is waiting in a queue.
+            backoff = status == job.status
+            job.status = status
+        self._reschedule(job, backoff=backoff)
+
+    def _reschedule(self, job: TrackedJob, backoff: bool):
+        job.interval = min(job.interval * 2, self.max_interval) if backoff else self.initial_interval
+        with self._condition:
+            if not job.done.is_set():
+                self._schedule_poll(job, time.monotonic() + job.interval)
+
+    def _finish(self, job: TrackedJob, status: str):
+        with self._condition:
+            if job.done.is_set():
+                return
+            job.status = status
+            job.done.set()
+        logging.info(f"job {job.job_id} of meeting {job.meeting_id} {status}")
+        if self.on_done:
+            try:
+                self.on_done(job)
+            except Exception as e:
+                logging.warning(f"failed to handle finished job {job.job_id}: {e.__class__.__name__} {e}")
+        with self._condition:
+            self._pending -= 1
+            self._condition.notify_all()
+
+
+class CallbackReceiver:
+    """
+    Receive the "Callback for Call Analysis" POSTs on host:port and hand them to the tracker.
+    If secret is set, requests without a valid X-Seasalt-Server-Signature are rejected. Without it any client that
+    can reach host:port can complete a tracked job with any transcript.
+    """
+
+    def __init__(self, tracker: JobTracker, host: str = "0.0.0.0", port: int = 8080, secret: Optional[str] = None):
+        self.tracker = tracker
+        self.secret = secret
+        if not secret:
+            logging.warning(f"the callback receiver on {host}:{port} has no secret, callbacks are not verified")
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="callback-receiver", daemon=True)
+
+    def start(self) -> "CallbackReceiver":
+        self._thread.start()
+        logging.info(f"listening for analysis callbacks on {self.server.server_address}")
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def verify_signature(self, body: bytes, signature: Optional[str]) -> bool:
+        if not self.secret:
+            return True
+        expected = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature or "")
+
+    def _handler_class(self):
+        receiver = self
+
+        class _CallbackHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                try:
+                    content_length = int(self.headers["Content-Length"])
+                except (KeyError, TypeError, ValueError):
+                    self._reply(411)
+                    return
+                if content_length < 0 or content_length > MAX_CALLBACK_BYTES:
+                    self._reply(413)
+                    return
+                body = self.rfile.read(content_length)
+                if not receiver.verify_signature(body, self.headers.get("X-Seasalt-Server-Signature")):
+                    self._reply(401)
+                    return
+                try:
+                    callback = json.loads(body)
+                except ValueError:
+                    self._reply(400)
+                    return
+                event_name = callback.get("event_name", callback.get("event"))
+                if event_name == CALLBACK_EVENT_NAME:
+                    payload = callback.get("payload") or {}
+                    meeting_id = callback.get("meeting_id") or payload.get("meeting_id")
+                    if not receiver.tracker.complete_from_callback(meeting_id, payload):
+                        logging.debug(f"ignored callback for untracked meeting {meeting_id}")
+                self._reply(200)
+
+            def _reply(self, status_code: int):
+                self.send_response(status_code)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logging.debug(f"callback receiver: {format % args}")
+
+        return _CallbackHandler
@@ -0,0 +1,744 @@
+"""
+A local stand-in for the SeaMeet, SeaX and SeaNotify endpoints used by the scripts of this directory, to run and
+benchmark them without touching production.
+
+It implements, in memory:
+- SeaMeet (content/en/SeaMeet/audio-upload.md): create and delete meeting, upload_audio_url, the presigned PUT the
+  audio is uploaded to, analyze_audio and Get Job by ID. A job goes QUEUED -> STARTED -> FINISHED (or FAILED)
+  over --job-seconds, and with --callback-url the signed "Callback for Call Analysis" is POSTed when it finishes.
+- SeaX: general_campaigns/wabp, as sent by send_wabp_campaign.py.
+- SeaNotify: the webhook subscription endpoints.
+- Analytics: generate_metric_report, with made up but stable per-day counts, so that the report of a range is the
+  sum of the reports of its days (as analytics_cache.py expects).
+
+Every API response can be delayed (--latency-ms, --latency-jitter-ms), replaced by a 500 (--error-rate) or by a 429
+with a Retry-After (--throttle-rate). --rate-limit and --endpoint-rate-limit answer 429 above a sustained rate per
+workspace and endpoint, like the real servers. The uploads are counted and discarded, --upload-kib-per-second
+throttles them. GET /_mock/stats returns the requests served per endpoint and status.
+
+--record writes every request to a JSONL file that load_test.py can replay at a higher rate.
+
+Prerequisites:
+- pip install aiohttp
+
+Example usage:
+    python mock_server.py --port 8090 --latency-ms 40 --error-rate 0.01 --endpoint-rate-limit analyze_audio=5
+    python import_meeting_audio.py --seameet-url-base http://127.0.0.1:8090/seameet-api --access-token x ...
+    python send_wabp_campaign.py --base-url http://127.0.0.1:8090/seax-api --api-key x ...
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from aiohttp import ClientSession, ClientTimeout, web
+
+from rate_limit import TokenBucket, parse_endpoint_rates
+
+SEAMEET_PREFIX = "/seameet-api/api/v1/workspaces/{workspace_id}"
+SEAX_PREFIX = "/seax-api/api/v1/workspace/{workspace_id}"
+SEANOTIFY_PREFIX = "/notify-api/v1/workspaces/{workspace_id}"
+CALLBACK_EVENT_NAME = "dashboard_analysis_finished"
+ANALYTICS_VOLUME_KEYS = ("inbound_voice_count", "outbound_voice_count", "inbound_non_voice_count")
+ANALYTICS_RANGE_METRICS = (
+    "communication_volume",
+    "total_usage",
+    "conversation_breakdown",
+    "activity_trend",
+    "label_usage",
+    "agent_activity",
+)
+# Not delayed, failed or throttled, they are not part of the API.
+_UNINJECTED_ROUTES = {"stats"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _error(status: int, message: str, **headers) -> web.Response:
+    return web.json_response({"detail": message}, status=status, headers=headers)
+
+
+class MockState:
+    """Everything the server knows: meetings, upload tokens, jobs, campaigns and subscriptions."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.meetings: Dict[str, dict] = {}
+        self.uploads: Dict[str, dict] = {}
+        self.jobs: Dict[str, dict] = {}
+        self.campaigns: Dict[str, dict] = {}
+        self.subscriptions: Dict[str, dict] = {}
+        self.stats: Counter = Counter()
+        self.uploaded_bytes = 0
+        self.callbacks_sent = 0
+        self.buckets: Dict[tuple, Optional[TokenBucket]] = {}
+        self.endpoint_rates = parse_endpoint_rates(args.endpoint_rate_limit)
+        self.record_file = open(args.record, "a", buffering=1, encoding="utf-8") if args.record else None
+        self.start_time = time.monotonic()
+
+    def throttled(self, workspace_id: str, endpoint: str) -> bool:
+        """True when the request exceeds the rate limit of its workspace and endpoint."""
+        key = (workspace_id, endpoint)
+        if key not in self.buckets:
+            rate = self.endpoint_rates.get(endpoint, self.args.rate_limit)
+            self.buckets[key] = TokenBucket(rate, self.args.rate_burst) if rate else None
+        bucket = self.buckets[key]
+        return bucket is not None and not bucket.try_acquire()
+
+    def record(self, request: web.Request, route: str, body: Optional[bytes], body_bytes: int):
+        if not self.record_file:
+            return
+        entry = {
+            "t": round(time.monotonic() - self.start_time, 6),
+            "name": route,
+            "method": request.method,
+            "path": request.path,
+        }
+        if request.query:
+            entry["query"] = dict(request.query)
+        if body:
+            try:
+                entry["json"] = json.loads(body)
+            except ValueError:
+                entry["body_bytes"] = body_bytes
+        elif body_bytes:
+            entry["body_bytes"] = body_bytes
+        self.record_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def job_status(self, job: dict) -> str:
+        elapsed = time.monotonic() - job["_created_at"]
+        if elapsed >= self.args.job_seconds:
+            return job["_final_status"]
+        return "STARTED" if elapsed >= self.args.job_seconds / 3 else "QUEUED"
+
+
+@web.middleware
+async def injection_middleware(request: web.Request, handler):
+    """Authentication, injected latency, errors and 429s, rate limits, stats and recording of every request."""
+    state: MockState = request.app["state"]
+    route = request.match_info.route.name
+    if route is None or route in _UNINJECTED_ROUTES:
+        # 404 and 405 of unknown paths, and the mock's own endpoints.
+        return await handler(request)
+    args = state.args
+    # The API bodies are small, reading them here caches them for the handler and for --record.
+    body = await request.read() if route != "upload_sink" and request.can_read_body else None
+    response = None
+    if route != "upload_sink" and not (request.headers.get("Authorization") or request.headers.get("X-API-Key")):
+        response = _error(401, "Not authenticated")
+    if response is None and (args.latency_ms or args.latency_jitter_ms):
+        delay = max(0.0, state.random.gauss(args.latency_ms, args.latency_jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+    if response is None:
+        roll = state.random.random()
+        # The analytics endpoint has no workspace in its path, the API key stands for it.
+        workspace_id = request.match_info.get("workspace_id") or request.headers.get("X-API-Key", "")
+        if roll < args.throttle_rate or state.throttled(workspace_id, route):
+            response = _error(429, "Too Many Requests", **{"Retry-After": str(args.retry_after)})
+        elif roll < args.throttle_rate + args.error_rate:
+            response = _error(500, "Injected failure")
+    if response is None:
+        response = await handler(request)
+    state.stats[(route, response.status)] += 1
+    state.record(request, route, body, len(body) if body else request.get("uploaded_bytes", 0))
+    return response
+
+
+# -- SeaMeet --
+async def create_meeting(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    meeting_id = f"seax_{uuid.uuid4().hex}"
+    meeting = {
+        "id": meeting_id,
+        "owner_id": "mock",
+        "name": body.get("meeting_name"),
+        "participants_number": 0,
+        "status": "INITIAL",
+        "start_time": body.get("start_time") or _now(),
+        "language": body.get("language", "en-US"),
+        "duration": 0,
+        "flag": "WAITING",
+        "channel_type": body.get("channel_type", "PHONE"),
+    }
+    state.meetings[meeting_id] = dict(meeting, workspace_id=request.match_info["workspace_id"], audio_bytes=None)
+    return web.json_response(meeting)
+
+
+def _meeting(request: web.Request) -> Optional[dict]:
+    """The meeting of the request. Unknown meetings exist unless --strict, so recorded requests can be replayed."""
+    state: MockState = request.app["state"]
+    meeting_id = request.match_info["meeting_id"]
+    if meeting_id not in state.meetings and not state.args.strict:
+        state.meetings[meeting_id] = {"id": meeting_id, "workspace_id": request.match_info["workspace_id"], "audio_bytes": 0}
+    return state.meetings.get(meeting_id)
+
+
+async def delete_meeting(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    if state.meetings.pop(request.match_info["meeting_id"], None) is None and state.args.strict:
+        return _error(404, "MeetingNotFoundError")
+    return web.Response(status=204)
+
+
+async def upload_audio_url(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    if request.can_read_body:
+        await request.read()
+    meeting = _meeting(request)
+    if meeting is None:
+        return _error(400, "MeetingNotFoundError")
+    token = uuid.uuid4().hex
+    expired_time = datetime.now(timezone.utc) + timedelta(seconds=state.args.upload_url_seconds)
+    state.uploads[token] = {"meeting_id": meeting["id"], "expires_at": time.time() + state.args.upload_url_seconds}
+    return web.json_response(
+        {
+            "upload_audio_url": f"{state.args.public_url or str(request.url.origin())}/_mock/uploads/{token}",
+            "expired_time": expired_time.replace(tzinfo=None).isoformat(timespec="seconds"),
+        }
+    )
+
+
+async def upload_sink(request: web.Request) -> web.Response:
+    """The presigned PUT: the body is read in chunks, counted and discarded."""
+    state: MockState = request.app["state"]
+    upload = state.uploads.get(request.match_info["token"])
+    if upload is None and not state.args.strict:
+        upload = {"meeting_id": None, "expires_at": float("inf")}
+    if upload is None or upload["expires_at"] < time.time():
+        await request.read()
+        return web.Response(status=403, text="AccessDenied: Request has expired")
+    size = 0
+    start_time = time.monotonic()
+    bytes_per_second = state.args.upload_kib_per_second * 1024
+    async for chunk in request.content.iter_chunked(256 * 1024):
+        size += len(chunk)
+        if bytes_per_second:
+            ahead = size / bytes_per_second - (time.monotonic() - start_time)
+            if ahead > 0:
+                await asyncio.sleep(ahead)
+    request["uploaded_bytes"] = size
+    state.uploaded_bytes += size
+    meeting = state.meetings.get(upload["meeting_id"])
+    if meeting is not None:
+        meeting["audio_bytes"] = size
+    return web.Response(status=200)
+
+
+async def analyze_audio(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    meeting = _meeting(request)
+    if meeting is None:
+        return _error(400, "MeetingNotFoundError")
+    if meeting.get("audio_bytes") is None and not body.get("use_existing_audio"):
+        return _error(400, "AudioNotFoundError")
+    job_id = str(uuid.uuid4())
+    job = {
+        "id": job_id,
+        "type": "MEETING_ANALYSIS",
+        "relations": {"meeting_id": meeting["id"], "workspace_id": request.match_info["workspace_id"]},
+        "parameters": body,
+        "status": "QUEUED",
+        "error_message": None,
+        "result": None,
+    }
+    failed = state.random.random() < state.args.job_failure_rate
+    state.jobs[job_id] = dict(job, _created_at=time.monotonic(), _final_status="FAILED" if failed else "FINISHED")
+    if state.args.callback_url and not failed:
+        asyncio.get_running_loop().call_later(state.args.job_seconds, lambda: asyncio.ensure_future(_send_callback(request.app, job_id)))
+    return web.json_response({"job": job}, status=202)
+
+
+async def get_job(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    job_id = request.match_info["job_id"]
+    job = state.jobs.get(job_id)
+    if job is None:
+        if state.args.strict:
+            return _error(404, "The requested data does not exist.")
+        job = {"id": job_id, "type": "MEETING_ANALYSIS", "relations": {}, "parameters": {}, "error_message": None, "result": None}
+        job.update(_created_at=float("-inf"), _final_status="FINISHED")
+    status = state.job_status(job)
+    document = {key: value for key, value in job.items() if not key.startswith("_")}
+    document["status"] = status
+    if status == "FAILED":
+        document["error_message"] = "Injected analysis failure"
+    return web.json_response(document)
+
+
+async def _send_callback(app: web.Application, job_id: str):
+    """POST the "Callback for Call Analysis" of a finished job, signed like the real server."""
+    state: MockState = app["state"]
+    job = state.jobs[job_id]
+    meeting_id = job["relations"]["meeting_id"]
+    body = json.dumps(
+        {
+            "event_name": CALLBACK_EVENT_NAME,
+            "workspace_id": job["relations"]["workspace_id"],
+            "meeting_id": meeting_id,
+            "payload": {
+                "meeting_id": meeting_id,
+                "customer_satisfaction_rating": "A",
+                "agent_performance_rating": "A",
+                "agent_performance_feedback": "Generated by mock_server.py.",
+                "risk_factor": None,
+                "summary": "Generated by mock_server.py.",
+                "title": job["parameters"].get("file_name") or meeting_id,
+                "transcript": [{"text": "Hello, this is a mock transcript.", "speaker": "agent"}],
+            },
+        }
+    ).encode()
+    headers = {"accept": "application/json", "Content-Type": "application/json"}
+    if state.args.callback_secret:
+        headers["X-Seasalt-Server-Signature"] = hmac.new(state.args.callback_secret.encode(), body, hashlib.sha256).hexdigest()
+    try:
+        async with app["callback_session"].post(state.args.callback_url, data=body, headers=headers) as response:
+            state.stats[("callback", response.status)] += 1
+        state.callbacks_sent += 1
+    except Exception as e:
+        state.stats[("callback", e.__class__.__name__)] += 1
+        logging.warning("failed to send the callback of job %s: %s %s", job_id, e.__class__.__name__, e)
+
+
+# -- SeaX --
+async def create_wabp_campaign(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    try:
+        body = await request.json()
+        destinations = body["highly_structured_message"]["destinations"]
+        body["highly_structured_message"]["template"]
+        body["sender_whatsapp_number"]
+    except (ValueError, KeyError, TypeError) as e:
+        return _error(422, f"Invalid campaign request: {e.__class__.__name__} {e}")
+    if not isinstance(destinations, list) or not destinations:
+        return _error(422, "highly_structured_message.destinations must be a non-empty list")
+    campaign_id = str(uuid.uuid4())
+    campaign = {
+        "id": campaign_id,
+        "name": body.get("name") or campaign_id,
+        "type": "WHATSAPP_BUSINESS_PLATFORM_MESSAGE",
+        "status": "SCHEDULED",
+        "total_count": len(destinations),
+        "created_at": _now(),
+    }
+    state.campaigns[campaign_id] = campaign
+    return web.json_response(campaign)
+
+
+# -- Analytics --
+def _daily_count(day: str, key: str, scale: int = 100) -> int:
+    """A made up but stable count of key on day, so that a range is always the sum of its days."""
+    return int.from_bytes(hashlib.sha256(f"{day}/{key}".encode()).digest()[:4], "big") % scale
+
+
+def _analytics_days(body: dict) -> list:
+    """The days of the requested range, whole days of the request timezone like the real endpoint."""
+    start = datetime.fromisoformat(body["start_date"]).date()
+    end = datetime.fromisoformat(body["end_date"]).date()
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+def _analytics_periods(days: list, time_unit: str, keys: list) -> Dict[str, Dict[str, int]]:
+    periods: Dict[str, Dict[str, int]] = {}
+    for day in days:
+        period = {"year": day[:4], "month": day[:7]}.get(time_unit, day)
+        counts = periods.setdefault(period, {})
+        for key in keys:
+            counts[key] = counts.get(key, 0) + _daily_count(day, key)
+    return periods
+
+
+def _analytics_metric(metric: str, body: dict, days: list) -> object:
+    time_unit = body.get("time_unit", "month")
+    if metric == "communication_volume":
+        return {key: sum(_daily_count(day, key) for day in days) for key in ANALYTICS_VOLUME_KEYS}
+    if metric == "total_usage":
+        return {
+            "total_voice_minutes": sum(_daily_count(day, "voice_minutes", 1000) for day in days) / 10,
+            "total_chat_responses": sum(_daily_count(day, "chat_responses") for day in days),
+        }
+    if metric == "conversation_breakdown":
+        weekdays = {}
+        for day in days:
+            weekday = datetime.fromisoformat(day).strftime("%A")
+            weekdays[weekday] = weekdays.get(weekday, 0) + _daily_count(day, "messages")
+        return {
+            "channel_summary": {
+                channel: {
+                    "user_count": len(days),
+                    "inbound_message_count": sum(_daily_count(day, f"{channel}/in") for day in days),
+                    "outbound_message_count": sum(_daily_count(day, f"{channel}/out") for day in days),
+                }
+                for channel in ("WebChat", "SMS")
+            },
+            "messages_by_day": weekdays,
+            "messages_by_hour": {str(hour): sum(_daily_count(day, f"hour/{hour}", 10) for day in days) for hour in range(24)},
+        }
+    if metric == "activity_trend":
+        keys = ["inbound", "outbound"] if body.get("message_type") == "calls" else ["CUSTOMER", "AGENT", "BOT", "SYSTEM"]
+        periods = _analytics_periods(days, time_unit, keys)
+        totals = [sum(counts.values()) for counts in periods.values()]
+        change = round((totals[-1] - totals[0]) / totals[0] * 100, 1) if len(totals) > 1 and totals[0] else 0.0
+        return {"time_unit": time_unit, "data": [dict({"period": period}, **counts) for period, counts in periods.items()], "change_percent": change}
+    if metric == "label_usage":
+        labels = body.get("labels") or ["support", "sales", "billing"]
+        periods = _analytics_periods(days, time_unit, labels)
+        return [
+            {"period": period, "labels": [{"name": name, "count": count} for name, count in counts.items()]}
+            for period, counts in periods.items()
+        ]
+    if metric == "agent_activity":
+        sessions = []
+        for agent in body.get("agents") or ["agent_user_1", "agent_user_2"]:
+            for day in days:
+                minutes = _daily_count(day, agent, 480) + 60
+                sessions.append(
+                    {
+                        "agent_id": agent,
+                        "status": "AVAILABLE",
+                        "start_time": f"{day}T08:00:00Z",
+                        "end_time": (datetime.fromisoformat(f"{day}T08:00:00") + timedelta(minutes=minutes)).isoformat() + "Z",
+                        "duration_seconds": minutes * 60,
+                    }
+                )
+        return {"agents": sessions}
+    raise ValueError(metric)
+
+
+async def generate_metric_report(request: web.Request) -> web.Response:
+    """The analytics of content/en/SeaX/analytics.md, made up from the dates. The snapshot metrics are static."""
+    body = await request.json()
+    report = {}
+    for metric in body.get("metrics") or []:
+        if metric == "conversation_overview":
+            if not body.get("range_type"):
+                return _error(400, "Range type is required for conversation overview")
+            report[metric] = {"conversations": 150, "messages": 2500, "distinct_user_count": 125, "conversations_change_percentage": 10.5}
+        elif metric == "conversation_overview_yearly":
+            if not body.get("year"):
+                return _error(400, "Year is required")
+            report[metric] = {"total_conversations": 1800, "total_messages": 15000, "average_messages_per_conversation": 8.33}
+        elif metric == "label_overview":
+            report[metric] = [{"id": "label-123", "name": "Support", "total_count": 150}]
+        elif metric in ANALYTICS_RANGE_METRICS:
+            if not body.get("start_date") or not body.get("end_date"):
+                if metric == "total_usage":
+                    body = dict(body, start_date="2024-01-01T00:00:00", end_date=_now())
+                else:
+                    return _error(400, f"Start date and end date are required for {metric.replace('_', ' ')}")
+            report[metric] = _analytics_metric(metric, body, _analytics_days(body))
+        else:
+            return _error(400, f"Unsupported metric: {metric}")
+    return web.json_response(report)
+
+
+# -- SeaNotify --
+SUBSCRIPTION_FIELDS = ("webhook_url", "event_types", "created_by", "is_enabled", "type")
+
+
+async def list_subscriptions(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    workspace_id = request.match_info["workspace_id"]
+    data = [subscription for subscription in state.subscriptions.values() if subscription["workspace_id"] == workspace_id]
+    return web.json_response({"data": data, "total": len(data)})
+
+
+async def create_subscription(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    if not body.get("webhook_url") or not body.get("event_types"):
+        return _error(422, "webhook_url and event_types are required")
+    subscription_id = str(uuid.uuid4())
+    subscription = {
+        "id": subscription_id,
+        "workspace_id": request.match_info["workspace_id"],
+        "webhook_url": body["webhook_url"],
+        "event_types": body["event_types"],
+        "created_by": body.get("created_by"),
+        "is_enabled": body.get("is_enabled", True),
+        "type": body.get("type", "SEASALT"),
+        "created_at": _now(),
+    }
+    state.subscriptions[subscription_id] = subscription
+    return web.json_response(subscription)
+
+
+def _subscription(request: web.Request) -> Optional[dict]:
+    state: MockState = request.app["state"]
+    subscription = state.subscriptions.get(request.match_info["subscription_id"])
+    if subscription is None or subscription["workspace_id"] != request.match_info["workspace_id"]:
+        return None
+    return subscription
+
+
+async def get_subscription(request: web.Request) -> web.Response:
+    subscription = _subscription(request)
+    return web.json_response(subscription) if subscription else _error(404, "Subscription not found")
+
+
+async def update_subscription(request: web.Request) -> web.Response:
+    body = await request.json()
+    subscription = _subscription(request)
+    if subscription is None:
+        return _error(404, "Subscription not found")
+    subscription.update({key: value for key, value in body.items() if key in SUBSCRIPTION_FIELDS})
+    return web.json_response(subscription)
+
+
+async def delete_subscription(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    if _subscription(request) is None:
+        return _error(404, "Subscription not found")
+    del state.subscriptions[request.match_info["subscription_id"]]
+    return web.Response(status=204)
+
+
+async def stats(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    requests_by_route: Dict[str, Dict[str, int]] = {}
+    for (route, status), count in state.stats.items():
+        requests_by_route.setdefault(route, {})[str(status)] = count
+    return web.json_response(
+        {
+            "uptime_seconds": time.monotonic() - state.start_time,
+            "requests": requests_by_route,
+            "meetings": len(state.meetings),
+            "jobs": len(state.jobs),
+            "campaigns": len(state.campaigns),
+            "campaign_destinations": sum(campaign["total_count"] for campaign in state.campaigns.values()),
+            "subscriptions": len(state.subscriptions),
+            "uploaded_bytes": state.uploaded_bytes,
+            "callbacks_sent": state.callbacks_sent,
+        }
+    )
+
+
+def create_app(args: argparse.Namespace) -> web.Application:
+    app = web.Application(middlewares=[injection_middleware], client_max_size=args.max_body_mib * 1024 * 1024)
+    app["state"] = MockState(args)
+    app.router.add_post(f"{SEAMEET_PREFIX}/meetings", create_meeting, name="create_meeting")
+    app.router.add_delete(f"{SEAMEET_PREFIX}/meetings/{{meeting_id}}", delete_meeting, name="delete_meeting")
+    app.router.add_post(f"{SEAMEET_PREFIX}/meetings/{{meeting_id}}/upload_audio_url", upload_audio_url, name="upload_audio_url")
+    app.router.add_post(f"{SEAMEET_PREFIX}/meetings/{{meeting_id}}/analyze_audio", analyze_audio, name="analyze_audio")
+    app.router.add_get(f"{SEAMEET_PREFIX}/jobs/{{job_id}}", get_job, name="get_job")
+    app.router.add_put("/_mock/uploads/{token}", upload_sink, name="upload_sink")
+    app.router.add_post(f"{SEAX_PREFIX}/general_campaigns/wabp", create_wabp_campaign, name="create_wabp_campaign")
+    app.router.add_post("/analytics-api/v1/generate_metric_report", generate_metric_report, name="generate_metric_report")
+    app.router.add_get(f"{SEANOTIFY_PREFIX}/subscription", list_subscriptions, name="list_subscriptions")
+    app.router.add_post(f"{SEANOTIFY_PREFIX}/subscription", create_subscription, name="create_subscription")
+    app.router.add_get(f"{SEANOTIFY_PREFIX}/subscription/{{subscription_id}}", get_subscription, name="get_subscription")
+    app.router.add_patch(f"{SEANOTIFY_PREFIX}/subscription/{{subscription_id}}", update_subscription, name="update_subscription")
+    app.router.add_delete(f"{SEANOTIFY_PREFIX}/subscription/{{subscription_id}}", delete_subscription, name="delete_subscription")
+    app.router.add_get("/_mock/stats", stats, name="stats")
+
+    async def lifecycle(app: web.Application):
+        app["callback_session"] = ClientSession(timeout=ClientTimeout(total=30))
+        yield
+        await app["callback_session"].close()
+        if app["state"].record_file:
+            app["state"].record_file.close()
+
+    app.cleanup_ctx.append(lifecycle)
+    return app
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--host",
+        dest="host",
+        type=str,
+        required=False,
+        default="127.0.0.1",
+        help="Set the address to listen on.",
+    )
+    parser.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        required=False,
+        default=8090,
+        help="Set the port to listen on.",
+    )
+    parser.add_argument(
+        "--public-url",
+        dest="public_url",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the URL the clients reach the server at, for the upload URLs. The request origin by default.",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        dest="latency_ms",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the mean latency added to every API response, in milliseconds.",
+    )
+    parser.add_argument(
+        "--latency-jitter-ms",
+        dest="latency_jitter_ms",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the standard deviation of the added latency, in milliseconds.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        dest="error_rate",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the share of the requests answered with a 500.",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        dest="throttle_rate",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the share of the requests answered with a 429, whatever the request rate.",
+    )
+    parser.add_argument(
+        "--retry-after",
+        dest="retry_after",
+        type=float,
+        required=False,
+        default=1.0,
+        help="Set the Retry-After of the 429 responses, in seconds.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the requests per second allowed per workspace and endpoint, 0 for no limit.",
+    )
+    parser.add_argument(
+        "--endpoint-rate-limit",
+        dest="endpoint_rate_limit",
+        type=str,
+        action="append",
+        required=False,
+        default=None,
+        help="Set the rate limit of one endpoint, e.g. analyze_audio=5. Can be repeated.",
+    )
+    parser.add_argument(
+        "--rate-burst",
+        dest="rate_burst",
+        type=float,
+        required=False,
+        default=1.0,
+        help="Set the number of requests allowed at once above the rate limit.",
+    )
+    parser.add_argument(
+        "--job-seconds",
+        dest="job_seconds",
+        type=float,
+        required=False,
+        default=5.0,
+        help="Set the time an analysis job takes to finish.",
+    )
+    parser.add_argument(
+        "--job-failure-rate",
+        dest="job_failure_rate",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the share of the analysis jobs that end FAILED.",
+    )
+    parser.add_argument(
+        "--callback-url",
+        dest="callback_url",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the URL the analysis callbacks are POSTed to, e.g. the --callback-port of import_meeting_audio.py.",
+    )
+    parser.add_argument(
+        "--callback-secret",
+        dest="callback_secret",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the key the X-Seasalt-Server-Signature of the callbacks is computed with.",
+    )
+    parser.add_argument(
+        "--upload-kib-per-second",
+        dest="upload_kib_per_second",
+        type=float,
+        required=False,
+        default=0.0,
+        help="Set the bandwidth of every upload in KiB/s, 0 for no limit.",
+    )
+    parser.add_argument(
+        "--upload-url-seconds",
+        dest="upload_url_seconds",
+        type=float,
+        required=False,
+        default=3600.0,
+        help="Set the validity of the upload URLs in seconds.",
+    )
+    parser.add_argument(
+        "--max-body-mib",
+        dest="max_body_mib",
+        type=int,
+        required=False,
+        default=16,
+        help="Set the maximum size of an API request body in MiB.",
+    )
+    parser.add_argument(
+        "--strict",
+        dest="strict",
+        action="store_true",
+        required=False,
+        default=False,
+        help="Answer 400/404 for unknown meetings and jobs, instead of accepting the ids of replayed requests.",
+    )
+    parser.add_argument(
+        "--record",
+        dest="record",
+        type=str,
+        required=False,
+        default=None,
+        help="Set a JSONL file every request is appended to, for load_test.py to replay.",
+    )
+    parser.add_argument(
+        "--seed",
+        dest="seed",
+        type=int,
+        required=False,
+        default=None,
+        help="Set the seed of the injected latency, errors and throttling.",
+    )
+    parser.add_argument(
+        "--log-level",
+        dest="log_level",
+        type=str,
+        required=False,
+        default="INFO",
+        help="Set the log level.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)-8s %(message)s", stream=sys.stdout)
+    web.run_app(create_app(args), host=args.host, port=args.port, access_log=None)
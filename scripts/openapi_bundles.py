@@ -0,0 +1,345 @@
+"""
+Split the OpenAPI specs of static/openapi/ into small bundles, one per tag or one per path, so an API reference
+page only has to download and resolve the operations it shows.
+
+Every bundle keeps the operations of its tag (or path) and only the components they reach through `$ref`s,
+directly or through other components. The references between components are resolved once per spec and the
+components reachable from every component are memoized, recursive schemas included. A manifest lists the bundles
+of every spec, with their operations and sizes, for the docs to load them on demand.
+
+    python scripts/openapi_bundles.py
+    python scripts/openapi_bundles.py --by path --output-dir static/openapi/bundles static/openapi/seax_openapi.json
+
+The swaggerui and redoc shortcodes of layouts/shortcodes/ read the manifest and load one bundle at a time, with a
+picker of the tags of the spec, or only the bundle of the tag they are given:
+
+    {{< swaggerui src="/openapi/seax_openapi.json" >}}
+    {{< swaggerui src="/openapi/seax_openapi.json" tag="Call Campaigns" >}}
+
+`npm run build` and `npm run serve` run this script first. Without the bundles the shortcodes load the whole spec.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+GROUP_BY = ("tag", "path")
+# The fields of a spec copied into every bundle, everything else is filtered to what the bundle reaches.
+_TOP_LEVEL_FIELDS = ("openapi", "swagger", "info", "servers", "security", "externalDocs", "jsonSchemaDialect")
+_UNTAGGED = "default"
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "root"
+
+
+def iter_refs(value: Any) -> Iterator[str]:
+    """Every local `$ref` in value, at any depth."""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            ref = value.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/"):
+                yield ref
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+
+
+class RefResolver:
+    """
+    Resolves the local `$ref`s of a spec, and the components reachable from every reference. Both are memoized.
+    External references (to other files or URLs) are left alone.
+    """
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self._resolved: Dict[str, Any] = {}
+        self._direct: Dict[str, FrozenSet[str]] = {}
+        self._reachable: Dict[str, FrozenSet[str]] = {}
+        # The components that reach themselves, e.g. a schema with a list of children of its own type.
+        self.recursive: Set[str] = set()
+        # The references that point to nothing in the spec.
+        self.dangling: Set[str] = set()
+
+    def resolve(self, ref: str) -> Any:
+        """The value a local reference points to. Raises KeyError for a dangling reference."""
+        if ref not in self._resolved:
+            value = self.spec
+            for token in ref[2:].split("/"):
+                token = _unescape(token)
+                if isinstance(value, list):
+                    value = value[int(token)]
+                elif isinstance(value, dict) and token in value:
+                    value = value[token]
+                else:
+                    raise KeyError(f"unresolvable $ref {ref}")
+            self._resolved[ref] = value
+        return self._resolved[ref]
+
+    def direct_refs(self, ref: str) -> FrozenSet[str]:
+        if ref not in self._direct:
+            try:
+                self._direct[ref] = frozenset(iter_refs(self.resolve(ref)))
+            except KeyError:
+                self.dangling.add(ref)
+                self._direct[ref] = frozenset()
+        return self._direct[ref]
+
+    def reachable(self, ref: str) -> FrozenSet[str]:
+        """ref and every reference reachable from it."""
+        if ref not in self._reachable:
+            self._close(ref)
+        return self._reachable[ref]
+
+    def reachable_from(self, value: Any) -> Set[str]:
+        """Every reference reachable from a part of the spec, e.g. an operation."""
+        refs: Set[str] = set()
+        for ref in set(iter_refs(value)):
+            refs |= self.reachable(ref)
+        return refs
+
+    def _close(self, root: str):
+        """
+        Memoize the reachable references of root and of everything it reaches. The references form strongly
+        connected components (Tarjan's algorithm, iterative), all references of a cycle reach the same set, and
+        every component is closed after the components it points to.
+        """
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        work: List[Tuple[str, Iterator[str]]] = [(root, iter(sorted(self.direct_refs(root))))]
+        index[root] = lowlink[root] = 0
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            ref, successors = work[-1]
+            advanced = False
+            for successor in successors:
+                if successor in self._reachable:
+                    continue
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(sorted(self.direct_refs(successor)))))
+                    advanced = True
+                    break
+                if successor in on_stack:
+                    lowlink[ref] = min(lowlink[ref], index[successor])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[ref])
+            if lowlink[ref] == index[ref]:
+                members = set()
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    members.add(member)
+                    if member == ref:
+                        break
+                reachable = set(members)
+                for member in members:
+                    for successor in self.direct_refs(member):
+                        if successor not in members:
+                            reachable |= self._reachable[successor]
+                if len(members) > 1 or ref in self.direct_refs(ref):
+                    self.recursive |= members
+                reachable = frozenset(reachable)
+                for member in members:
+                    self._reachable[member] = reachable
+
+
+class SpecIndex:
+    """The operations of a spec grouped by tag or by path, and the bundle of every group."""
+
+    def __init__(self, spec: dict, name: str):
+        self.spec = spec
+        self.name = name
+        self.resolver = RefResolver(spec)
+
+    def operations(self) -> Iterator[Tuple[str, str, str, dict]]:
+        """(section, path, method, operation) of every operation, section being "paths" or "webhooks"."""
+        for section in ("paths", "webhooks"):
+            for path, path_item in (self.spec.get(section) or {}).items():
+                for method in HTTP_METHODS:
+                    if isinstance(path_item.get(method), dict):
+                        yield section, path, method, path_item[method]
+
+    def groups(self, by: str) -> Dict[str, List[Tuple[str, str, str, dict]]]:
+        groups: Dict[str, List[Tuple[str, str, str, dict]]] = {}
+        for section, path, method, operation in self.operations():
+            keys = [path] if by == "path" else (operation.get("tags") or [_UNTAGGED])
+            for key in keys:
+                groups.setdefault(key, []).append((section, path, method, operation))
+        return groups
+
+    def bundle(self, group: str, operations: List[Tuple[str, str, str, dict]], by: str) -> dict:
+        """A spec with the given operations and only the components they reach."""
+        bundle = {field: self.spec[field] for field in _TOP_LEVEL_FIELDS if field in self.spec}
+        refs: Set[str] = set()
+        security_names: Set[str] = {name for requirement in self.spec.get("security") or [] for name in requirement}
+        for section, path, method, operation in operations:
+            path_item = self.spec[section][path]
+            target = bundle.setdefault(section, {}).setdefault(path, {})
+            if not target:
+                # The fields shared by all operations of a path, e.g. its parameters.
+                for field, value in path_item.items():
+                    if field not in HTTP_METHODS:
+                        target[field] = value
+                        refs |= self.resolver.reachable_from(value)
+            target[method] = operation
+            refs |= self.resolver.reachable_from(operation)
+            security_names |= {name for requirement in operation.get("security") or [] for name in requirement}
+
+        components: Dict[str, Dict[str, Any]] = {}
+        for ref in sorted(refs - self.resolver.dangling):
+            tokens = ref[2:].split("/")
+            if len(tokens) == 3 and tokens[0] == "components":
+                components.setdefault(tokens[1], {})[_unescape(tokens[2])] = self.resolver.resolve(ref)
+        security_schemes = (self.spec.get("components") or {}).get("securitySchemes") or {}
+        for name in sorted(security_names):
+            if name in security_schemes:
+                components.setdefault("securitySchemes", {})[name] = security_schemes[name]
+        if components:
+            bundle["components"] = components
+
+        if by == "tag":
+            tags = [tag for tag in self.spec.get("tags") or [] if tag.get("name") == group]
+            if tags:
+                bundle["tags"] = tags
+        return bundle
+
+
+def write_bundles(spec_path: str, output_dir: str, by: str, site_root: str) -> dict:
+    """Write the bundles of a spec to output_dir/<spec name>/ and return its manifest entry."""
+    with open(spec_path) as f:
+        spec = json.load(f)
+    name = os.path.splitext(os.path.basename(spec_path))[0]
+    index = SpecIndex(spec, name)
+    spec_dir = os.path.join(output_dir, name)
+    os.makedirs(spec_dir, exist_ok=True)
+
+    bundles = []
+    used_files: Set[str] = set()
+    for group, operations in index.groups(by).items():
+        file_name = _slug(group)
+        while file_name in used_files:
+            file_name += "-"
+        used_files.add(file_name)
+        body = json.dumps(index.bundle(group, operations, by), separators=(",", ":"), ensure_ascii=False).encode()
+        bundle_path = os.path.join(spec_dir, f"{file_name}.json")
+        with open(bundle_path, "wb") as f:
+            f.write(body)
+        bundle = json.loads(body)
+        bundles.append(
+            {
+                "name": group,
+                "url": _site_url(bundle_path, site_root),
+                "bytes": len(body),
+                "operations": [
+                    {"method": method.upper(), "path": path, "operationId": operation.get("operationId"), "summary": operation.get("summary")}
+                    for _, path, method, operation in operations
+                ],
+                "components": sum(len(section) for section in bundle.get("components", {}).values()),
+            }
+        )
+    # Remove the bundles of groups that no longer exist.
+    for stale_file in sorted(set(os.listdir(spec_dir)) - {f"{file_name}.json" for file_name in used_files}):
+        if stale_file.endswith(".json"):
+            os.remove(os.path.join(spec_dir, stale_file))
+
+    return {
+        "title": (spec.get("info") or {}).get("title"),
+        "version": (spec.get("info") or {}).get("version"),
+        "url": _site_url(spec_path, site_root),
+        "bytes": os.path.getsize(spec_path),
+        "by": by,
+        "bundles": bundles,
+        "recursive_components": sorted(ref.rsplit("/", 1)[-1] for ref in index.resolver.recursive),
+        "dangling_refs": sorted(index.resolver.dangling),
+    }
+
+
+def _site_url(path: str, site_root: str) -> str:
+    """The URL of a file under the static/ directory of the site."""
+    return "/" + os.path.relpath(os.path.abspath(path), os.path.abspath(site_root)).replace(os.sep, "/")
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "specs",
+        nargs="*",
+        help="Set the specs to split, all of static/openapi/*.json by default.",
+    )
+    parser.add_argument(
+        "--by",
+        dest="by",
+        type=str,
+        choices=GROUP_BY,
+        required=False,
+        default="tag",
+        help="Set whether to bundle the operations per tag or per path.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        dest="output_dir",
+        type=str,
+        required=False,
+        default="static/openapi/bundles",
+        help="Set the directory of the bundles and of manifest.json.",
+    )
+    parser.add_argument(
+        "--site-root",
+        dest="site_root",
+        type=str,
+        required=False,
+        default="static",
+        help="Set the directory served at the root of the site, for the URLs in the manifest.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = parse_args(argv)
+    specs = args.specs or sorted(glob.glob("static/openapi/*.json"))
+    if not specs:
+        print("No specs found, run from the root of the repository or pass the spec files.", file=sys.stderr)
+        return 1
+    manifest = {"by": args.by, "specs": {}}
+    for spec_path in specs:
+        start_time = time.perf_counter()
+        entry = write_bundles(spec_path, args.output_dir, args.by, args.site_root)
+        manifest["specs"][os.path.splitext(os.path.basename(spec_path))[0]] = entry
+        largest = max((bundle["bytes"] for bundle in entry["bundles"]), default=0)
+        print(
+            f"{spec_path}: {entry['bytes']:,} bytes -> {len(entry['bundles'])} bundles, largest {largest:,} bytes"
+            f" ({time.perf_counter() - start_time:.2f}s)"
+        )
+        for ref in entry["dangling_refs"]:
+            print(f"{spec_path}: warning: {ref} points to nothing, left out of the bundles", file=sys.stderr)
+    manifest_path = os.path.join(args.output_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    print(f"wrote {manifest_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
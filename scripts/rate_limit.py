@@ -0,0 +1,252 @@
+"""
+Client-side throttling and retry scheduling for the Seasalt APIs.
+
+- TokenBucket paces the requests of one (workspace, endpoint) pair. When the server answers 429 the bucket
+  pauses for Retry-After and lowers its rate, then creeps back up to the configured rate on every success.
+  That keeps the sustained throughput just under the server limit instead of oscillating around it.
+- RetryPolicy decides whether a failed request may be sent again and how long to wait, with full jitter so
+  that the workers of a batch do not retry in lockstep.
+- send_with_retries and send_with_retries_async run the attempts of one request with both of them. The send
+  callable makes a single attempt and raises AttemptFailed when it may be worth another one.
+
+All of them work from threads (acquire) and from asyncio tasks (acquire_async).
+"""
+
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Statuses that mean the request was rejected before it was processed, it is safe to send it again.
+REJECTED_STATUSES = (429,)
+# Statuses that may be retried for idempotent requests only.
+TRANSIENT_STATUSES = (500, 502, 503, 504)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = 1.0, min_rate_ratio: float = 0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.min_rate = rate * min_rate_ratio
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller has to wait before sending its request."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def try_acquire(self) -> bool:
+        """Take one token if one is available now, without waiting. This is the server side of a rate limit."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens < 1 or now < self._paused_until:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            # Additive increase, back to the configured rate after about 20 successful requests.
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        with self._lock:
+            # Multiplicative decrease, and no request at all until the server said it is ready again.
+            self.rate = max(self.min_rate, self.rate * 0.75)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+
+class RateLimiter:
+    """
+    A token bucket per (workspace_id, endpoint). endpoint_rates overrides the default rate of an endpoint,
+    every workspace gets its own buckets since the server limits are per workspace.
+    A rate of None or 0 means the endpoint is not throttled.
+    """
+
+    def __init__(
+        self,
+        default_rate: Optional[float] = None,
+        endpoint_rates: Optional[Dict[str, float]] = None,
+        burst: float = 1.0,
+    ):
+        self.default_rate = default_rate
+        self.endpoint_rates = endpoint_rates or {}
+        self.burst = burst
+        self._buckets: Dict[Tuple[str, str], Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, workspace_id: str, endpoint: str) -> Optional[TokenBucket]:
+        key = (workspace_id, endpoint)
+        with self._lock:
+            if key not in self._buckets:
+                rate = self.endpoint_rates.get(endpoint, self.default_rate)
+                self._buckets[key] = TokenBucket(rate, self.burst) if rate else None
+            return self._buckets[key]
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 3
+    backoff: float = 0.5
+    max_delay: float = 60.0
+
+    def should_retry(self, attempt: int, status_code: Optional[int], idempotent: bool) -> bool:
+        """
+        status_code is None when no response was received. A rejected (429) request is always retried,
+        anything that may have reached the server only if the request is idempotent.
+        """
+        if attempt >= self.max_retries:
+            return False
+        if status_code in REJECTED_STATUSES:
+            return True
+        return idempotent and (status_code is None or status_code in TRANSIENT_STATUSES)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full jitter exponential backoff, never shorter than the Retry-After of the server."""
+        delay = random.uniform(0, min(self.max_delay, self.backoff * (2**attempt)))
+        return max(delay, retry_after or 0.0)
+
+
+class AttemptFailed(Exception):
+    """
+    Raised by the send callable of send_with_retries for a failed attempt. error is raised to the caller when the
+    request is not retried, status_code is None when no response was received, and never_sent means the
+    connection could not be opened, so the request may be resent even if it is not idempotent.
+    """
+
+    def __init__(
+        self,
+        error: BaseException,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        never_sent: bool = False,
+    ):
+        super().__init__(str(error))
+        self.error = error
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.never_sent = never_sent
+
+
+def send_with_retries(
+    send: Callable[[], T],
+    retry_policy: RetryPolicy,
+    idempotent: bool,
+    bucket: Optional[TokenBucket] = None,
+    description: str = "request",
+) -> T:
+    """Call send, paced by bucket, until it returns or retry_policy gives up, and return its result."""
+    attempt = 0
+    while True:
+        if bucket:
+            bucket.acquire()
+        try:
+            result = send()
+        except AttemptFailed as e:
+            delay = _retry_delay(e, attempt, retry_policy, idempotent, bucket, description)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        if bucket:
+            bucket.on_success()
+        return result
+
+
+async def send_with_retries_async(
+    send: Callable[[], Awaitable[T]],
+    retry_policy: RetryPolicy,
+    idempotent: bool,
+    bucket: Optional[TokenBucket] = None,
+    description: str = "request",
+) -> T:
+    """The asyncio counterpart of send_with_retries, send returns an awaitable."""
+    attempt = 0
+    while True:
+        if bucket:
+            await bucket.acquire_async()
+        try:
+            result = await send()
+        except AttemptFailed as e:
+            delay = _retry_delay(e, attempt, retry_policy, idempotent, bucket, description)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        if bucket:
+            bucket.on_success()
+        return result
+
+
+def _retry_delay(
+    failure: AttemptFailed,
+    attempt: int,
+    retry_policy: RetryPolicy,
+    idempotent: bool,
+    bucket: Optional[TokenBucket],
+    description: str,
+) -> float:
+    """The delay before the next attempt, or raise the error of the failed one if there is none."""
+    if failure.status_code in REJECTED_STATUSES and bucket:
+        bucket.on_throttled(failure.retry_after)
+    if not retry_policy.should_retry(attempt, failure.status_code, idempotent or failure.never_sent):
+        raise failure.error from None
+    delay = retry_policy.delay(attempt, failure.retry_after)
+    logging.info(
+        "retrying %s in %.1fs, attempt %d/%d: %s",
+        description,
+        delay,
+        attempt + 1,
+        retry_policy.max_retries,
+        failure.error,
+    )
+    return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_endpoint_rates(values) -> Dict[str, float]:
+    """Parse repeated `endpoint=rate` command line values."""
+    rates = {}
+    for value in values or []:
+        endpoint, _, rate = value.partition("=")
+        rates[endpoint.strip()] = float(rate)
+    return rates
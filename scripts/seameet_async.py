@@ -0,0 +1,182 @@
+"""
+An asyncio client for the SeaMeet endpoints used by import_meeting_audio.py --engine asyncio.
+
+All requests share one aiohttp connection pool, so a single process can keep hundreds of imports in flight
+without a thread per import.
+
+Prerequisites:
+- pip install aiohttp
+"""
+
+import asyncio
+import json
+import logging
+import time
+import urllib.parse
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - aiohttp is only needed for the asyncio engine
+    aiohttp = None
+
+from rate_limit import AttemptFailed, RateLimiter, RetryPolicy, parse_retry_after, send_with_retries_async
+
+
+class LoggedBody:
+    """Render a body for the log only when the record is emitted, cut to max_chars characters."""
+
+    __slots__ = ("body", "max_chars")
+
+    def __init__(self, body, max_chars: int = 1000):
+        self.body = body
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        text = str(self.body)
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[:self.max_chars]}... ({len(text)} chars)"
+
+
+class AsyncSeaMeetClient:
+    def __init__(
+        self,
+        access_token: str,
+        pool_size: int = 100,
+        pool_size_per_host: int = 0,
+        timeout: Optional[float] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        log_body_max_chars: int = 1000,
+    ):
+        if aiohttp is None:
+            raise ImportError("the asyncio engine requires aiohttp, please run `pip install aiohttp`")
+        self.access_token = access_token
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.log_body_max_chars = log_body_max_chars
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size_per_host),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+
+    async def __aenter__(self) -> "AsyncSeaMeetClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self._session.close()
+
+    async def query(
+        self,
+        url: str,
+        method: str,
+        body: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        url_parameters: Optional[dict] = None,
+        rate_limit_key: Optional[Tuple[str, str]] = None,
+        idempotent: bool = False,
+    ) -> dict:
+        """The asyncio counterpart of _query_backend_service in import_meeting_audio.py."""
+        if url_parameters:
+            url += "?" + urllib.parse.urlencode(url_parameters)
+        final_headers = {
+            "accept": r"application/json",
+            "Content-Type": r"application/json",
+            "Authorization": f"Bearer {self.access_token}",
+        }
+        if headers:
+            final_headers.update(headers)
+        bucket = self.rate_limiter.bucket(*rate_limit_key) if self.rate_limiter and rate_limit_key else None
+
+        async def send() -> dict:
+            start_time = time.time()
+            text = ""
+            status_code = None
+            retry_after = None
+            try:
+                async with self._session.request(method, url, json=body, headers=final_headers) as response:
+                    status_code = response.status
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    text = await response.text()
+                    response.raise_for_status()
+                if not text:
+                    return {}
+                result_json = json.loads(text)
+                logging.debug(
+                    "finish a request to API server, time elapsed: %.3fs, method: %s, url:%s",
+                    time.time() - start_time,
+                    method,
+                    url,
+                )
+                return result_json
+            except Exception as e:
+                logging.warning(
+                    "failed to request API server, time elapsed: %.3fs, method: %s, url:%s, error: %s %s %s",
+                    time.time() - start_time,
+                    method,
+                    url,
+                    e.__class__.__name__,
+                    e,
+                    LoggedBody(text, self.log_body_max_chars),
+                )
+                if not isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                    raise e
+                # A request whose connection could not be opened never reached the server, it is always safe to resend.
+                raise AttemptFailed(
+                    e,
+                    status_code if status_code and status_code >= 400 else None,
+                    retry_after,
+                    never_sent=isinstance(e, aiohttp.ClientConnectorError),
+                )
+
+        return await send_with_retries_async(
+            send, self.retry_policy, idempotent, bucket=bucket, description=f"{method} {url}"
+        )
+
+    async def upload_file(self, url: str, stream, retries: int = 3, retry_backoff: float = 0.5):
+        """
+        PUT a file to a presigned url from stream, the _AudioUploadStream of import_meeting_audio.py. Its chunks are
+        sent as they are read, the file is never fully loaded, and a failed transfer is retried from the start
+        like _upload_audio does.
+        """
+        for attempt in range(retries + 1):
+            stream.seek(0)
+            try:
+                # NOTE: The Content-Length is set, the presigned url does not accept a chunked transfer encoding.
+                async with self._session.put(
+                    url, data=_iter_chunks(stream), headers={"Content-Length": str(len(stream))}
+                ) as response:
+                    response.raise_for_status()
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == retries:
+                    raise
+                delay = retry_backoff * (2**attempt)
+                logging.warning(
+                    f"failed to upload {stream.path} at byte {stream.tell()}/{len(stream)}, "
+                    f"retrying in {delay:.1f}s: {e.__class__.__name__} {e}"
+                )
+                await asyncio.sleep(delay)
+        logging.debug(f"uploaded {stream.path} to s3, {len(stream)} bytes, {stream.bytes_per_second / 1024:.1f} KiB/s")
+
+
+async def _iter_chunks(stream) -> AsyncIterator[memoryview]:
+    for chunk in stream:
+        yield chunk
+
+
+class WorkspaceLimiter:
+    """Limit the number of imports in flight per workspace, on top of the global concurrency limit."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, workspace_id: str) -> asyncio.Semaphore:
+        if workspace_id not in self._semaphores:
+            self._semaphores[workspace_id] = asyncio.Semaphore(self.limit)
+        return self._semaphores[workspace_id]
@@ -0,0 +1,139 @@
+"""
+A Python client for the SeaX, SeaChat, SeaNotify and analytics APIs, generated from the specs in static/openapi/.
+
+The endpoint modules are generated by scripts/generate_client.py and imported lazily: `client.seax` imports only the
+service registry, `client.seax.message_campaigns` only the module of that tag. A service package that is missing,
+e.g. in a fresh checkout, or outdated is generated from its spec on first access. The schema TypedDicts in
+`<service>/models.py` are only imported by type checkers.
+
+Example usage:
+    from seasalt_client import AsyncClient, Client
+
+    with Client(api_key="xxx") as client:
+        campaign = client.seax.message_campaigns.get_campaign(workspace_id, campaign_id)
+        for campaign in client.seax.message_campaigns.iter_list_campaigns(workspace_id, page_size=50):
+            ...
+
+    async with AsyncClient(api_key="xxx") as client:
+        async for conversation in client.seax.conversations.iter_list_conversations(workspace_id):
+            ...
+"""
+
+import importlib
+import logging
+from typing import Dict, Optional
+
+from ._transport import AsyncTransport, Transport
+
+
+def _ensure_generated(name: str):
+    import generate_client
+
+    if name not in generate_client.SERVICES:
+        return
+    try:
+        if generate_client.ensure_service(name):
+            importlib.invalidate_caches()
+    except OSError as e:
+        # A package generated ahead is still usable when the specs are not deployed or the directory is read-only.
+        logging.warning("could not generate seasalt_client.%s: %s %s", name, e.__class__.__name__, e)
+
+
+class _Service:
+    """The endpoint classes of one API, instantiated on first access."""
+
+    def __init__(self, name: str, transport, base_url: Optional[str], asynchronous: bool):
+        _ensure_generated(name)
+        try:
+            self._module = importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(f"{name} is not generated, please run `python generate_client.py`") from None
+        self._transport = transport
+        self._base_url = base_url or self._module.BASE_URL
+        self._asynchronous = asynchronous
+
+    def __getattr__(self, tag: str):
+        class_name = self._module.TAGS.get(tag)
+        if class_name is None:
+            raise AttributeError(f"{self._module.__name__} has no tag {tag!r}, the tags are: {', '.join(self._module.TAGS)}")
+        module = importlib.import_module(f"{self._module.__name__}.{tag}")
+        endpoints = getattr(module, f"Async{class_name}" if self._asynchronous else class_name)(self._transport, self._base_url)
+        # Cached on the instance, __getattr__ is not called again for this tag.
+        setattr(self, tag, endpoints)
+        return endpoints
+
+    def __dir__(self):
+        return list(self._module.TAGS)
+
+
+class _BaseClient:
+    _asynchronous = False
+
+    def __init__(self, transport, base_urls: Optional[Dict[str, str]]):
+        self._transport = transport
+        self._base_urls = base_urls or {}
+
+    def __getattr__(self, name: str) -> _Service:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        service = _Service(name, self._transport, self._base_urls.get(name), self._asynchronous)
+        setattr(self, name, service)
+        return service
+
+
+class Client(_BaseClient):
+    """
+    A client for every API, over one requests session. base_urls overrides the base URL of a service, e.g.
+    {"seax": "https://seax-dev.seasalt.ai/seax-api"}. rate_limiter and retry_policy are the ones of rate_limit.py,
+    the rate limit buckets are keyed by workspace_id and path.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        access_token: Optional[str] = None,
+        base_urls: Optional[Dict[str, str]] = None,
+        pool_size: int = 10,
+        timeout: Optional[float] = 60.0,
+        rate_limiter=None,
+        retry_policy=None,
+    ):
+        super().__init__(Transport(api_key, access_token, pool_size, timeout, rate_limiter, retry_policy), base_urls)
+
+    def close(self):
+        self._transport.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncClient(_BaseClient):
+    """The asyncio counterpart of Client, over one aiohttp session. Create it inside a running event loop."""
+
+    _asynchronous = True
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        access_token: Optional[str] = None,
+        base_urls: Optional[Dict[str, str]] = None,
+        pool_size: int = 100,
+        timeout: Optional[float] = 60.0,
+        rate_limiter=None,
+        retry_policy=None,
+    ):
+        super().__init__(AsyncTransport(api_key, access_token, pool_size, timeout, rate_limiter, retry_policy), base_urls)
+
+    async def close(self):
+        await self._transport.close()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,347 @@
+"""
+The HTTP layer shared by every generated endpoint class: one keep-alive connection pool per client, credentials,
+rate limiting, retries and offset pagination.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import urllib.parse
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+if TYPE_CHECKING:
+    # Imported by AsyncTransport only, the sync Client does not pay for importing aiohttp.
+    import aiohttp
+
+from rate_limit import (
+    AttemptFailed,
+    RateLimiter,
+    RetryPolicy,
+    parse_retry_after,
+    send_with_retries,
+    send_with_retries_async,
+)
+
+# Resending these can not create a second resource.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+def _query_items(query: Optional[dict]) -> List[Tuple[str, str]]:
+    """The query string pairs, None dropped, lists repeated and booleans lowercased, as FastAPI expects."""
+    items = []
+    for name, value in (query or {}).items():
+        for item in value if isinstance(value, (list, tuple)) else (value,):
+            if item is None:
+                continue
+            items.append((name, ("true" if item else "false") if isinstance(item, bool) else str(item)))
+    return items
+
+
+def _never_sent(e: requests.RequestException) -> bool:
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if isinstance(e, requests.ConnectionError) and e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _decode(content_type: str, content: bytes) -> Any:
+    if not content:
+        return None
+    if "json" in content_type:
+        return json.loads(content)
+    if content_type.startswith("text/"):
+        return content.decode()
+    return content
+
+
+class _MultipartBody:
+    """
+    A multipart body that can be sent more than once. The HTTP client reads the file parts to their end, so the
+    seekable files are rewound to where they started before every attempt, and the other streams are read once.
+    """
+
+    def __init__(self, body: dict):
+        self.body = dict(body)
+        self._positions: Dict[str, int] = {}
+        for name, value in body.items():
+            content = value[1] if isinstance(value, tuple) else value
+            if not hasattr(content, "read"):
+                continue
+            if callable(getattr(content, "seekable", None)) and content.seekable():
+                self._positions[name] = content.tell()
+            elif isinstance(value, tuple):
+                self.body[name] = (value[0], content.read(), *value[2:])
+            else:
+                # Named like requests names a file part.
+                file_name = getattr(content, "name", None)
+                if not isinstance(file_name, str) or file_name.startswith("<"):
+                    file_name = name
+                self.body[name] = (os.path.basename(file_name), content.read())
+
+    def rewind(self) -> dict:
+        for name, position in self._positions.items():
+            value = self.body[name]
+            (value[1] if isinstance(value, tuple) else value).seek(position)
+        return self.body
+
+
+class _Credentials:
+    def __init__(self, api_key: Optional[str], access_token: Optional[str]):
+        self.api_key = api_key
+        self.access_token = access_token
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"accept": "application/json"}
+        if self.api_key:
+            headers["X-API-Key"] = self.api_key
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        return headers
+
+
+class Transport:
+    """A requests session with a connection pool of pool_size connections per host."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        access_token: Optional[str] = None,
+        pool_size: int = 10,
+        timeout: Optional[float] = 60.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.credentials = _Credentials(api_key, access_token)
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        query: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        body: Any = None,
+        content_type: Optional[str] = None,
+        rate_limit_key: Optional[Tuple[str, str]] = None,
+    ) -> Any:
+        final_headers = self.credentials.headers()
+        final_headers.update({name: str(value) for name, value in (headers or {}).items() if value is not None})
+        kwargs: Dict[str, Any] = {"params": _query_items(query), "headers": final_headers, "timeout": self.timeout}
+        multipart = None
+        if body is not None:
+            if content_type == "multipart/form-data":
+                multipart = _MultipartBody(body)
+                # Bytes, files and (filename, content[, type]) tuples are file parts, anything else a form field.
+                kwargs["files"] = {
+                    name: value
+                    for name, value in multipart.body.items()
+                    if isinstance(value, (bytes, tuple)) or hasattr(value, "read")
+                }
+                kwargs["data"] = {name: value for name, value in multipart.body.items() if name not in kwargs["files"]}
+            elif content_type == "application/x-www-form-urlencoded":
+                kwargs["data"] = body
+            else:
+                kwargs["json"] = body
+        bucket = self.rate_limiter.bucket(*rate_limit_key) if self.rate_limiter and rate_limit_key else None
+
+        def send() -> Any:
+            if multipart:
+                multipart.rewind()
+            start_time = time.time()
+            status_code = None
+            retry_after = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                status_code = response.status_code
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if status_code >= 400:
+                    logging.warning("%s %s failed with HTTP %d: %s", method, url, status_code, response.text[:500])
+                response.raise_for_status()
+            except requests.RequestException as e:
+                # A request whose connection could not be opened never reached the server, it is always safe to resend.
+                raise AttemptFailed(e, status_code, retry_after, never_sent=_never_sent(e))
+            logging.debug("%s %s in %.3fs", method, url, time.time() - start_time)
+            return _decode(response.headers.get("Content-Type", ""), response.content)
+
+        return send_with_retries(
+            send, self.retry_policy, method in IDEMPOTENT_METHODS, bucket=bucket, description=f"{method} {url}"
+        )
+
+
+class AsyncTransport:
+    """The asyncio counterpart of Transport, one aiohttp session with a pool of pool_size connections."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        access_token: Optional[str] = None,
+        pool_size: int = 100,
+        timeout: Optional[float] = 60.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("AsyncClient requires aiohttp, please run `pip install aiohttp`") from None
+        self.credentials = _Credentials(api_key, access_token)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+
+    async def close(self):
+        await self.session.close()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        query: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        body: Any = None,
+        content_type: Optional[str] = None,
+        rate_limit_key: Optional[Tuple[str, str]] = None,
+    ) -> Any:
+        import aiohttp
+
+        final_headers = self.credentials.headers()
+        final_headers.update({name: str(value) for name, value in (headers or {}).items() if value is not None})
+        kwargs: Dict[str, Any] = {"params": _query_items(query), "headers": final_headers}
+        bucket = self.rate_limiter.bucket(*rate_limit_key) if self.rate_limiter and rate_limit_key else None
+        multipart = _MultipartBody(body) if body is not None and content_type == "multipart/form-data" else None
+
+        async def send() -> Any:
+            if body is not None:
+                # A FormData can only be sent once, it is rebuilt for every attempt.
+                if multipart:
+                    kwargs["data"] = self._form_data(multipart.rewind())
+                elif content_type == "application/x-www-form-urlencoded":
+                    kwargs["data"] = body
+                else:
+                    kwargs["json"] = body
+            start_time = time.time()
+            status_code = None
+            retry_after = None
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    status_code = response.status
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    content = await response.read()
+                    if status_code >= 400:
+                        logging.warning("%s %s failed with HTTP %d: %s", method, url, status_code, content[:500].decode(errors="replace"))
+                    response.raise_for_status()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # A request whose connection could not be opened never reached the server, it is always safe to resend.
+                raise AttemptFailed(
+                    e, status_code, retry_after, never_sent=isinstance(e, aiohttp.ClientConnectorError)
+                )
+            logging.debug("%s %s in %.3fs", method, url, time.time() - start_time)
+            return _decode(response.headers.get("Content-Type", ""), content)
+
+        return await send_with_retries_async(
+            send, self.retry_policy, method in IDEMPOTENT_METHODS, bucket=bucket, description=f"{method} {url}"
+        )
+
+    @staticmethod
+    def _form_data(body: dict) -> "aiohttp.FormData":
+        import aiohttp
+
+        form = aiohttp.FormData()
+        for name, value in body.items():
+            if isinstance(value, tuple):
+                filename, content, *content_type = value
+                form.add_field(name, content, filename=filename, content_type=content_type[0] if content_type else None)
+            elif isinstance(value, bytes) or hasattr(value, "read"):
+                form.add_field(name, value, filename=getattr(value, "name", name))
+            else:
+                form.add_field(name, value if isinstance(value, str) else json.dumps(value))
+        return form
+
+
+def _page_items(page: Any, items_key: Optional[str]) -> list:
+    if items_key is None:
+        return page or []
+    return (page or {}).get(items_key) or []
+
+
+def _check_page_size(page_size: int):
+    # The specs read limit=0 as "all items", a page would then never be short and the iteration never end.
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1, got {page_size}")
+
+
+class Endpoints:
+    """The base of the generated endpoint classes of one tag."""
+
+    def __init__(self, transport: Transport, base_url: str):
+        self._transport = transport
+        self._base_url = base_url.rstrip("/")
+
+    def _request(self, method: str, path: str, path_parameters: Optional[dict] = None, **kwargs) -> Any:
+        path_parameters = path_parameters or {}
+        url = self._base_url + path.format(**{name: urllib.parse.quote(str(value), safe="") for name, value in path_parameters.items()})
+        rate_limit_key = (str(path_parameters.get("workspace_id", "")), path)
+        return self._transport.request(method, url, rate_limit_key=rate_limit_key, **kwargs)
+
+    @staticmethod
+    def _paginate(fetch: Callable, items_key: Optional[str], kwargs: dict, page_size: int) -> Iterator[Any]:
+        """
+        Yield the items of every page of fetch, page_size items per request. Stops at the first short or empty page,
+        or once the `total` of the response is reached.
+        """
+        _check_page_size(page_size)
+        offset = 0
+        while True:
+            page = fetch(limit=page_size, offset=offset, **kwargs)
+            items = _page_items(page, items_key)
+            yield from items
+            offset += len(items)
+            total = page.get("total") if isinstance(page, dict) else None
+            if not items or len(items) < page_size or (total is not None and offset >= total):
+                return
+
+
+class AsyncEndpoints:
+    """The base of the generated asyncio endpoint classes of one tag."""
+
+    def __init__(self, transport: AsyncTransport, base_url: str):
+        self._transport = transport
+        self._base_url = base_url.rstrip("/")
+
+    async def _request(self, method: str, path: str, path_parameters: Optional[dict] = None, **kwargs) -> Any:
+        path_parameters = path_parameters or {}
+        url = self._base_url + path.format(**{name: urllib.parse.quote(str(value), safe="") for name, value in path_parameters.items()})
+        rate_limit_key = (str(path_parameters.get("workspace_id", "")), path)
+        return await self._transport.request(method, url, rate_limit_key=rate_limit_key, **kwargs)
+
+    @staticmethod
+    async def _paginate(fetch: Callable, items_key: Optional[str], kwargs: dict, page_size: int) -> AsyncIterator[Any]:
+        _check_page_size(page_size)
+        offset = 0
+        while True:
+            page = await fetch(limit=page_size, offset=offset, **kwargs)
+            items = _page_items(page, items_key)
+            for item in items:
+                yield item
+            offset += len(items)
+            total = page.get("total") if isinstance(page, dict) else None
+            if not items or len(items) < page_size or (total is not None and offset >= total):
+                return
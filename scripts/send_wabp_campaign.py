@@ -0,0 +1,594 @@
+"""
+Send a WhatsApp Business (WABP) template campaign to a large audience, read from a CSV or JSONL file.
+
+The destinations are streamed from the file and split into campaign requests of at most --batch-size
+destinations and --max-request-bytes bytes, which are POSTed to general_campaigns/wabp by --concurrency
+workers over one pooled session, paced by --rate-limit. Memory use does not grow with the size of the file.
+
+Progress is recorded in --state-db (see campaign_state.py). A destination is only ever part of one sent campaign:
+a re-run after a crash or an interruption skips every destination already sent, and every destination of a
+request that may have reached the server. Those are listed at the end of the run, --resend-unknown sends them
+again. A destination listed twice in the file is sent once, with the parameters of its first row.
+
+Prerequisites:
+- Python 3.8+
+- pip install aiohttp
+
+Example usage:
+    python send_wabp_campaign.py --api-key xxx --workspace-id ws --sender-whatsapp-number +13867033591 \\
+        --template beta_booking_confirmation --language-code es_MX --destinations audience.csv
+
+The CSV file has a header row with a `destination` column, and one column per template parameter:
+- `header.<name>`, `body.<name>`: a named header or body parameter, e.g. `body.climber_first`. Positional
+  parameters are numbered instead, e.g. `body.1`, `body.2`.
+- `button.<index>`: the text parameter of the URL button at that index, `button.<index>.quick_reply` the payload
+  of a quick reply button.
+Empty cells are left out. A JSONL file has one object per line, with the same keys, or with a `destination` and
+its `components` in the format of the API. Components shared by all destinations are read from the JSON file given
+as --components.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - only needed to actually send campaigns
+    aiohttp = None
+
+from campaign_state import BATCH_FAILED, BATCH_SENT, BATCH_UNKNOWN, CampaignStateStore
+from rate_limit import AttemptFailed, RateLimiter, RetryPolicy, parse_retry_after, send_with_retries_async
+
+DEFAULT_BASE_URL = "https://seax.seasalt.ai/seax-api"
+ENDPOINT = "general_campaigns/wabp"
+_PARAMETER_COLUMN = re.compile(r"^(header|body)\.(.+)$")
+_BUTTON_COLUMN = re.compile(r"^button\.(\d+)(?:\.(url|quick_reply))?$")
+_PHONE_SEPARATORS = re.compile(r"[\s\-().]")
+
+
+@dataclass
+class SendStats:
+    rows: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    already_claimed: int = 0
+    batches: int = 0
+    sent: int = 0
+    failed: int = 0
+    unknown: int = 0
+
+
+# -- Reading the destinations --
+def normalize_destination(value: str) -> str:
+    """The phone number without separators, e.g. '+1 (443) 743-8423' -> '+14437438423'."""
+    return _PHONE_SEPARATORS.sub("", value or "")
+
+
+def row_components(row: Dict[str, str]) -> List[dict]:
+    """The components of a destination from its `header.*`, `body.*` and `button.*` columns."""
+    parameters: Dict[str, List[Tuple[Tuple[int, str], dict]]] = {"header": [], "body": []}
+    buttons: Dict[int, dict] = {}
+    for column, value in row.items():
+        if value is None or value == "" or column is None:
+            continue
+        match = _PARAMETER_COLUMN.match(column)
+        if match:
+            section, name = match.groups()
+            parameter = {"type": "text", "text": str(value)}
+            if name.isdigit():
+                sort_key = (int(name), "")
+            else:
+                parameter["parameter_name"] = name
+                sort_key = (0, name)
+            parameters[section].append((sort_key, parameter))
+            continue
+        match = _BUTTON_COLUMN.match(column)
+        if match:
+            index, sub_type = int(match.group(1)), match.group(2) or "url"
+            parameter = {"type": "payload", "payload": str(value)} if sub_type == "quick_reply" else {"type": "text", "text": str(value)}
+            buttons[index] = {"type": "button", "sub_type": sub_type, "index": index, "parameters": [parameter]}
+
+    components = []
+    for section in ("header", "body"):
+        if parameters[section]:
+            components.append({"type": section, "parameters": [parameter for _, parameter in sorted(parameters[section], key=lambda item: item[0])]})
+    components.extend(buttons[index] for index in sorted(buttons))
+    return components
+
+
+def read_destinations(path: str, input_format: Optional[str] = None) -> Iterator[Tuple[int, Optional[dict]]]:
+    """(line number, destination) of every row of a CSV or JSONL file, None for a row without a destination."""
+    input_format = input_format or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if input_format == "csv":
+            # The header is line 1.
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield line_number, _destination(row)
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None
+                continue
+            yield line_number, _destination(row) if isinstance(row, dict) else None
+
+
+def _destination(row: dict) -> Optional[dict]:
+    destination = normalize_destination(str(row.get("destination") or ""))
+    if not destination:
+        return None
+    components = row.get("components")
+    if not isinstance(components, list):
+        components = row_components({column: value for column, value in row.items() if column != "destination"})
+    result = {"destination": destination}
+    if components:
+        result["components"] = components
+    return result
+
+
+# -- Building the campaign requests --
+@dataclass
+class Batch:
+    destinations: List[str]
+    # The serialized destination objects, joined into the request body when it is sent.
+    bodies: List[bytes]
+    first_line: int
+    last_line: int
+
+
+class BatchBuilder:
+    """
+    Seal the destinations into batches of at most batch_size destinations and max_request_bytes bytes, skipping
+    the destinations that were already claimed or that are waiting in a sealed batch.
+    """
+
+    def __init__(
+        self,
+        state: Optional[CampaignStateStore],
+        stats: SendStats,
+        batch_size: int,
+        max_request_bytes: int,
+        envelope_bytes: int,
+    ):
+        self.state = state
+        self.stats = stats
+        self.batch_size = batch_size
+        self.max_request_bytes = max_request_bytes
+        self.envelope_bytes = envelope_bytes
+        # The destinations of the sealed batches that are not claimed yet.
+        self.pending: Set[str] = set()
+        self._current: Optional[Batch] = None
+        self._current_set: Set[str] = set()
+        self._current_bytes = 0
+
+    def add(self, line_number: int, destination: Optional[dict]) -> Optional[Batch]:
+        """Add one row, and return the batch it sealed, if any."""
+        self.stats.rows += 1
+        if destination is None:
+            self.stats.invalid += 1
+            logging.warning("line %d has no destination, skipped", line_number)
+            return None
+        number = destination["destination"]
+        if number in self._current_set or number in self.pending:
+            self.stats.duplicates += 1
+            return None
+        if self.state and self.state.is_claimed(number):
+            self.stats.already_claimed += 1
+            return None
+        body = json.dumps(destination, separators=(",", ":"), ensure_ascii=False).encode()
+        sealed = None
+        if self._current and self._current_bytes + len(body) + 1 > self.max_request_bytes:
+            sealed = self.seal()
+        if self._current is None:
+            self._current = Batch([], [], line_number, line_number)
+            self._current_bytes = self.envelope_bytes
+        self._current.destinations.append(number)
+        self._current.bodies.append(body)
+        self._current.last_line = line_number
+        self._current_set.add(number)
+        self._current_bytes += len(body) + 1
+        if len(self._current.destinations) >= self.batch_size:
+            sealed = sealed or self.seal()
+        return sealed
+
+    def seal(self) -> Optional[Batch]:
+        batch, self._current = self._current, None
+        if batch:
+            self.pending |= self._current_set
+            self._current_set = set()
+            self.stats.batches += 1
+        return batch
+
+
+def encode_request(envelope: dict, batch: Batch) -> bytes:
+    """The request body of a batch, built from its serialized destinations without encoding them again."""
+    head, _, tail = json.dumps(envelope, separators=(",", ":"), ensure_ascii=False).partition('"destinations":[]')
+    return b"".join((head.encode(), b'"destinations":[', b",".join(batch.bodies), b"]", tail.encode()))
+
+
+def campaign_envelope(args: argparse.Namespace, shared_components: Optional[list]) -> dict:
+    message = {"template": args.template, "language_code": args.language_code, "destinations": []}
+    if shared_components:
+        message["components"] = shared_components
+    envelope = {"sender_whatsapp_number": args.sender_whatsapp_number, "type": "whatsapp", "highly_structured_message": message}
+    if args.campaign_name:
+        envelope["name"] = args.campaign_name
+    return envelope
+
+
+# -- Sending --
+class _CampaignHTTPError(Exception):
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"HTTP {status_code}: {text[:500]}")
+        self.status_code = status_code
+
+
+class CampaignSender:
+    """POSTs the campaign requests over one pooled session, and settles their batches in the state store."""
+
+    def __init__(self, args: argparse.Namespace, state: CampaignStateStore, stats: SendStats, envelope: dict):
+        self.args = args
+        self.state = state
+        self.stats = stats
+        self.envelope = envelope
+        self.url = f"{args.base_url.rstrip('/')}/api/v1/workspace/{args.workspace_id}/{ENDPOINT}"
+        self.retry_policy = RetryPolicy(max_retries=args.max_retries)
+        rate_limiter = RateLimiter(default_rate=args.rate_limit, burst=args.rate_limit_burst)
+        self.bucket = rate_limiter.bucket(args.workspace_id, ENDPOINT)
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def __aenter__(self) -> "CampaignSender":
+        if aiohttp is None:
+            raise ImportError("sending campaigns requires aiohttp, please run `pip install aiohttp`")
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.args.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.args.timeout),
+            headers={"accept": "application/json", "Content-Type": "application/json", "X-API-Key": self.args.api_key},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    async def send(self, batch: Batch, builder: BatchBuilder):
+        batch_id = self.state.claim(batch.destinations)
+        builder.pending.difference_update(batch.destinations)
+        name = self.envelope.get("name")
+        envelope = dict(self.envelope, name=f"{name} #{batch_id}") if name else self.envelope
+        status, campaign_id, error = await self._post(encode_request(envelope, batch))
+        self.state.settle(batch_id, status, campaign_id=campaign_id, error=error)
+        count = len(batch.destinations)
+        if status == BATCH_SENT:
+            self.stats.sent += count
+            logging.info("batch %d, lines %d-%d: campaign %s, %d destinations", batch_id, batch.first_line, batch.last_line, campaign_id, count)
+        elif status == BATCH_FAILED:
+            self.stats.failed += count
+            logging.warning("batch %d, lines %d-%d: failed, %d destinations released: %s", batch_id, batch.first_line, batch.last_line, count, error)
+        else:
+            self.stats.unknown += count
+            logging.warning("batch %d, lines %d-%d: outcome unknown, %d destinations kept: %s", batch_id, batch.first_line, batch.last_line, count, error)
+
+    async def _post(self, body: bytes) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        (status, campaign_id, error) of a campaign request. Creating a campaign is not idempotent, a request is
+        only resent when it was refused (429) or never reached the server.
+        """
+
+        async def send() -> Tuple[str, Optional[str], Optional[str]]:
+            try:
+                async with self._session.post(self.url, data=body) as response:
+                    status_code = response.status
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    text = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise AttemptFailed(e, never_sent=isinstance(e, aiohttp.ClientConnectorError))
+            if not 200 <= status_code < 300:
+                raise AttemptFailed(_CampaignHTTPError(status_code, text), status_code, retry_after)
+            try:
+                return BATCH_SENT, json.loads(text).get("id"), None
+            except (ValueError, AttributeError):
+                return BATCH_SENT, None, None
+
+        try:
+            return await send_with_retries_async(
+                send, self.retry_policy, idempotent=False, bucket=self.bucket, description="a campaign request"
+            )
+        except _CampaignHTTPError as e:
+            # 4xx: rejected without being processed. 5xx: it may have been processed.
+            return (BATCH_FAILED if e.status_code < 500 else BATCH_UNKNOWN), None, str(e)
+        except aiohttp.ClientConnectorError as e:
+            # The connection was never opened, the server did not see the request.
+            return BATCH_FAILED, None, f"{e.__class__.__name__} {e}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return BATCH_UNKNOWN, None, f"{e.__class__.__name__} {e}"
+
+
+async def send_campaign(args: argparse.Namespace, envelope: dict, state: CampaignStateStore, stats: SendStats):
+    builder = BatchBuilder(
+        state, stats, args.batch_size, args.max_request_bytes, len(json.dumps(envelope).encode()) + 64
+    )
+    # Bounded, so the file is read only as fast as the batches are sent.
+    batches: "asyncio.Queue[Optional[Batch]]" = asyncio.Queue(maxsize=args.concurrency)
+
+    async with CampaignSender(args, state, stats, envelope) as sender:
+
+        async def work():
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    return
+                try:
+                    await sender.send(batch, builder)
+                except Exception as e:
+                    logging.error("failed to send a batch of lines %d-%d: %s %s", batch.first_line, batch.last_line, e.__class__.__name__, e)
+
+        workers = [asyncio.create_task(work()) for _ in range(args.concurrency)]
+        for index, (line_number, destination) in enumerate(read_destinations(args.destinations, args.input_format)):
+            batch = builder.add(line_number, destination)
+            if batch:
+                await batches.put(batch)
+            elif index % 1000 == 0:
+                # Let the workers run while a long stretch of already sent destinations is skipped.
+                await asyncio.sleep(0)
+        batch = builder.seal()
+        if batch:
+            await batches.put(batch)
+        for _ in workers:
+            await batches.put(None)
+        await asyncio.gather(*workers)
+
+
+def dry_run(args: argparse.Namespace, envelope: dict, state: Optional[CampaignStateStore], stats: SendStats):
+    """Build the batches without sending them, and print the first request body."""
+    builder = BatchBuilder(state, stats, args.batch_size, args.max_request_bytes, len(json.dumps(envelope).encode()) + 64)
+    first_body = None
+    largest = 0
+
+    def account(batch: Batch):
+        nonlocal first_body, largest
+        body = encode_request(envelope, batch)
+        largest = max(largest, len(body))
+        if first_body is None:
+            first_body = body
+        builder.pending.clear()
+
+    for line_number, destination in read_destinations(args.destinations, args.input_format):
+        batch = builder.add(line_number, destination)
+        if batch:
+            account(batch)
+    batch = builder.seal()
+    if batch:
+        account(batch)
+    if first_body:
+        print(json.dumps(json.loads(first_body), indent=2, ensure_ascii=False)[:5000])
+    print(f"{stats.batches} campaign requests, the largest is {largest:,} bytes")
+
+
+def print_summary(stats: SendStats, state: Optional[CampaignStateStore], elapsed: float):
+    print(
+        f"{stats.rows} rows in {elapsed:.1f}s: {stats.sent} destinations sent, {stats.failed} failed,"
+        f" {stats.unknown} unknown, {stats.already_claimed} skipped as already claimed,"
+        f" {stats.duplicates} duplicates, {stats.invalid} invalid rows"
+    )
+    if state:
+        unknown = state.batches([BATCH_UNKNOWN])
+        if unknown:
+            print(f"{len(unknown)} campaign requests may have reached the server, their destinations are not resent:")
+            for batch in unknown:
+                print(f"  batch {batch.batch_id}: {batch.destinations} destinations, {batch.error}")
+            print("Check the campaigns of the workspace, and run again with --resend-unknown to send them anyway.")
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--api-key",
+        dest="api_key",
+        type=str,
+        required=False,
+        default=os.environ.get("SEAX_API_KEY"),
+        help="Set the SeaX API key, SEAX_API_KEY by default.",
+    )
+    parser.add_argument(
+        "--workspace-id",
+        dest="workspace_id",
+        type=str,
+        required=True,
+        help="Set the workspace ID.",
+    )
+    parser.add_argument(
+        "--base-url",
+        dest="base_url",
+        type=str,
+        required=False,
+        default=DEFAULT_BASE_URL,
+        help="Set the SeaX API base URL, e.g. https://seax-dev.seasalt.ai/seax-api.",
+    )
+    parser.add_argument(
+        "--sender-whatsapp-number",
+        dest="sender_whatsapp_number",
+        type=str,
+        required=True,
+        help="Set the WhatsApp Business number sending the messages.",
+    )
+    parser.add_argument(
+        "--template",
+        dest="template",
+        type=str,
+        required=True,
+        help="Set the name of the approved template.",
+    )
+    parser.add_argument(
+        "--language-code",
+        dest="language_code",
+        type=str,
+        required=False,
+        default="en",
+        help="Set the language code of the template, e.g. en_US or es_MX.",
+    )
+    parser.add_argument(
+        "--campaign-name",
+        dest="campaign_name",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the campaign name, every request creates a campaign named '<name> #<batch>'.",
+    )
+    parser.add_argument(
+        "--destinations",
+        dest="destinations",
+        type=str,
+        required=True,
+        help="Set the CSV or JSONL file of the destinations.",
+    )
+    parser.add_argument(
+        "--input-format",
+        dest="input_format",
+        type=str,
+        choices=("csv", "jsonl"),
+        required=False,
+        default=None,
+        help="Set the format of the destinations file, by default from its extension.",
+    )
+    parser.add_argument(
+        "--components",
+        dest="components",
+        type=str,
+        required=False,
+        default=None,
+        help="Set a JSON file with the components shared by all destinations.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        dest="batch_size",
+        type=int,
+        required=False,
+        default=1000,
+        help="Set the maximum number of destinations per campaign request.",
+    )
+    parser.add_argument(
+        "--max-request-bytes",
+        dest="max_request_bytes",
+        type=int,
+        required=False,
+        default=1024 * 1024,
+        help="Set the maximum size of a campaign request body.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        type=int,
+        required=False,
+        default=4,
+        help="Set the number of campaign requests in flight.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=float,
+        required=False,
+        default=2.0,
+        help="Set the maximum number of campaign requests per second, 0 for no limit.",
+    )
+    parser.add_argument(
+        "--rate-limit-burst",
+        dest="rate_limit_burst",
+        type=float,
+        required=False,
+        default=1.0,
+        help="Set the number of requests that may be sent at once before the rate limit applies.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        dest="max_retries",
+        type=int,
+        required=False,
+        default=5,
+        help="Set the number of retries of a request that was refused (429) or could not connect.",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        required=False,
+        default=120.0,
+        help="Set the timeout of a campaign request in seconds.",
+    )
+    parser.add_argument(
+        "--state-db",
+        dest="state_db",
+        type=str,
+        required=False,
+        default=None,
+        help="Set the SQLite file recording the progress, <destinations>.state.db by default.",
+    )
+    parser.add_argument(
+        "--resend-unknown",
+        dest="resend_unknown",
+        action="store_true",
+        required=False,
+        default=False,
+        help="Send again the destinations of the requests with an unknown outcome in a previous run.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        required=False,
+        default=False,
+        help="Print the first campaign request and the number of requests without sending anything.",
+    )
+    parser.add_argument(
+        "--log-level",
+        dest="log_level",
+        type=str,
+        required=False,
+        default="INFO",
+        help="Set the log level.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(levelname)-8s %(message)s", stream=sys.stdout)
+    shared_components = None
+    if args.components:
+        with open(args.components) as f:
+            shared_components = json.load(f)
+    envelope = campaign_envelope(args, shared_components)
+    state_path = args.state_db or f"{args.destinations}.state.db"
+    stats = SendStats()
+    start_time = time.monotonic()
+
+    if args.dry_run:
+        state = CampaignStateStore(state_path) if os.path.exists(state_path) else None
+        dry_run(args, envelope, state, stats)
+        return 0
+    if not args.api_key:
+        print("Set --api-key or SEAX_API_KEY.", file=sys.stderr)
+        return 2
+    state = CampaignStateStore(state_path)
+    try:
+        if args.resend_unknown:
+            logging.info("released the destinations of %d requests with an unknown outcome", state.release_unknown())
+        asyncio.run(send_campaign(args, envelope, state, stats))
+        print_summary(stats, state, time.monotonic() - start_time)
+    finally:
+        state.close()
+    return 0 if stats.failed == 0 and stats.unknown == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,20 @@
+import random
+
+from analytics_cache import _sum
+
+
+def test_sum_of_floats_keeps_the_precision_of_the_daily_values():
+    assert _sum([0.1, 0.2]) == 0.3
+    days = [{"avg_minutes": round(random.Random(day).uniform(0, 500), 1), "count": day} for day in range(90)]
+    total = _sum(days)
+    assert total["avg_minutes"] == round(sum(day["avg_minutes"] for day in days), 1)
+    assert total["count"] == sum(range(90))
+    assert isinstance(total["count"], int)
+
+
+def test_sum_rounds_to_the_most_precise_value():
+    assert _sum([1.25, 0.1, None, 2]) == 3.35
+    assert _sum([{"user_count": 3, "rate": 0.5}, {"user_count": 4, "rate": 0.25}], not_additive=("user_count",)) == {
+        "user_count": None,
+        "rate": 0.75,
+    }
@@ -0,0 +1,39 @@
+import math
+import wave
+
+import numpy as np
+import pytest
+
+from audio_transcode import transcode_wav
+
+
+def _write_wav(path: str, frames: int, sample_rate: int, channels: int = 1):
+    samples = (np.sin(np.arange(frames * channels) / 10) * 10000).astype("<i2")
+    with wave.open(path, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(samples.tobytes())
+
+
+@pytest.mark.parametrize(
+    "frames,src_rate,dst_rate",
+    [
+        (24000, 8000, 16000),
+        (1, 8000, 16000),
+        (3, 8000, 44100),
+        (24000, 16000, 8000),
+        (24001, 16000, 8000),
+        (44100, 44100, 16000),
+        (1000, 16000, 16000),
+    ],
+)
+def test_output_length_matches_the_declared_rate(tmp_path, frames, src_rate, dst_rate):
+    src_path, dst_path = str(tmp_path / "src.wav"), str(tmp_path / "dst.wav")
+    _write_wav(src_path, frames, src_rate, channels=2)
+    # Small blocks, so that the carry-over between blocks is exercised too.
+    transcode_wav(src_path, dst_path, dst_rate, block_frames=997)
+    with wave.open(dst_path, "rb") as reader:
+        assert reader.getframerate() == dst_rate
+        assert reader.getnchannels() == 1
+        assert reader.getnframes() == math.ceil(frames * dst_rate / src_rate)
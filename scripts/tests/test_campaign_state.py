@@ -0,0 +1,41 @@
+from campaign_state import BATCH_FAILED, BATCH_SENT, BATCH_UNKNOWN, CampaignStateStore
+
+
+def test_a_failed_batch_releases_its_destinations(tmp_path):
+    state = CampaignStateStore(str(tmp_path / "state.db"))
+    batch_id = state.claim(["+1", "+2"])
+    assert state.is_claimed("+1") and state.is_claimed("+2")
+    state.settle(batch_id, BATCH_FAILED, error="HTTP 400")
+    assert not state.is_claimed("+1") and not state.is_claimed("+2")
+    # The destinations can be claimed again by the next batch.
+    state.settle(state.claim(["+1", "+2"]), BATCH_SENT, campaign_id="c1")
+    assert state.counts() == {BATCH_FAILED: 2, BATCH_SENT: 2}
+    state.close()
+
+
+def test_unknown_and_interrupted_batches_keep_their_destinations(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = CampaignStateStore(path)
+    state.settle(state.claim(["+1"]), BATCH_UNKNOWN, error="TimeoutError")
+    state.claim(["+2"])
+    state.close()
+
+    # The batch still sending when the run ended may have been sent, it is unknown too.
+    state = CampaignStateStore(path)
+    assert state.is_claimed("+1") and state.is_claimed("+2")
+    assert [(batch.status, batch.error) for batch in state.batches()] == [
+        (BATCH_UNKNOWN, "TimeoutError"),
+        (BATCH_UNKNOWN, "interrupted while sending"),
+    ]
+    state.close()
+
+
+def test_release_unknown(tmp_path):
+    state = CampaignStateStore(str(tmp_path / "state.db"))
+    state.settle(state.claim(["+1"]), BATCH_UNKNOWN)
+    state.settle(state.claim(["+2"]), BATCH_SENT, campaign_id="c1")
+    assert state.release_unknown() == 1
+    assert not state.is_claimed("+1")
+    assert state.is_claimed("+2")
+    assert state.batches([BATCH_UNKNOWN]) == []
+    state.close()
@@ -0,0 +1,23 @@
+import os
+import shutil
+
+from generate_client import DEFAULT_SPECS_DIR, SERVICES, ensure_service
+
+
+def test_ensure_service_generates_a_missing_or_outdated_package(tmp_path):
+    specs_dir = tmp_path / "specs"
+    specs_dir.mkdir()
+    spec_file = SERVICES["analytics"][0]
+    shutil.copy(os.path.join(DEFAULT_SPECS_DIR, spec_file), specs_dir / spec_file)
+    output_dir = tmp_path / "seasalt_client"
+    output_dir.mkdir()
+
+    assert ensure_service("analytics", str(specs_dir), str(output_dir))
+    assert (output_dir / "analytics" / "__init__.py").exists()
+    assert not ensure_service("analytics", str(specs_dir), str(output_dir))
+
+    with open(specs_dir / spec_file, "a") as f:
+        f.write("\n")
+    assert ensure_service("analytics", str(specs_dir), str(output_dir))
+    # Nothing but the package is left behind.
+    assert sorted(os.listdir(output_dir)) == ["analytics"]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from rate_limit import AttemptFailed, RetryPolicy, TokenBucket, send_with_retries, send_with_retries_async
+
+
+class _Flaky:
+    """Fails with the given (status_code, never_sent) attempts, then returns the number of calls."""
+
+    def __init__(self, *failures):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.failures:
+            status_code, never_sent = self.failures.pop(0)
+            raise AttemptFailed(ValueError(f"attempt {self.calls}"), status_code, never_sent=never_sent)
+        return self.calls
+
+
+POLICY = RetryPolicy(max_retries=3, backoff=0.0)
+
+
+def test_retries_until_the_send_succeeds():
+    assert send_with_retries(_Flaky((503, False), (None, False)), POLICY, idempotent=True) == 3
+
+
+def test_a_non_idempotent_request_is_only_resent_when_it_was_rejected_or_never_sent():
+    assert send_with_retries(_Flaky((429, False), (None, True)), POLICY, idempotent=False) == 3
+    send = _Flaky((503, False))
+    with pytest.raises(ValueError, match="attempt 1"):
+        send_with_retries(send, POLICY, idempotent=False)
+    assert send.calls == 1
+
+
+def test_the_error_of_the_last_attempt_is_raised():
+    send = _Flaky(*[(429, False)] * 5)
+    with pytest.raises(ValueError, match="attempt 4"):
+        send_with_retries(send, POLICY, idempotent=True)
+    assert send.calls == POLICY.max_retries + 1
+
+
+def test_the_bucket_slows_down_when_throttled():
+    bucket = TokenBucket(rate=1000.0)
+    send_with_retries(_Flaky((429, False)), POLICY, idempotent=False, bucket=bucket)
+    # Lowered by the 429, then raised a little by the success.
+    assert bucket.rate == pytest.approx(1000.0 * 0.75 + 1000.0 * 0.05)
+
+
+def test_async_runner():
+    flaky = _Flaky((429, False), (502, False))
+
+    async def send():
+        return flaky()
+
+    assert asyncio.run(send_with_retries_async(send, POLICY, idempotent=True)) == 3
@@ -0,0 +1,108 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from campaign_state import BATCH_SENT, BATCH_UNKNOWN, CampaignStateStore
+from send_wabp_campaign import BatchBuilder, SendStats, main, parse_args
+
+
+class _CampaignHandler(BaseHTTPRequestHandler):
+    """Answers the campaign requests with the next status of `statuses`, 200 once they are used up."""
+
+    statuses = []
+    received = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 200:
+            self.received.extend(item["destination"] for item in body["highly_structured_message"]["destinations"])
+        payload = json.dumps({"id": f"campaign-{len(self.received)}"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    _CampaignHandler.statuses = []
+    _CampaignHandler.received = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CampaignHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _run(server_url, tmp_path, *extra_args) -> int:
+    destinations = tmp_path / "audience.csv"
+    destinations.write_text("destination,body.1\n+1 555 0001,a\n+1 555 0002,b\n+1 555 0003,c\n")
+    argv = [
+        "--api-key", "key",
+        "--workspace-id", "ws",
+        "--base-url", server_url,
+        "--sender-whatsapp-number", "+10000000000",
+        "--template", "greeting",
+        "--destinations", str(destinations),
+        "--batch-size", "2",
+        "--concurrency", "1",
+        "--max-retries", "0",
+        "--state-db", str(tmp_path / "state.db"),
+    ]
+    return main(parse_args(argv + list(extra_args)))
+
+
+def test_unknown_batches_are_only_resent_with_resend_unknown(server_url, tmp_path):
+    # The first batch may have been processed by the server, the second one is sent.
+    _CampaignHandler.statuses = [504]
+    assert _run(server_url, tmp_path) == 1
+    assert _CampaignHandler.received == ["+15550003"]
+
+    assert _run(server_url, tmp_path) == 0
+    assert _CampaignHandler.received == ["+15550003"]
+
+    assert _run(server_url, tmp_path, "--resend-unknown") == 0
+    assert sorted(_CampaignHandler.received) == ["+15550001", "+15550002", "+15550003"]
+    state = CampaignStateStore(str(tmp_path / "state.db"))
+    assert state.batches([BATCH_UNKNOWN]) == []
+    assert state.counts()[BATCH_SENT] == 3
+    state.close()
+
+
+def test_failed_batches_are_sent_again_by_the_next_run(server_url, tmp_path):
+    _CampaignHandler.statuses = [400]
+    assert _run(server_url, tmp_path) == 1
+    assert _CampaignHandler.received == ["+15550003"]
+    assert _run(server_url, tmp_path) == 0
+    assert sorted(_CampaignHandler.received) == ["+15550001", "+15550002", "+15550003"]
+
+
+def test_duplicates_across_sealed_batches_are_skipped(tmp_path):
+    state = CampaignStateStore(str(tmp_path / "state.db"))
+    stats = SendStats()
+    builder = BatchBuilder(state, stats, batch_size=2, max_request_bytes=10000, envelope_bytes=100)
+    first = builder.add(2, {"destination": "+1"}) or builder.add(3, {"destination": "+2"})
+    assert first.destinations == ["+1", "+2"]
+
+    # Sealed but not claimed yet: still a duplicate.
+    assert builder.add(4, {"destination": "+1"}) is None
+    assert stats.duplicates == 1
+
+    # Claimed by the sender: skipped as already claimed, by this run and by the next ones.
+    state.claim(first.destinations)
+    builder.pending.difference_update(first.destinations)
+    assert builder.add(5, {"destination": "+2"}) is None
+    assert stats.already_claimed == 1
+    assert builder.add(6, {"destination": "+3"}) is None
+    assert builder.add(7, {"destination": "+3"}) is None
+    assert builder.seal().destinations == ["+3"]
+    assert stats.duplicates == 2
+    state.close()
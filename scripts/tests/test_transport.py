@@ -0,0 +1,124 @@
+import asyncio
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rate_limit import RetryPolicy
+from seasalt_client._transport import AsyncEndpoints, AsyncTransport, Endpoints, Transport
+
+
+class _FlakyUploadHandler(BaseHTTPRequestHandler):
+    """Answers the first request of every path with a 503, the next ones with the multipart body they carried."""
+
+    seen = set()
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path not in self.seen:
+            self.seen.add(self.path)
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.dumps({"body": body.decode()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Stream(io.RawIOBase):
+    """A file that can only be read once, like a socket or a pipe."""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._data.read(len(buffer))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyUploadHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _body():
+    return {
+        "seekable": io.BytesIO(b"seekable-content"),
+        "stream": _Stream(b"stream-content"),
+        "tuple": ("report.csv", io.BytesIO(b"tuple-content"), "text/csv"),
+        "field": "value",
+    }
+
+
+def test_file_parts_are_sent_again_on_retry(server_url):
+    transport = Transport(retry_policy=RetryPolicy(max_retries=2, backoff=0.0))
+    try:
+        result = transport.request("PUT", f"{server_url}/sync", body=_body(), content_type="multipart/form-data")
+    finally:
+        transport.close()
+    for content in ("seekable-content", "stream-content", "tuple-content", "value"):
+        assert content in result["body"]
+
+
+def test_async_file_parts_are_sent_again_on_retry(server_url):
+    async def request():
+        transport = AsyncTransport(retry_policy=RetryPolicy(max_retries=2, backoff=0.0))
+        try:
+            return await transport.request("PUT", f"{server_url}/async", body=_body(), content_type="multipart/form-data")
+        finally:
+            await transport.close()
+
+    result = asyncio.run(request())
+    for content in ("seekable-content", "stream-content", "tuple-content", "value"):
+        assert content in result["body"]
+
+
+def _pages(*pages):
+    calls = []
+
+    def fetch(limit, offset, **kwargs):
+        calls.append((limit, offset))
+        return pages[len(calls) - 1] if len(calls) <= len(pages) else {"data": ["unexpected"]}
+
+    return fetch, calls
+
+
+def test_paginate_stops_at_a_short_or_empty_page():
+    fetch, calls = _pages({"data": [1, 2]}, {"data": [3]})
+    assert list(Endpoints._paginate(fetch, "data", {}, 2)) == [1, 2, 3]
+    assert calls == [(2, 0), (2, 2)]
+    fetch, calls = _pages({"data": [1, 2]}, {"data": []})
+    assert list(Endpoints._paginate(fetch, "data", {}, 2)) == [1, 2]
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("page_size", [0, -1])
+def test_paginate_rejects_a_page_size_below_one(page_size):
+    fetch, calls = _pages({"data": [1]})
+    with pytest.raises(ValueError):
+        list(Endpoints._paginate(fetch, "data", {}, page_size))
+
+    async def iterate():
+        return [item async for item in AsyncEndpoints._paginate(fetch, "data", {}, page_size)]
+
+    with pytest.raises(ValueError):
+        asyncio.run(iterate())
+    assert calls == []